@@ -9,8 +9,10 @@ __date__ = ""
 __version__ = "1.1.0"
 __copyright__ = "The University of Queensland, 2019"
 
+import os
 import time
 import math
+import random
 import tkinter as tk
 from tkinter import *
 from tkinter import simpledialog
@@ -19,45 +21,53 @@ from typing import Tuple, List
 
 import pymunk
 
-from game.block import Block, MysteryBlock
+from game.block import Block, MysteryBlock, TerrainBlock
 from game.entity import Entity, BoundaryWall
-from game.mob import Mob, CloudMob, Fireball
+from game.input import InputState
+from game.mob import Mob, CloudMob
 from game.item import DroppedItem, Coin
+from game.lifetime import LifetimePolicy
+from game.lod import LevelOfDetail
+from game.diagnostics import LeakDiagnostics
+from game.profiler import CollisionAccounting, FrameProfiler
+from game.projectile import Fireball
+from game.recording import InputRecording, state_hash
+from game.trace import TraceRecorder
+from game.trigger import TriggerZone
 from game.view import GameView, ViewRenderer
-from game.world import World
+from game.world import World, PHYSICAL_THING_CATEGORIES, STEP_SIZE
 
-from level import load_world, WorldBuilder
+from level import build_level, EntityRegistry, LevelPrefetcher, WorldBuilder
 from player import Player
 
 BLOCK_SIZE = 2 ** 4
 MAX_WINDOW_SIZE = (1080, math.inf)
-
-GOAL_SIZES = {
-    "flag": (0.2, 9),
-    "tunnel": (2, 2)
+# The distance, in pixels, beyond the edges of the canvas that things are still drawn
+DRAW_MARGIN = 2 * BLOCK_SIZE
+# The categories of thing which are drawn, every one including the boundary walls
+DRAWN_CATEGORIES = tuple(PHYSICAL_THING_CATEGORIES)
+# The radius, in pixels, around a switch within which its bricks are destroyed
+SWITCH_RANGE = 60
+
+# The bursts of particles when a brick is destroyed and an item collected, see World.emit_particles
+BRICK_PARTICLES = {'count': 24, 'colour': '#b4501e', 'speed': (60, 180), 'lifetime': (0.4, 0.9)}
+COLLECT_PARTICLES = {'count': 12, 'colour': 'gold', 'speed': (30, 90), 'lifetime': (0.2, 0.5)}
+
+# Number of frames recorded to a trace, unless overridden by MARIO_TRACE_FRAMES
+TRACE_FRAMES = 600
+
+# Mapping of the key names bound to each action of the player
+KEY_BINDINGS = {
+    'd': "right", 'Right': "right",
+    'a': "left", 'Left': "left",
+    'w': "jump", 'Up': "jump", 'space': "jump",
+    's': "duck", 'Down': "duck",
+    'f': "sprint_right",
+    'q': "sprint_left",
 }
 
-BLOCKS = {
-    '#': 'brick',
-    '%': 'brick_base',
-    '?': 'mystery_empty',
-    '$': 'mystery_coin',
-    '^': 'cube',
-    'b': 'bounce_block',
-    'I': 'flag',
-    '=': 'tunnel',
-    'S': 'switch'
-}
-
-ITEMS = {
-    'C': 'coin',
-    '*': 'star'
-}
-
-MOBS = {
-    '&': "cloud",
-    '@': 'mushroom'
-}
+# The horizontal velocity of the player while walking (right, left)
+WALK_VELOCITY = (150, -50)
 
 
 def read_config(filename):
@@ -112,6 +122,25 @@ def exist_value(config, setting):
         return False
 
 
+def read_level_graph(config):
+    """Returns the levels reachable from each level in the configuration dictionary.
+
+    Parameters:
+        config (dict<str: dict<str: str>>): Section to Setting-Value mapping.
+
+    Return:
+        (dict<str: list<str>>): Mapping of a level filename to the level
+                                filenames reachable through its goal and tunnel.
+    """
+    graph = {}
+    for tag, settings in config.items():
+        neighbours = [value.strip() for attr, value in settings.items()
+                      if attr.strip() in ('goal', 'tunnel')]
+        if neighbours:
+            graph[tag] = [level for level in neighbours if level != 'END']
+    return graph
+
+
 def read_high_score(file_name):
     score_list = []
     try:
@@ -160,111 +189,20 @@ def edit_high_score(name_data, score_data, position, file_name):
             break
 
 
-def create_block(world: World, block_id: str, x: int, y: int, *args):
-    """Create a new block instance and add it to the world based on the block_id.
-
-    Parameters:
-        world (World): The world where the block should be added to.
-        block_id (str): The block identifier of the block to create.
-        x (int): The x coordinate of the block.
-        y (int): The y coordinate of the block.
-    """
-    block_id = BLOCKS[block_id]
-    if block_id == "mystery_empty":
-        block = MysteryBlock()
-    elif block_id == "mystery_coin":
-        block = MysteryBlock(drop="coin", drop_range=(3, 6))
-    elif block_id == 'bounce_block':
-        block = BounceBlock()
-    elif block_id == 'flag':
-        block = Goals('flag')
-    elif block_id == 'tunnel':
-        block = Goals('tunnel')
-    elif block_id == 'switch':
-        block = Switch()
-    else:
-        block = Block(block_id)
-
-    world.add_block(block, x * BLOCK_SIZE, y * BLOCK_SIZE)
-
-
-def create_item(world: World, item_id: str, x: int, y: int, *args):
-    """Create a new item instance and add it to the world based on the item_id.
-
-    Parameters:
-        world (World): The world where the item should be added to.
-        item_id (str): The item identifier of the item to create.
-        x (int): The x coordinate of the item.
-        y (int): The y coordinate of the item.
-    """
-    item_id = ITEMS[item_id]
-    if item_id == "coin":
-        item = Coin()
-    elif item_id == 'star':
-        item = Star()
-    else:
-        item = DroppedItem(item_id)
-
-    world.add_item(item, x * BLOCK_SIZE, y * BLOCK_SIZE)
-
-
-def create_mob(world: World, mob_id: str, x: int, y: int, *args):
-    """Create a new mob instance and add it to the world based on the mob_id.
-
-    Parameters:
-        world (World): The world where the mob should be added to.
-        mob_id (str): The mob identifier of the mob to create.
-        x (int): The x coordinate of the mob.
-        y (int): The y coordinate of the mob.
-    """
-    mob_id = MOBS[mob_id]
-    if mob_id == "cloud":
-        mob = CloudMob()
-    elif mob_id == "fireball":
-        mob = Fireball()
-    elif mob_id == "mushroom":
-        mob = MushroomMob()
-    else:
-        mob = Mob(mob_id, size=(1, 1))
-
-    world.add_mob(mob, x * BLOCK_SIZE, y * BLOCK_SIZE)
-
-
 def create_unknown(world: World, entity_id: str, x: int, y: int, *args):
     """Create an unknown entity."""
     world.add_thing(Entity(), x * BLOCK_SIZE, y * BLOCK_SIZE,
                     size=(BLOCK_SIZE, BLOCK_SIZE))
 
 
-BLOCK_IMAGES = {
-    "brick": "brick",
-    "brick_base": "brick_base",
-    "cube": "cube",
-    "bounce_block": "bounce_block",
-    'flag': 'flag',
-    'tunnel': 'tunnel',
-    'switch': 'switch',
-    'switch_pressed': 'switch_pressed'
-}
-
-ITEM_IMAGES = {
-    "coin": "coin_item",
-    'star': 'star'
-}
-
-MOB_IMAGES = {
-    "cloud": "floaty",
-    "fireball": "fireball_down",
-    "mushroom": "mushroom"
-}
-
-
 class Switch(Block):
     """ A Switch block destroy all bricks within a close radius of the switch when player land on its top
 
         The active state of a Switch block is whether it was pressed or not.
     """
 
+    __slots__ = ("_active",)
+
     _id = 'switch'
 
     def __init__(self):
@@ -281,10 +219,13 @@ class Switch(Block):
             player.set_switch_start_time()
             if player.get_switch_active() is False:
                 self._active = False
-                all_things = world.get_things_in_range(self.get_position()[0], self.get_position()[1], float(60))
+                x, y = self.get_position()
+                all_things = world.get_things_in_bb(x - SWITCH_RANGE, y - SWITCH_RANGE,
+                                                    x + SWITCH_RANGE, y + SWITCH_RANGE, categories=("block",))
 
                 for thing in all_things:
-                    if isinstance(thing, Block):
+                    # the rectangle query bounds the circle, whose corners are left out
+                    if isinstance(thing, Block) and thing.get_shape().point_query((x, y))[0] <= SWITCH_RANGE:
                         if thing.get_id() == 'brick':
                             player.bricks_position(thing.get_position())
                             world.remove_block(thing)
@@ -340,10 +281,9 @@ class MarioViewRenderer(ViewRenderer):
 
 
 class Goals(Block):
-    """ A Goal block immediately take the player to the next level when the player collide it.  """
+    """ A Goal block, the pipe of a tunnel which the player ducks into from the TunnelZone on top of it.  """
 
-    _id = None
-    _cell_size = None
+    __slots__ = ("type", "_cell_size")
 
     def __init__(self, mode):
         """Construct a new Goals block.
@@ -351,12 +291,10 @@ class Goals(Block):
             Parameters:
                 mode (str): The unique id of this block
         """
-        self._id = mode
+        super().__init__(mode)
         self.type = mode
-        super().__init__()
-        if self.type == 'flag':
-            self._cell_size = (0.2, 9)
-        elif self.type == 'tunnel':
+        self._cell_size = None
+        if self.type == 'tunnel':
             self._cell_size = (2, 2)
 
     def on_hit(self, event: pymunk.Arbiter, data):
@@ -364,9 +302,46 @@ class Goals(Block):
         pass
 
 
+class FlagZone(TriggerZone):
+    """ The flagpole at the end of a level, which takes the player to the next level when they enter it.  """
+
+    __slots__ = ()
+
+    _id = 'flag'
+    _cell_size = (0.2, 9)
+
+
+class TunnelZone(TriggerZone):
+    """ The top of a tunnel, from which the player can duck into the tunnel.  """
+
+    __slots__ = ()
+
+    _id = 'tunnel'
+    _cell_size = (2, 0.5)
+
+
+def build_tunnel(world: World, entity_id: str, x: int, y: int, *args):
+    """Builder of a tunnel, see WorldBuilder.register_builder.
+
+    Returns the placement of the pipe, and adds a TunnelZone on top of it.
+    """
+    tunnel, x, y = ENTITIES.build(world, entity_id, x, y, *args)
+    height = tunnel.get_cell_size()[1]
+    world.add_trigger(TunnelZone(), x, y - height * BLOCK_SIZE)
+    return tunnel, x, y
+
+
+def register_builders(builder: WorldBuilder):
+    """Register the builders of every level character of the game with a world builder"""
+    ENTITIES.register_with(builder)
+    builder.register_builder('=', build_tunnel)
+
+
 class Star(DroppedItem):
     """A star item that can be picked up to make the players invincible for 10 seconds. """
 
+    __slots__ = ()
+
     _id = 'star'
 
     def __init__(self):
@@ -389,6 +364,8 @@ class MushroomMob(Mob):
         When colliding with the block it will reverse.
         Being destroyed when player bounce off the top of it.
     """
+    __slots__ = ()
+
     _id = "mushroom"
 
     def __init__(self):
@@ -409,21 +386,21 @@ class MushroomMob(Mob):
                 player.change_health(-1)
                 player.set_velocity((-50, 0))
 
-                self._tempo = 0 - self._tempo
-                self.set_tempo(self._tempo)
+                self.set_tempo(0 - self.get_tempo())
 
             elif get_collision_direction(player, self) == 'R':
                 player.change_health(-1)
                 player.set_velocity((50, 0))
 
-                self._tempo = 0 - self._tempo
-                self.set_tempo(self._tempo)
+                self.set_tempo(0 - self.get_tempo())
             elif get_collision_direction(player, self) == 'A':
                 player.set_velocity((0, -50))
                 world.remove_mob(self)
 
 
 class BounceBlock(Block):
+    __slots__ = ()
+
     _id = "bounce_block"
 
     def __init__(self):
@@ -441,6 +418,23 @@ class BounceBlock(Block):
         player.set_velocity((0, -180))
 
 
+ENTITIES = EntityRegistry(BLOCK_SIZE)
+ENTITIES.register('#', "block", TerrainBlock, 'brick', sprite='brick')
+ENTITIES.register('%', "block", TerrainBlock, 'brick_base', sprite='brick_base')
+ENTITIES.register('?', "block", MysteryBlock)
+ENTITIES.register('$', "block", MysteryBlock, drop="coin", drop_range=(3, 6))
+ENTITIES.register('^', "block", TerrainBlock, 'cube', sprite='cube')
+ENTITIES.register('b', "block", BounceBlock, sprite='bounce_block')
+ENTITIES.register('I', "trigger", FlagZone, sprite='flag')
+ENTITIES.register('=', "block", Goals, 'tunnel', sprite='tunnel')
+ENTITIES.register('S', "block", Switch)
+ENTITIES.register('C', "item", Coin, sprite='coin_item')
+ENTITIES.register('*', "item", Star, sprite='star')
+ENTITIES.register('&', "mob", CloudMob, sprite='floaty')
+ENTITIES.register('@', "mob", MushroomMob, sprite='mushroom')
+ENTITIES.register(None, "projectile", Fireball, sprite='fireball_down')
+
+
 class StatusDisplay(tk.Frame):
     """ A Layout to show health bar and the score bar of the player which is updated during the game time"""
 
@@ -498,7 +492,7 @@ class StatusDisplay(tk.Frame):
 
     def update_invincible(self):
         """ Update and display the ACTIVE invincible state of player by changing health bar to yellow """
-        if self._player.is_invincible():
+        if self._player.get_invincible():
             self._frame3.config(bg='yellow')
 
     def not_invincible(self):
@@ -519,12 +513,6 @@ class MarioApp:
         """
         self._master = master
 
-        world_builder = WorldBuilder(BLOCK_SIZE, gravity=(0, 300), fallback=create_unknown)
-        world_builder.register_builders(BLOCKS.keys(), create_block)
-        world_builder.register_builders(ITEMS.keys(), create_item)
-        world_builder.register_builders(MOBS.keys(), create_mob)
-        self._builder = world_builder
-
         # Inform if the configuration file is invalid or missing
         try:
             config = read_config(file_name)
@@ -532,10 +520,117 @@ class MarioApp:
             messagebox.showwarning("Error", "Error: configuration file")
             self._master.destroy()
 
-        self._player = Player(max_health=5)
+        # Record all input from the start when requested by the environment
+        if os.environ.get('MARIO_RECORD'):
+            seed = int(os.environ.get('MARIO_SEED', random.randrange(2 ** 32)))
+            self._setup_game(config, seed=seed)
+            self._recording = InputRecording(file_name, seed, self._current_level)
+            self._recording_file = os.environ['MARIO_RECORD']
+        else:
+            self._setup_game(config)
+
+        self._renderer = MarioViewRenderer(ENTITIES.get_sprites("block"), ENTITIES.get_sprites("item"),
+                                           ENTITIES.get_sprites("mob"), ENTITIES.get_sprites("trigger"),
+                                           ENTITIES.get_sprites("projectile"))
+        size = tuple(map(min, zip(MAX_WINDOW_SIZE, self._world.get_pixel_size())))
+        self._view = GameView(master, size, self._renderer)
+        self._view.pack()
+
+        self.bind()
+
+        # File Menu layout
+        self._master.title('Mario')
+        self._master.protocol('WM_DELETE_WINDOW', self.quit)
+
+        self._status_display = StatusDisplay(self._master, self._player, size)
+        self._status_display.pack(fill=tk.X)
+
+        menu = tk.Menu(self._master)
+        self._master.config(menu=menu)
+        file = tk.Menu(menu)
+
+        menu.add_cascade(label="File", menu=file)
+        file.add_command(label="Load Level", command=self.load_level)
+        file.add_command(label="Reset Level", command=self.reset_level)
+        file.add_command(label="High Score", command=self.print_high_score)
+        file.add_command(label="Record Trace", command=self.toggle_trace)
+        file.add_command(label="Profiler", command=self.toggle_profiler)
+        file.add_command(label="Collision Stats", command=self.print_collision_stats)
+        file.add_command(label="Exit", command=self.exit)
+
+        # Record a trace from the start when requested by the environment
+        if os.environ.get('MARIO_TRACE'):
+            self.start_trace(os.environ['MARIO_TRACE'],
+                             int(os.environ.get('MARIO_TRACE_FRAMES', TRACE_FRAMES)))
+
+        # Wait for window to update before continuing
+        master.update_idletasks()
+
+        self.step()
+
+    def _setup_game(self, config, seed=None):
+        """Set up the player and the world of the starting level from the configuration.
+
+        Parameters:
+            config (dict<str: dict<str: str>>): Section to Setting-Value mapping.
+            seed (int): If given, the game is made deterministic: the random streams of
+                        each world are seeded and time is measured in simulation steps.
+        """
+        self._ticks = 0
+        self._deterministic = seed is not None
+        self._recording = None
+        self._input = InputState(KEY_BINDINGS)
+
+        world_builder = WorldBuilder(BLOCK_SIZE, gravity=(0, 300), fallback=create_unknown,
+                                     clock=self.get_time, seed=seed)
+        register_builders(world_builder)
+        self._builder = world_builder
+
+        self._prefetcher = LevelPrefetcher(read_level_graph(config))
+
+        # Report memory growth across levels when requested by the environment
+        self._diagnostics = LeakDiagnostics(strict=True) if os.environ.get('MARIO_DIAGNOSTICS') else None
+
+        # instruments timing each phase of a frame, see World.add_instrument
+        self._instruments = []
+        self._profiler = None
+        self._collision_accounting = None
+        self._tracer = None
+
+        # mobs far from the view are stepped less often, configured by the LOD section
+        lod_settings = {}
+        for setting, cast in (('near', float), ('far', float), ('interval', int)):
+            if exist_value(config, f'LOD-{setting} '):
+                lod_settings[setting] = cast(get_value(config, f'LOD-{setting} ').strip())
+        self._lod = LevelOfDetail(**lod_settings)
+
+        # spawned things expire and things leaving the world are despawned, configured by the Lifetime section
+        lifetime_settings = {'ttls': {}, 'budgets': {}}
+        for setting, value in config.get('Lifetime', {}).items():
+            setting = setting.strip()
+            if setting.endswith('_ttl'):
+                lifetime_settings['ttls'][setting[:-len('_ttl')]] = float(value)
+            elif setting.endswith('_budget'):
+                lifetime_settings['budgets'][setting[:-len('_budget')]] = int(value)
+            elif setting in ('margin', 'floor'):
+                lifetime_settings[setting] = float(value)
+        self._lifetime = LifetimePolicy(**lifetime_settings)
+
+        # items and mobs at rest fall asleep until woken, configured by the World section
+        self._sleep_time = None
+        if exist_value(config, 'World-sleep_time '):
+            self._sleep_time = float(get_value(config, 'World-sleep_time ').strip())
+
+        self._current_time = 0
+        self._on_tunnel = False
+        self._checked = False
+        self.current_y = 0
+        self.init_y = 0
 
         if exist_value(config, 'Player-health '):
-            self._player._max_health_health = float(get_value(config, 'Player-health ').strip())
+            self._player = Player(max_health=float(get_value(config, 'Player-health ').strip()))
+        else:
+            self._player = Player(max_health=5)
 
         if exist_value(config, 'World-start '):
             self.reset_world(get_value(config, 'World-start ').strip())
@@ -563,14 +658,6 @@ class MarioApp:
                                    , float(get_value(config, 'Player-y ').strip())
                                    , float(get_value(config, 'Player-mass ').strip()))
 
-
-        self._renderer = MarioViewRenderer(BLOCK_IMAGES, ITEM_IMAGES, MOB_IMAGES)
-        size = tuple(map(min, zip(MAX_WINDOW_SIZE, self._world.get_pixel_size())))
-        self._view = GameView(master, size, self._renderer)
-        self._view.pack()
-
-        self.bind()
-
         if exist_value(config, 'World-gravity '):
             self.gravity = int(get_value(config, 'World-gravity ').strip())
         else:
@@ -581,34 +668,14 @@ class MarioApp:
         else:
             self._max_velocity = 80
 
-        # File Menu layout
-        self._master.title('Mario')
-        self._master.protocol('WM_DELETE_WINDOW', self.quit)
-
-        self._status_display = StatusDisplay(self._master, self._player, size)
-        self._status_display.pack(fill=tk.X)
-
-        menu = tk.Menu(self._master)
-        self._master.config(menu=menu)
-        file = tk.Menu(menu)
-
-        menu.add_cascade(label="File", menu=file)
-        file.add_command(label="Load Level", command=self.load_level)
-        file.add_command(label="Reset Level", command=self.reset_level)
-        file.add_command(label="High Score", command=self.print_high_score)
-        file.add_command(label="Exit", command=self.exit)
-
-        # Wait for window to update before continuing
-        master.update_idletasks()
+    def get_time(self) -> float:
+        """(float) Returns the current time of the game, in seconds
 
-        self.step()
-
-        #
-        self._current_time = 0
-        self._on_tunnel = False
-        self._checked = False
-        self.current_y = 0
-        self.init_y = 0
+        A deterministic game measures time in simulation steps rather than wall time.
+        """
+        if self._deterministic:
+            return self._ticks * STEP_SIZE
+        return time.time()
 
     def print_high_score(self):
         """ Print the high score of player on the tk widget"""
@@ -624,6 +691,42 @@ class MarioApp:
             pass
         messagebox.showinfo("High Score", score_data)
 
+    def start_trace(self, filename, frames=TRACE_FRAMES):
+        """ Start recording the spans of each frame to a Chrome trace file
+
+        Parameters:
+            filename (str): The file to save the trace to
+            frames (int): The number of frames to record before saving the trace
+        """
+        self._tracer = TraceRecorder(filename, max_frames=frames)
+        self.add_instrument(self._tracer)
+
+    def stop_trace(self):
+        """ Stop recording the trace and save it to its file """
+        self.remove_instrument(self._tracer)
+        self._tracer.save()
+        self._tracer = None
+
+    def toggle_trace(self):
+        """ Start recording a trace to trace.json, or save the trace being recorded """
+        if self._tracer is None:
+            self.start_trace('trace.json')
+        else:
+            filename = self._tracer.get_filename()
+            self.stop_trace()
+            messagebox.showinfo("Record Trace", "Trace saved to " + filename)
+
+    def print_collision_stats(self):
+        """ Start accounting collision callbacks, or print the accounting so far on the tk widget"""
+        if self._collision_accounting is None:
+            self._collision_accounting = CollisionAccounting()
+            self._world.set_collision_accounting(self._collision_accounting)
+            messagebox.showinfo("Collision Stats", "Collision callbacks are now being counted")
+            return
+
+        lines = self._collision_accounting.format_lines()
+        messagebox.showinfo("Collision Stats", "\n".join(lines) or "No collision callbacks yet")
+
     def quit(self):
         """ Show a dialogue asking whether player want to restart the current level or
                    exit the game when player is out of health """
@@ -633,11 +736,14 @@ class MarioApp:
         if ans == 'yes':
             self.reset_level()
         else:
+            self.save_recording()
+            self._prefetcher.shutdown()
             self._master.quit()
 
     def load_level(self):
         """ Show a dialogue asking which level player want to load then load it """
         text = simpledialog.askstring("Load Level", "Please input a level filename:")
+        self._record_event("load", text)
         self.reset_world(text)
 
     def reset_level(self):
@@ -645,6 +751,7 @@ class MarioApp:
                 - Recover player's health to be full and display the health bar
                 - Reset player's score to be 0
         """
+        self._record_event("reset")
         self._status_display.reset_score()
         self._player.reset_health()
         self._player.reset_score()
@@ -653,32 +760,141 @@ class MarioApp:
 
     def exit(self):
         """ quit the game immediately """
+        self.save_recording()
+        self._prefetcher.shutdown()
         self._master.destroy()
 
     def reset_world(self, new_level):
-        self._world = load_world(self._builder, new_level)
+        """ Build the world of a level, then start compiling the levels reachable from it
+
+        Parameters:
+            new_level (str): The filename of the level to load
+        """
+        old_world = getattr(self, '_world', None)
+        self._world = build_level(self._builder, self._prefetcher.get(new_level))
         self._world.add_player(self._player, BLOCK_SIZE, BLOCK_SIZE)
         self._builder.clear()
 
         self._setup_collision_handlers()
+        self._world.set_level_of_detail(self._lod)
+        self._world.set_lifetime_policy(self._lifetime)
+        self._world.set_sleeping(self._sleep_time)
+        for instrument in self._instruments:
+            self._world.add_instrument(instrument)
+        self._world.set_collision_accounting(self._collision_accounting)
+        self._prefetcher.prefetch_neighbours(new_level)
+
+        if self._diagnostics is not None:
+            print("\n".join(self._diagnostics.on_reset(old_world)))
+
+    def add_instrument(self, instrument):
+        """Adds an instrument timing each phase of a frame, to this and any later world
+
+        Parameters:
+            instrument: The instrument to add, see World.add_instrument
+        """
+        self._instruments.append(instrument)
+        self._world.add_instrument(instrument)
+
+    def remove_instrument(self, instrument):
+        """Removes an instrument added with add_instrument"""
+        self._instruments.remove(instrument)
+        self._world.remove_instrument(instrument)
+
+    def toggle_profiler(self):
+        """ Show or hide the frame profiler overlay, only timing frames while it is shown """
+        if self._profiler is None:
+            self._profiler = FrameProfiler()
+            self.add_instrument(self._profiler)
+        else:
+            self.remove_instrument(self._profiler)
+            self._profiler = None
+
+    def _record_event(self, action, argument=None):
+        """ Record an input event at the current tick, if input is being recorded
+
+        Parameters:
+            action (str): The kind of event, e.g. "press"
+            argument (str): The detail of the event, e.g. the key pressed
+        """
+        if self._recording is not None:
+            self._recording.add_event(self._ticks, action, argument)
+
+    def save_recording(self):
+        """ Save the input recording, if input is being recorded """
+        if self._recording is not None:
+            self._recording.save(self._recording_file)
 
     def bind(self):
         """Bind all the keyboard events to their event handlers."""
-        x = self._player.get_velocity()[0]
-        y = self._player.get_velocity()[1]
+        for key in KEY_BINDINGS:
+            self._master.bind(f'<KeyPress-{key}>', lambda e, key=key: self.press_key(key))
+            self._master.bind(f'<KeyRelease-{key}>', lambda e, key=key: self.release_key(key))
+        self._master.bind('<F3>', lambda e: self.toggle_profiler())
 
-        self._master.bind('<d>', lambda e: self._move(x + 150, y))
-        self._master.bind('<a>', lambda e: self._move(x - 50, y))
-        self._master.bind('<w>', lambda e: self._jump())
-        self._master.bind('<s>', lambda e: self._duck())
-        self._master.bind('<f>', lambda e: self._move(self._max_velocity, 0))
-        self._master.bind('<q>', lambda e: self._move(0 - self._max_velocity, 0))
+    def press_key(self, key):
+        """ Hold down a key, which moves the player from the next tick on
+
+        Parameters:
+            key (str): The name of the key pressed, see KEY_BINDINGS
+        """
+        self._record_event("press", key)
+        self._input.press(key)
+
+    def release_key(self, key):
+        """ Release a key, from the next tick on
+
+        Parameters:
+            key (str): The name of the key released, see KEY_BINDINGS
+        """
+        self._record_event("release", key)
+        self._input.release(key)
+
+    def _apply_input(self):
+        """ Move the player according to the keys held since the last tick """
+        self._input.update()
+
+        if self._input.was_pressed("jump"):
+            self._jump()
+        if self._input.was_pressed("duck"):
+            self._duck()
+
+        if self._input.is_held("sprint_right"):
+            velocity = self._max_velocity
+        elif self._input.is_held("sprint_left"):
+            velocity = 0 - self._max_velocity
+        elif self._input.is_held("right"):
+            velocity = WALK_VELOCITY[0]
+        elif self._input.is_held("left"):
+            velocity = WALK_VELOCITY[1]
+        else:
+            return
+
+        # only the horizontal velocity is held, the player keeps falling or jumping
+        self._player.set_velocity((velocity, self._player.get_velocity()[1]))
 
     def redraw(self):
         """Redraw all the entities in the game canvas."""
-        self._view.delete(tk.ALL)
-
-        self._view.draw_entities(self._world.get_all_things())
+        # the canvas items of particles are kept and reused between frames
+        self._view.delete("!particle")
+
+        # only the things on the canvas are drawn, with a margin for sprites larger than their shape
+        left, top, right, bottom = self._view.get_visible_area()
+        self._view.draw_entities(self._world.get_things_in_bb(
+            left - DRAW_MARGIN, top - DRAW_MARGIN, right + DRAW_MARGIN, bottom + DRAW_MARGIN,
+            categories=DRAWN_CATEGORIES))
+        self._view.draw_entities(self._world.get_projectiles())
+        self._view.draw_particles(self._world.get_particles())
+
+        if self._profiler is not None:
+            counts = self._world.get_thing_counts()
+            for bucket, count in self._world.get_lod_counts().items():
+                counts[f"lod_{bucket}"] = count
+            counts.update(self._world.get_lifetime_counts())
+            counts["particles"] = self._world.get_particles().get_count()
+            for component, count in self._world.get_components().get_counts().items():
+                counts[f"ecs_{component}"] = count
+            self._view.draw_overlay(self._profiler.format_lines(counts))
 
     def scroll(self):
         """Scroll the view along with the player in the center unless
@@ -702,34 +918,94 @@ class MarioApp:
 
     def step(self):
         """Step the world physics and redraw the canvas."""
+        start = time.perf_counter()
+        self.tick()
+
+        scroll_start = time.perf_counter()
+        self.scroll()
+        redraw_start = time.perf_counter()
+        self.redraw()
+        end = time.perf_counter()
+
+        if self._instruments:
+            for category, name, span_start, span_end in (("app", "scroll", scroll_start, redraw_start),
+                                                         ("app", "redraw", redraw_start, end),
+                                                         ("frame", "frame", start, end)):
+                self._world.record(category, name, span_start, span_end)
+
+            if self._tracer is not None and self._tracer.is_complete():
+                self.stop_trace()
+
+        self._master.after(10, self.step)
+
+    def tick(self):
+        """Advance the game by one simulation step, without drawing."""
+        # polled before this tick refers to the world, as a level may be replaced during the last step
+        if self._diagnostics is not None:
+            for line in self._diagnostics.poll():
+                print(line)
+
+        self._apply_input()
+        self._update_viewport()
+
         data = (self._world, self._player)
         self._world.step(data)
 
         # Change the health bar color back to normal when invincible time is over
-        if (time.time() - self._player.get_invincible_start_time()) > 10.0:
+        if (self.get_time() - self._player.get_invincible_start_time()) > 10.0:
             self._status_display.not_invincible()
 
+        switch_start = time.perf_counter()
         # Add back all removed bricks after the 10s of Switch time
-        if (time.time() - self._player.get_switch_start_time()) > 10.0 and self._player.get_switch() is not None:
-            self._player.get_switch().set_active()
+        switch = self._player.get_switch()
+        if (self.get_time() - self._player.get_switch_start_time()) > 10.0 and switch is not None:
+            switch.set_active()
             self._player.set_switch_to_none()
-            for thing in self._player.get_bricks_position():
-                block = Block('brick')
-                self._world.add_block(block, thing[0], thing[1])
+            # bricks are only added back to the world of the switch, in the cells still left empty
+            if switch.get_shape().space is self._world.get_space():
+                for x, y in self._player.get_bricks_position():
+                    column, row = self._world.xy_to_grid(x, y)
+                    if self._world.get_tile(column, row) is None:
+                        self._world.set_tile(column, row, 'brick')
+            self._player.clear_bricks_position()
+        switch_end = time.perf_counter()
+
+        if self._instruments:
+            self._world.record("app", "switch", switch_start, switch_end)
 
         # Check whether out of health or not then quit game or restart
         if self._player.get_health() == 0:
-            position = valid_score(self._player.get_score(), self._high_score_list)
-            if position < 10:
-                name = simpledialog.askstring('Chicken Dinner not Winner','Please enter your name: ')
-                if name is not None:
-                    edit_high_score(name, self._player.get_score(), position, self._current_level)
-            self._status_display.update_health()
-            self.quit()
+            self._game_over()
 
-        self.scroll()
-        self.redraw()
-        self._master.after(10, self.step)
+        self._ticks += 1
+        if self._recording is not None:
+            self._recording.add_hash(state_hash(self._world, self._player))
+
+    def _update_viewport(self):
+        """Inform the world of the area visible around the player, which decides the level of detail of mobs
+
+        The area is that of the widest window centred on the player, rather than the window itself,
+        so the simulation does not depend on the size of the window.
+        """
+        x_position = self._player.get_position()[0]
+        width, height = self._world.get_pixel_size()
+        half_screen = min(MAX_WINDOW_SIZE[0], width) / 2
+        left = min(max(x_position - half_screen, 0), width - 2 * half_screen)
+        self._world.set_viewport(left, 0, left + 2 * half_screen, height)
+
+    def _record_high_score(self):
+        """ Ask for the player's name and save their score, if it is a high score """
+        position = valid_score(self._player.get_score(), self._high_score_list)
+        if position < 10:
+            name = simpledialog.askstring('Chicken Dinner not Winner', 'Please enter your name: ')
+            if name is not None:
+                edit_high_score(name, self._player.get_score(), position, self._current_level)
+
+    def _game_over(self):
+        """ Record the high score of a player who is out of health, then restart or quit """
+        self._record_high_score()
+        self._status_display.update_health()
+        self.quit()
 
     def _move(self, dx, dy):
         """ Make a Right and Left movement for player
@@ -763,21 +1039,37 @@ class MarioApp:
 
     def _setup_collision_handlers(self):
         self._world.add_collision_handler("player", "item", on_begin=self._handle_player_collide_item)
-        self._world.add_collision_handler("player", "block", on_begin=self._handle_player_collide_block,
-                                          on_separate=self._handle_player_separate_block)
+        self._world.add_collision_handler("player", "block", on_begin=self._handle_player_collide_block)
         self._world.add_collision_handler("player", "mob", on_begin=self._handle_player_collide_mob)
         self._world.add_collision_handler("mob", "block", on_begin=self._handle_mob_collide_block)
         self._world.add_collision_handler("mob", "mob", on_begin=self._handle_mob_collide_mob)
         self._world.add_collision_handler("mob", "item", on_begin=self._handle_mob_collide_item)
 
+        self._world.add_trigger_handler(FlagZone, Player, on_enter=self._enter_flag)
+        self._world.add_trigger_handler(TunnelZone, Player, on_enter=self._enter_tunnel, on_exit=self._exit_tunnel)
+
+        self._world.add_hit_handler(Fireball, Block, self._fireball_hit_block)
+        self._world.add_hit_handler(Fireball, Mob, self._fireball_hit_mob)
+        self._world.add_hit_handler(Fireball, Player, self._fireball_hit_player)
+
+    def _fireball_hit_block(self, fireball: Fireball, block: Block, point: Tuple[float, float]):
+        """Fireballs break the bricks they hit"""
+        if block.get_id() == "brick":
+            self._world.remove_block(block)
+            self._world.emit_particles(*block.get_position(), **BRICK_PARTICLES)
+
+    def _fireball_hit_mob(self, fireball: Fireball, mob: Mob, point: Tuple[float, float]):
+        """Fireballs destroy the mobs they hit"""
+        self._world.remove_mob(mob)
+
+    def _fireball_hit_player(self, fireball: Fireball, player: Player, point: Tuple[float, float]):
+        """Fireballs hurt the player unless they are invincible"""
+        if not player.get_invincible():
+            player.change_health(float(-1))
+
     #
     def _handle_mob_collide_block(self, mob: Mob, block: Block, data,
                                   arbiter: pymunk.Arbiter) -> bool:
-        if mob.get_id() == "fireball":
-            if block.get_id() == "brick":
-                self._world.remove_block(block)
-            self._world.remove_mob(mob)
-
         # Mushroom mob reverse when collide with any blocks
         if mob.get_id() == 'mushroom':
             if get_collision_direction(mob, block) == 'R' or get_collision_direction(mob, block) == "L":
@@ -792,16 +1084,10 @@ class MarioApp:
 
     def _handle_mob_collide_mob(self, mob1: Mob, mob2: Mob, data,
                                 arbiter: pymunk.Arbiter) -> bool:
-        if mob1.get_id() == "fireball" or mob2.get_id() == "fireball":
-            self._world.remove_mob(mob1)
-            self._world.remove_mob(mob2)
-
         # Mushroom mob reverse when collide with other mushroon
         if mob1.get_id() == "mushroom" and mob2.get_id() == "mushroom":
-            mob1._tempo = 0 - mob1._tempo
-            mob2._tempo = 0 - mob2._tempo
-            mob1.set_tempo(mob1._tempo)
-            mob2.set_tempo(mob2._tempo)
+            mob1.set_tempo(0 - mob1.get_tempo())
+            mob2.set_tempo(0 - mob2.get_tempo())
 
         return False
 
@@ -826,11 +1112,12 @@ class MarioApp:
 
         dropped_item.collect(self._player)
         self._world.remove_item(dropped_item)
+        self._world.emit_particles(*dropped_item.get_position(), **COLLECT_PARTICLES)
         self._status_display.update_score()
 
         # Change the health bar to yellow when collected star
         if dropped_item.get_id() == 'star':
-            self._current_time = time.time()
+            self._current_time = self.get_time()
             self._status_display.update_invincible()
 
         return False
@@ -843,24 +1130,25 @@ class MarioApp:
             return False
         block.on_hit(arbiter, (self._world, player))
 
-        # Increase the maximum health of player when hit the top of flagpole then load next map
-        if block.get_id() == 'flag':
-            if get_collision_direction(player, block) == 'A':
-                player.upgrade_max_health(3)
-            position = valid_score(self._player.get_score(), self._high_score_list)
-            if position < 10:
-                name = simpledialog.askstring('Chicken Dinner not Winner', 'Please enter your name: ')
-                if name is not None:
-                    edit_high_score(name, self._player.get_score(), position, self._current_level)
+        return True
 
-            self.reset_world(self._goal)
+    def _enter_flag(self, flag: FlagZone, player: Player):
+        """Load the next map when the player reaches the flagpole, increasing
+        the maximum health of the player if they landed on top of it"""
+        # the y axis points down, so the top of the bounding box is the bottom edge
+        if player.get_shape().bb.top <= flag.get_shape().bb.bottom + BLOCK_SIZE:
+            player.upgrade_max_health(3)
+        self._record_high_score()
 
-        # A flag to show that player on tunnel
-        if block.get_id() == 'tunnel':
-            if get_collision_direction(player, block) == 'A':
-                self._on_tunnel = True
+        self.reset_world(self._goal)
 
-        return True
+    def _enter_tunnel(self, tunnel: TunnelZone, player: Player):
+        """Let the player duck into the tunnel while they stand on it"""
+        self._on_tunnel = True
+
+    def _exit_tunnel(self, tunnel: TunnelZone, player: Player):
+        """Stop the player ducking into the tunnel once they leave it"""
+        self._on_tunnel = False
 
     def _handle_player_collide_mob(self, player: Player, mob: Mob, data,
                                    arbiter: pymunk.Arbiter) -> bool:
@@ -869,13 +1157,6 @@ class MarioApp:
             self._player.change_health(float(-1))
         return True
 
-    def _handle_player_separate_block(self, player: Player, block: Block, data,
-                                      arbiter: pymunk.Arbiter) -> bool:
-
-        # Flag to show player no longer on the tunnel
-        self._on_tunnel = False
-        return True
-
 
 
 
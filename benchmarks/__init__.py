@@ -0,0 +1,6 @@
+"""
+Benchmarks of the game engine, run headlessly from the repository root, e.g.
+    $python -m benchmarks run -o results.json
+    $python -m benchmarks.build
+    $python -m benchmarks.memory
+"""
@@ -0,0 +1,67 @@
+"""
+Command line interface of the benchmark suite
+
+Run the suite, writing the results to a file:
+    $python -m benchmarks run -o results.json
+Draw on a real tk canvas, rather than a stand in, when there is a display:
+    $python -m benchmarks run --canvas
+Compare results against a stored baseline:
+    $python -m benchmarks compare baseline.json results.json --threshold 0.1
+"""
+
+import argparse
+import sys
+
+from benchmarks import harness
+
+
+def run(args):
+    from benchmarks.suite import create_canvas, destroy_canvas, get_benchmarks
+
+    canvas = create_canvas(args.canvas)
+    try:
+        results = harness.run_benchmarks(get_benchmarks(canvas), args.select)
+    finally:
+        destroy_canvas(canvas)
+    if args.output:
+        harness.write_results(args.output, results)
+    return 0
+
+
+def compare(args):
+    regressions = harness.compare(harness.read_results(args.baseline),
+                                  harness.read_results(args.results), args.threshold)
+    for name, before, after in regressions:
+        print(f"REGRESSION {name}: {before * 1000:.3f} ms -> {after * 1000:.3f} ms "
+              f"(+{(after / before - 1) * 100:.0f}%)")
+
+    if not regressions:
+        print(f"No regressions beyond {args.threshold * 100:.0f}%")
+    return 1 if regressions else 0
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmark suite")
+    run_parser.add_argument("-o", "--output", help="the JSON file to write results to")
+    run_parser.add_argument("-k", "--select", action="append",
+                            help="only run benchmarks containing this text, may be repeated")
+    run_parser.add_argument("--canvas", action="store_true",
+                            help="draw particles on a real tk canvas, in a hidden window, if there is a display")
+    run_parser.set_defaults(command=run)
+
+    compare_parser = commands.add_parser("compare", help="compare results against a baseline")
+    compare_parser.add_argument("baseline", help="the JSON results of the baseline")
+    compare_parser.add_argument("results", help="the JSON results to compare")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="the allowed fractional slowdown, defaults to 0.1")
+    compare_parser.set_defaults(command=compare)
+
+    args = parser.parse_args(argv)
+    return args.command(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
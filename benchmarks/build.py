@@ -0,0 +1,67 @@
+"""
+Benchmark of world construction, comparing one space insertion per block
+against the bulk placement of blocks by the world builder.
+"""
+
+import os
+import time
+import tempfile
+
+import MarioApp
+from level import build_level, compile_level, WorldBuilder
+from level_generator import write_level
+
+COLUMNS = 10000
+REPEATS = 3
+SEED = 1029
+
+
+def generate_level(columns: int = COLUMNS, **kwargs):
+    """Generate and compile a level, see level_generator.generate_level.
+
+    Returns:
+        (list<tuple<str, int, int>>): The (entity id, x, y) of each entity.
+    """
+    kwargs.setdefault("seed", SEED)
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "level.txt")
+        write_level(filename, columns, **kwargs)
+        return compile_level(filename)
+
+
+def create_builder(bulk: bool = True) -> WorldBuilder:
+    """Create a world builder with the game's entity builders registered.
+
+    Parameters:
+        bulk (bool): Whether blocks are placed in bulk, or added one at a time.
+    """
+    def create_block(world, block_id, x, y, *args):
+        world.add_block(*MarioApp.ENTITIES.build(world, block_id, x, y, *args))
+
+    builder = WorldBuilder(MarioApp.BLOCK_SIZE, fallback=MarioApp.create_unknown)
+    MarioApp.register_builders(builder)
+    if not bulk:
+        builder.register_builders(MarioApp.ENTITIES.get_characters("block"), create_block)
+    return builder
+
+
+def time_build(entities, bulk: bool) -> float:
+    """(float) Returns the best time, in seconds, to build the given level."""
+    best = float('inf')
+    for _ in range(REPEATS):
+        builder = create_builder(bulk)
+        start = time.perf_counter()
+        build_level(builder, entities)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    entities = generate_level()
+    print(f"Building a {COLUMNS} column level of {len(entities)} entities")
+    for label, bulk in (("per block", False), ("bulk", True)):
+        print(f"{label:>10}: {time_build(entities, bulk) * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Timing, result storage and comparison for the benchmark suite
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import pymunk
+
+
+def measure(function: Callable, setup: Callable = None, repeats: int = 5) -> Dict[str, float]:
+    """Time a function over a number of repeats.
+
+    Parameters:
+        function (Callable<*> -> None): The function to time, called with the
+                                        result of setup, if given.
+        setup (Callable<> -> *): Called before each repeat, not timed.
+        repeats (int): The number of times to call the function.
+
+    Returns:
+        (dict<str: float>): The minimum, median and maximum times, in seconds.
+    """
+    times = []
+    for _ in range(repeats):
+        args = () if setup is None else (setup(),)
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "max": max(times),
+        "repeats": repeats
+    }
+
+
+def get_metadata() -> Dict[str, str]:
+    """(dict<str: str>) Returns details of the machine & software the benchmarks ran on"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True,
+                                universal_newlines=True).stdout.strip()
+    except OSError:
+        commit = ""
+
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "pymunk": pymunk.version,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def run_benchmarks(benchmarks: Dict[str, Tuple[Callable, Callable, int]],
+                   selected: Iterable[str] = None) -> Dict[str, Dict[str, float]]:
+    """Run benchmarks, printing the median time of each.
+
+    Parameters:
+        benchmarks (dict<str: tuple<Callable, Callable, int>>):
+                Mapping of benchmark names to their (function, setup, repeats).
+        selected (iterable<str>): Only run benchmarks with one of these substrings
+                                  in their name, or all benchmarks if None.
+
+    Returns:
+        (dict<str: dict<str: float>>): The results of each benchmark, see measure.
+    """
+    results = {}
+    for name, (function, setup, repeats) in benchmarks.items():
+        if selected and not any(part in name for part in selected):
+            continue
+
+        results[name] = result = measure(function, setup, repeats)
+        print(f"{name:<40} {result['median'] * 1000:10.3f} ms")
+
+    return results
+
+
+def write_results(filename: str, results: Dict[str, Dict[str, float]]):
+    """Write benchmark results with the machine metadata to a JSON file."""
+    with open(filename, 'w') as file:
+        json.dump({"metadata": get_metadata(), "results": results}, file, indent=2)
+
+
+def read_results(filename: str) -> Dict[str, Dict[str, float]]:
+    """Read the benchmark results from a file written by write_results."""
+    with open(filename) as file:
+        return json.load(file)["results"]
+
+
+def compare(baseline: Dict[str, Dict[str, float]], current: Dict[str, Dict[str, float]],
+            threshold: float = 0.1) -> List[Tuple[str, float, float]]:
+    """Find the benchmarks which have regressed against a baseline.
+
+    Parameters:
+        baseline (dict<str: dict<str: float>>): The stored baseline results.
+        current (dict<str: dict<str: float>>): The results to compare.
+        threshold (float): The fraction the median time may increase by
+                           before it is considered a regression.
+
+    Returns:
+        (list<tuple<str, float, float>>): The name, baseline median and current
+                                          median of each regressed benchmark.
+    """
+    regressions = []
+    for name, result in current.items():
+        if name not in baseline:
+            continue
+
+        before, after = baseline[name]["median"], result["median"]
+        if after > before * (1 + threshold):
+            regressions.append((name, before, after))
+
+    return regressions
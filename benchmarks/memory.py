@@ -0,0 +1,80 @@
+"""
+Benchmark of the memory used by the entities of a large generated level,
+reporting the bytes per entity of each class and the heap used by the world.
+"""
+
+import gc
+import sys
+import tracemalloc
+from typing import Dict, Tuple
+
+from level import build_level
+
+from benchmarks.build import create_builder, generate_level
+
+COLUMNS = 10000
+
+
+def get_entity_size(entity) -> int:
+    """(int) Returns the bytes used by an entity, including any instance dictionary"""
+    size = sys.getsizeof(entity)
+    if hasattr(entity, "__dict__"):
+        size += sys.getsizeof(entity.__dict__)
+    return size
+
+
+def measure_entities(world) -> Dict[str, Tuple[int, int]]:
+    """Returns the number and bytes of the entities of each class in a world
+
+    Entities shared by many shapes, such as terrain flyweights, are counted
+    once per shape but their bytes only once.
+
+    Returns:
+        (dict<str: tuple<int, int>>): Mapping of class names to their (count, bytes per entity)
+    """
+    counts = {}
+    seen = set()
+    for shape in world.get_space().shapes:
+        thing = shape.object
+        if thing is None:
+            continue
+
+        name = type(thing).__name__
+        count, size = counts.get(name, (0, 0))
+        if id(thing) not in seen:
+            seen.add(id(thing))
+            size += get_entity_size(thing)
+        counts[name] = count + 1, size
+
+    return {name: (count, size // count) for name, (count, size) in counts.items()}
+
+
+def measure_heap(entities) -> Tuple[object, int, int]:
+    """Build a world, tracing the memory allocated while building it
+
+    Returns:
+        (tuple<World, int, int>): The world, the bytes it holds once built and the peak bytes
+    """
+    gc.collect()
+    tracemalloc.start()
+    world = build_level(create_builder(), entities)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return world, current, peak
+
+
+def main():
+    entities = generate_level(COLUMNS)
+    world, heap, peak = measure_heap(entities)
+
+    print(f"Building a {COLUMNS} column level of {len(entities)} entities")
+    print(f"{'class':>16} {'count':>8} {'bytes':>8}")
+    for name, (count, size) in sorted(measure_entities(world).items(), key=lambda item: -item[1][0]):
+        print(f"{name:>16} {count:8} {size:8}")
+    print(f"heap: {heap / 2 ** 20:.1f} MiB ({heap // len(entities)} bytes per entity), "
+          f"peak: {peak / 2 ** 20:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
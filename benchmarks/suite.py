@@ -0,0 +1,375 @@
+"""
+Benchmarks of the engine hot paths, which run without a display
+"""
+
+import os
+import random
+import tempfile
+import tkinter
+from typing import List, Tuple
+
+import numpy
+
+import MarioApp
+from game.block import Block
+from game.item import Coin
+from game.lod import LevelOfDetail
+from game.mob import Mob
+from game.particles import ParticleSystem
+from game.projectile import Fireball
+from game.util import get_collision_direction
+from game.view import ParticleLayer
+from level import build_level, compile_level, load_level
+from level_generator import write_level
+from player import Player
+
+from benchmarks.build import create_builder, generate_level
+
+SMALL_LEVEL = "level1.txt"
+HUGE_COLUMNS = 50000
+LARGE_COLUMNS = 10000
+STEPS = 100
+PARTICLES = 4000
+PROJECTILES = 1000
+SETTLE_STEPS = 60
+QUERIES = 1000
+
+
+class DummyCanvas:
+    """Stands in for a tk.Canvas, counting the items created on it and the calls made to change them"""
+
+    def __init__(self):
+        self.items = 0
+        self.calls = 0
+
+    def _create(self, *args, **kwargs) -> int:
+        self.items += 1
+        return self.items
+
+    create_image = create_rectangle = create_text = _create
+
+    def delete(self, *args):
+        pass
+
+    def _change(self, *args, **kwargs):
+        self.calls += 1
+
+    coords = itemconfigure = tag_raise = _change
+
+
+def create_canvas(real: bool = False):
+    """Create a canvas to draw on, see destroy_canvas.
+
+    Parameters:
+        real (bool): Whether to draw on a real tk.Canvas, in a hidden window, if there is a display.
+
+    Returns:
+        (tk.Canvas | DummyCanvas): The real canvas if requested and possible, otherwise a DummyCanvas.
+    """
+    if not real:
+        return DummyCanvas()
+    try:
+        root = tkinter.Tk()
+    except tkinter.TclError:
+        return DummyCanvas()
+    root.withdraw()
+    return tkinter.Canvas(root)
+
+
+def destroy_canvas(canvas):
+    """Destroy the window of a canvas made by create_canvas, if it has one"""
+    if isinstance(canvas, tkinter.Canvas):
+        canvas.winfo_toplevel().destroy()
+
+
+class HeadlessRenderer(MarioApp.MarioViewRenderer):
+    """A view renderer which draws image names rather than tk images"""
+
+    def load_image(self, file: str) -> str:
+        return file
+
+
+def flat_level(columns: int, mobs: str = "", count: int = 0) -> List[Tuple[str, int, int]]:
+    """Compile a level of flat floor, with mobs or items spread evenly along it.
+
+    Parameters:
+        columns (int): The width of the level, in cells.
+        mobs (str): The level characters of the mobs or items to place.
+        count (int): The number of each mob or item to place.
+    """
+    entities = []
+    for x in range(columns):
+        entities.append(('#', x, 18))
+        entities.append(('%', x, 19))
+
+    for character in mobs:
+        for index in range(count):
+            entities.append((character, 4 + index * (columns - 8) // max(count, 1), 16))
+    return entities
+
+
+def build_world(entities):
+    """Build a world from a compiled level, with a player on the floor."""
+    world = build_level(create_builder(), entities)
+    player = Player(max_health=5)
+    world.add_player(player, MarioApp.BLOCK_SIZE, 17 * MarioApp.BLOCK_SIZE)
+    return world, player
+
+
+def step_world(state):
+    """Step a (world, player) pair a fixed number of times"""
+    world, player = state
+    for _ in range(STEPS):
+        world.step((world, player))
+
+
+def benchmark_load():
+    """Benchmarks of loading level files into worlds"""
+    # the directory is removed once the benchmarks referring to it are released, after the run
+    directory = tempfile.TemporaryDirectory()
+    huge = os.path.join(directory.name, "huge.txt")
+    write_level(huge, HUGE_COLUMNS, seed=1)
+
+    def load_huge(_directory=directory):
+        return load_level(huge)
+
+    def load_huge_world(_directory=directory):
+        return build_level(create_builder(), compile_level(huge))
+
+    large = generate_level(LARGE_COLUMNS)
+    return {
+        "load_level small": (lambda: load_level(SMALL_LEVEL), None, 20),
+        "load_world small": (lambda: build_level(create_builder(), compile_level(SMALL_LEVEL)), None, 10),
+        f"load_level huge ({HUGE_COLUMNS} columns)": (load_huge, None, 10),
+        f"load_world large ({LARGE_COLUMNS} columns)": (lambda: build_level(create_builder(), large), None, 2),
+        f"load_world huge ({HUGE_COLUMNS} columns)": (load_huge_world, None, 1),
+    }
+
+
+def benchmark_step():
+    """Benchmarks of stepping worlds with many mobs and items"""
+    benchmarks = {}
+    for name, character in (("mushrooms", '@'), ("clouds", '&'), ("coins", 'C')):
+        for count in (10, 100, 1000):
+            entities = flat_level(max(200, count * 2), character, count)
+            benchmarks[f"World.step {count} {name} x{STEPS}"] = (
+                step_world, lambda entities=entities: build_world(entities), 3)
+    return benchmarks
+
+
+def benchmark_lod():
+    """Benchmarks of stepping worlds of many mobs, most of which are far from the viewport"""
+    def setup(entities):
+        world, player = build_world(entities)
+        world.set_level_of_detail(LevelOfDetail())
+        world.set_viewport(0, 0, MarioApp.MAX_WINDOW_SIZE[0], world.get_pixel_size()[1])
+        return world, player
+
+    entities = flat_level(2000, '@', 1000)
+    return {
+        f"World.step 1000 mushrooms lod x{STEPS}": (step_world, lambda: setup(entities), 3),
+    }
+
+
+def benchmark_sleeping():
+    """Benchmarks of stepping worlds of many coins which have come to rest on the floor"""
+    def setup(entities, sleeping):
+        world, player = build_world(entities)
+        # coins placed in a level hang in place, so dropped coins are added instead
+        for index in range(1000):
+            world.add_item(Coin(), (4 + index * 2) * MarioApp.BLOCK_SIZE, 16 * MarioApp.BLOCK_SIZE)
+        if sleeping:
+            world.set_sleeping()
+        # let the coins fall and come to rest
+        for _ in range(SETTLE_STEPS):
+            world.step((world, player))
+        return world, player
+
+    entities = flat_level(2000)
+    return {
+        f"World.step 1000 resting coins x{STEPS}": (step_world, lambda: setup(entities, False), 3),
+        f"World.step 1000 resting coins sleeping x{STEPS}": (step_world, lambda: setup(entities, True), 3),
+    }
+
+
+def benchmark_queries():
+    """Benchmarks of collision direction & range queries"""
+    small, small_player = build_world(compile_level(SMALL_LEVEL))
+    large, _ = build_world(generate_level(LARGE_COLUMNS))
+    for _ in range(50):
+        small.step((small, small_player))
+    block = small.get_block(small_player.get_position()[0] + 1, small_player.get_shape().bb.top + 1)
+
+    def collision_direction():
+        for _ in range(QUERIES):
+            get_collision_direction(small_player, block)
+
+    def get_points(world) -> List[Tuple[float, float]]:
+        rng = random.Random(QUERIES)
+        width, height = world.get_pixel_size()
+        return [(rng.uniform(0, width), rng.uniform(0, height)) for _ in range(QUERIES)]
+
+    def things_in_range(world):
+        for x, y in get_points(world):
+            world.get_things_in_range(x, y, 60)
+
+    def blocks_in_range(world):
+        # the area a switch clears, as it was found before rectangle queries
+        for x, y in get_points(world):
+            [thing for thing in world.get_things_in_range(x, y, 60) if isinstance(thing, Block)]
+
+    def blocks_in_bb(world):
+        for x, y in get_points(world):
+            world.get_things_in_bb(x - 60, y - 60, x + 60, y + 60, categories=("block",))
+
+    def things_near_points(world):
+        world.get_things_near_points(get_points(world), 60)
+
+    def sight_by_points(world):
+        # line of sight sampled by a point query every cell along a 10 cell segment
+        step = MarioApp.BLOCK_SIZE
+        for x, y in get_points(world):
+            any(world.get_things_in_range(x + offset, y, 0) for offset in range(0, 10 * step, step))
+
+    def sight_by_segment(world):
+        for x, y in get_points(world):
+            world.has_line_of_sight((x, y), (x + 10 * MarioApp.BLOCK_SIZE, y))
+
+    return {
+        f"get_collision_direction x{QUERIES}": (collision_direction, None, 10),
+        f"get_things_in_range small x{QUERIES}": (lambda: things_in_range(small), None, 10),
+        f"get_things_in_range large x{QUERIES}": (lambda: things_in_range(large), None, 10),
+        f"get_things_near_points large x{QUERIES}": (lambda: things_near_points(large), None, 10),
+        f"blocks by point query large x{QUERIES}": (lambda: blocks_in_range(large), None, 10),
+        f"blocks by get_things_in_bb large x{QUERIES}": (lambda: blocks_in_bb(large), None, 10),
+        f"line of sight by point queries large x{QUERIES}": (lambda: sight_by_points(large), None, 10),
+        f"line of sight by segment query large x{QUERIES}": (lambda: sight_by_segment(large), None, 10),
+    }
+
+
+def benchmark_render():
+    """Benchmarks of a renderer draw pass over every entity in a world"""
+    renderer = HeadlessRenderer(MarioApp.ENTITIES.get_sprites("block"), MarioApp.ENTITIES.get_sprites("item"),
+                                MarioApp.ENTITIES.get_sprites("mob"), MarioApp.ENTITIES.get_sprites("trigger"),
+                                MarioApp.ENTITIES.get_sprites("projectile"))
+    small, _ = build_world(compile_level(SMALL_LEVEL))
+    large, _ = build_world(generate_level(LARGE_COLUMNS))
+
+    def draw(world):
+        canvas = DummyCanvas()
+        for thing in world.get_all_things():
+            renderer.draw(thing, thing.get_shape(), canvas, (0, 0))
+
+    def draw_culled(world):
+        # the things in a window at the middle of the world, as MarioApp.redraw draws them
+        canvas = DummyCanvas()
+        width, height = world.get_pixel_size()
+        left = (width - MarioApp.MAX_WINDOW_SIZE[0]) / 2
+        for thing in world.get_things_in_bb(left, 0, left + MarioApp.MAX_WINDOW_SIZE[0], height,
+                                            categories=MarioApp.DRAWN_CATEGORIES):
+            renderer.draw(thing, thing.get_shape(), canvas, (0, 0))
+
+    return {
+        "draw pass small": (lambda: draw(small), None, 10),
+        "draw pass large": (lambda: draw(large), None, 3),
+        "draw pass large culled": (lambda: draw_culled(large), None, 10),
+    }
+
+
+def benchmark_particles(canvas=None):
+    """Benchmarks of updating and drawing thousands of particles
+
+    Parameters:
+        canvas (tk.Canvas | DummyCanvas): The canvas particles are drawn on, defaults to a DummyCanvas.
+    """
+    def setup():
+        particles = ParticleSystem(capacity=PARTICLES)
+        rng = numpy.random.default_rng(PARTICLES)
+        # long lived particles, spread across the width of a window
+        for x in numpy.linspace(0, MarioApp.MAX_WINDOW_SIZE[0], PARTICLES // 10):
+            particles.emit(x, 160, 10, rng, lifetime=(100, 100))
+        return particles
+
+    def update(particles):
+        for _ in range(STEPS):
+            particles.update(0.02)
+
+    def draw(particles, pool_size):
+        # the cost is in the calls to tk, which only a real canvas measures
+        layer = ParticleLayer(canvas, (MarioApp.MAX_WINDOW_SIZE[0], 320), pool_size=pool_size)
+        for _ in range(STEPS):
+            layer.draw(particles, (0, 0))
+
+    if canvas is None:
+        canvas = DummyCanvas()
+    kind = type(canvas).__name__
+    return {
+        f"ParticleSystem.update {PARTICLES} particles x{STEPS}": (update, setup, 10),
+        # the default pool draws at most 1024 of the particles
+        f"ParticleLayer.draw {PARTICLES} particles, pool of 1024 on {kind} x{STEPS}":
+            (lambda particles: draw(particles, 1024), setup, 3),
+        f"ParticleLayer.draw {PARTICLES} particles, pool of {PARTICLES} on {kind} x{STEPS}":
+            (lambda particles: draw(particles, PARTICLES), setup, 3),
+    }
+
+
+def benchmark_projectiles():
+    """Benchmarks of stepping worlds of many fireballs, as projectiles and as physical bodies"""
+    def setup(projectiles):
+        world, player = build_world(entities)
+        # fly level with the floor, so neither kind of fireball falls
+        world.set_gravity(0, 0)
+        for index in range(PROJECTILES):
+            x, y = (4 + index * 2) * MarioApp.BLOCK_SIZE, (4 + index % 12) * MarioApp.BLOCK_SIZE
+            if projectiles:
+                world.add_projectile(Fireball(), x, y, (60, 0))
+            else:
+                world.add_mob(Mob("fireball", (16, 16), weight=300, tempo=60), x, y)
+        return world, player
+
+    def setup_fire(projectiles):
+        world, player = build_world(entities)
+
+        def burst(mob, block, data, arbiter) -> bool:
+            world.remove_mob(mob)
+            return False
+
+        if not projectiles:
+            # fireball bodies burst on the floor, as projectiles do
+            world.add_collision_handler("mob", "block", on_begin=burst)
+        return world, player, projectiles
+
+    def fire(state):
+        # fire a volley each step, which falls to the floor and bursts
+        world, player, projectiles = state
+        volley = PROJECTILES // STEPS
+        for step in range(STEPS):
+            for index in range(volley):
+                x, y = (4 + (step * volley + index) * 2) * MarioApp.BLOCK_SIZE, 12 * MarioApp.BLOCK_SIZE
+                if projectiles:
+                    world.add_projectile(Fireball(), x, y, (0, 60))
+                else:
+                    world.add_mob(Mob("fireball", (16, 16), weight=300, tempo=0), x, y)
+            world.step((world, player))
+
+    entities = flat_level(2 * PROJECTILES + 8)
+    return {
+        f"World.step {PROJECTILES} fireball projectiles x{STEPS}": (step_world, lambda: setup(True), 3),
+        f"World.step {PROJECTILES} fireball bodies x{STEPS}": (step_world, lambda: setup(False), 3),
+        f"World.step firing {PROJECTILES} fireball projectiles": (fire, lambda: setup_fire(True), 3),
+        f"World.step firing {PROJECTILES} fireball bodies": (fire, lambda: setup_fire(False), 3),
+    }
+
+
+def get_benchmarks(canvas=None):
+    """Returns every benchmark of the suite, see harness.run_benchmarks
+
+    Parameters:
+        canvas (tk.Canvas | DummyCanvas): The canvas drawn on, defaults to a DummyCanvas, see create_canvas.
+    """
+    benchmarks = {}
+    for group in (benchmark_load, benchmark_step, benchmark_lod, benchmark_sleeping,
+                  benchmark_queries, benchmark_render, benchmark_projectiles):
+        benchmarks.update(group())
+    benchmarks.update(benchmark_particles(canvas))
+    return benchmarks
@@ -3,4 +3,26 @@
 __version__ = "1.1.0"
 __copyright__ = "The University of Queensland, 2019"
 
-__all__ = ["block", "item", "entity", "mob", "util", "view", "world"]
+__all__ = [
+    "block",
+    "diagnostics",
+    "ecs",
+    "item",
+    "entity",
+    "input",
+    "lifetime",
+    "lod",
+    "mob",
+    "navigation",
+    "particles",
+    "profiler",
+    "projectile",
+    "recording",
+    "rng",
+    "tilemap",
+    "trace",
+    "trigger",
+    "util",
+    "view",
+    "world",
+]
@@ -2,6 +2,7 @@
 Classes to represent static block entities in the game world.
 """
 
+import math
 import random
 from typing import Tuple
 
@@ -12,7 +13,9 @@ from game.util import get_collision_direction
 
 class Block(Entity):
     """One of the blocks in the sandbox game"""
-    # The unique identifier for this block
+    __slots__ = ("_block_id",)
+
+    # The unique identifier of this type of block, unless given to the constructor
     _id = None
     _type = 2
     _cell_size = (1, 1)
@@ -25,12 +28,11 @@ class Block(Entity):
         """
         super().__init__()
 
-        if block_id is not None:
-            self._id = block_id
+        self._block_id = self._id if block_id is None else block_id
 
     def get_id(self) -> str:
         """(str) Returns the unique id of this block"""
-        return self._id
+        return self._block_id
 
     def get_position(self) -> Tuple[float, float]:
         """(float, float) Returns the (x, y) position of the block's centre"""
@@ -45,7 +47,78 @@ class Block(Entity):
         return self._cell_size
 
     def __repr__(self):
-        return f"{self.__class__.__name__}({self._id})"
+        return f"{self.__class__.__name__}({self._block_id})"
+
+
+class TerrainBlock(Block):
+    """A stateless block of terrain, such as a brick, whose only state is its id.
+
+    A single flyweight of each id is shared by every cell of that terrain:
+    constructing a TerrainBlock returns the existing flyweight of its id and
+    copying it returns itself. The flyweight holds no shape, the world hands
+    out a TerrainCell of the flyweight and the shape of a particular cell.
+    """
+    __slots__ = ()
+
+    # Mapping of (class, block id) to the flyweight of that block
+    _flyweights = {}
+
+    def __new__(cls, block_id: str = None):
+        key = (cls, block_id)
+        flyweight = cls._flyweights.get(key)
+        if flyweight is None:
+            flyweight = cls._flyweights[key] = super().__new__(cls)
+        return flyweight
+
+    def set_shape(self, shape):
+        """Flyweights are shared by many cells, so never hold the shape of one"""
+        pass
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class TerrainCell(Block):
+    """A single cell of terrain, pairing a TerrainBlock flyweight with the shape of the cell.
+
+    Cells are created by the world whenever terrain is handed out, e.g. by
+    World.get_block or to a collision handler, and are equal iff they are of
+    the same shape.
+    """
+    __slots__ = ("_terrain",)
+
+    def __init__(self, terrain: TerrainBlock, shape):
+        """Construct a cell of terrain
+
+        Parameters:
+            terrain (TerrainBlock): The flyweight of the terrain
+            shape (pymunk.Shape): The physical shape of the cell
+        """
+        # assigned directly rather than through Block.__init__, as a cell is
+        # created for every block handed out by the world
+        self._shape = shape
+        self._block_id = terrain._block_id
+        self._terrain = terrain
+
+    def get_terrain(self) -> TerrainBlock:
+        """(TerrainBlock) Returns the flyweight of the terrain in this cell"""
+        return self._terrain
+
+    def get_cell_size(self) -> Tuple[int, int]:
+        return self._terrain.get_cell_size()
+
+    def on_hit(self, event, data):
+        """Callback collision with player event handler."""
+        self._terrain.on_hit(event, data)
+
+    def __eq__(self, other):
+        return isinstance(other, TerrainCell) and other._shape is self._shape
+
+    def __hash__(self):
+        return hash(self._shape)
 
 
 class MysteryBlock(Block):
@@ -53,6 +126,8 @@ class MysteryBlock(Block):
 
     The active state of a mystery block is whether it has dropped items or not.
     """
+    __slots__ = ("_drop", "_drop_range", "_active")
+
     _id = "mystery"
 
     def __init__(self, drop: str = None, drop_range: Tuple[int, int] = (1, 1)):
@@ -70,26 +145,34 @@ class MysteryBlock(Block):
         self._drop_range = drop_range
         self._active = True
 
-    def get_drops(self) -> Tuple[str, ...]:
+    def get_drops(self, rng: random.Random) -> Tuple[str, ...]:
         """Get the drops of the mystery block
 
+        Parameters:
+            rng (random.Random): The random stream deciding the number of drops.
+
         Returns:
             tuple<str, ...>: The item identifiers of the dropped items.
         """
-        return (self._drop,) * random.randint(*self._drop_range)
+        return (self._drop,) * rng.randint(*self._drop_range)
 
-    def _drop_items(self, world, drops: Tuple[str]):
+    def _drop_items(self, world, drops: Tuple[str], rng: random.Random):
         """Drop each of the dropped items into the world.
 
         Parameters:
             world (World): The world to place dropped items within.
             drops (tuple<str>): A tuple of item identifiers to place.
+            rng (random.Random): The random stream scattering the items.
         """
         x, y = self.get_position()
         for drop in drops:
-            if drop is not None:
+            if drop is not None and world.can_spawn(self, drop):
                 # world.add_item(create_item(drop), TODO: Make this non-hardcoded
-                world.add_item(Coin(), x + random.randint(-10, 10), y - 25)
+                world.add_item(Coin(), x + rng.randint(-10, 10), y - 25, spawner=self)
+
+        if drops:
+            # a spray of sparks upwards from the top of the block
+            world.emit_particles(x, y - 8, 8 * len(drops), colour="gold", angle=(math.pi, 2 * math.pi))
 
     def on_hit(self, event, data):
         """Callback collision with player event handler."""
@@ -101,9 +184,10 @@ class MysteryBlock(Block):
         if self._active:
             self._active = False
 
-            # Drop items into the game world
-            drops = self.get_drops()
-            self._drop_items(data[0], drops)
+            # Drop items into the game world, from the block's own random stream
+            rng = world.get_random((self.get_id(), *self.get_position()))
+            drops = self.get_drops(rng)
+            self._drop_items(world, drops, rng)
 
     def is_active(self) -> bool:
         """(bool): Returns true if the block has not yet dropped items."""
@@ -0,0 +1,123 @@
+"""
+Memory & leak diagnostics across the worlds of successive levels
+"""
+
+import gc
+import tracemalloc
+import weakref
+from typing import Dict, List
+
+import pymunk
+
+from game.entity import Entity
+
+
+def count_live_objects() -> Dict[str, int]:
+    """(dict<str: int>) Returns the number of live Entity, pymunk.Body and
+    pymunk.Shape objects, found through the garbage collector"""
+    counts = {"Entity": 0, "Body": 0, "Shape": 0}
+    for obj in gc.get_objects():
+        if isinstance(obj, Entity):
+            counts["Entity"] += 1
+        elif isinstance(obj, pymunk.Body):
+            counts["Body"] += 1
+        elif isinstance(obj, pymunk.Shape):
+            counts["Shape"] += 1
+    return counts
+
+
+class LeakDiagnostics:
+    """Takes a tracemalloc snapshot each time the world is replaced, reporting
+    the largest growth in memory by allocation site since the last snapshot and
+    the number of live engine objects.
+
+    The replaced world is expected to be garbage once nothing is running inside
+    it anymore, which is checked each time poll is called until it has been
+    collected, and reported if it survives a number of polls.
+    """
+
+    def __init__(self, top: int = 10, frames: int = 1, strict: bool = False, grace: int = 5):
+        """Construct new leak diagnostics and start tracing memory allocations
+
+        Parameters:
+            top (int): The number of allocation sites to report
+            frames (int): The number of stack frames stored per allocation
+            strict (bool): Whether to raise an AssertionError when a replaced
+                           world was not collected
+            grace (int): The number of polls a replaced world may survive before it is reported
+        """
+        self._top = top
+        self._strict = strict
+        self._grace = grace
+        self._snapshot = None
+        self._pending = None
+        self._polls = 0
+        self._leaked = 0
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def on_reset(self, old_world) -> List[str]:
+        """Record that the world has been replaced
+
+        Parameters:
+            old_world (World): The world which was replaced, or None
+
+        Returns:
+            (list<str>): The lines of the memory report
+        """
+        if old_world is not None:
+            self._pending = weakref.ref(old_world)
+            self._polls = 0
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+
+        lines = []
+        if self._snapshot is not None:
+            lines.append(f"Top {self._top} memory growth by allocation site:")
+            for stat in snapshot.compare_to(self._snapshot, 'lineno')[:self._top]:
+                lines.append(f"  {stat}")
+        self._snapshot = snapshot
+
+        counts = count_live_objects()
+        lines.append("Live objects: " + ", ".join(f"{name}={count}" for name, count in counts.items()))
+        return lines
+
+    def poll(self) -> List[str]:
+        """Check whether the replaced world has been collected, once it is no
+        longer in use. Should be called at the start of each frame, before
+        anything refers to the world being stepped.
+
+        Returns:
+            (list<str>): Lines reporting a leaked world, if any
+
+        Raises:
+            AssertionError: If strict and the replaced world was not collected
+        """
+        if self._pending is None:
+            return []
+
+        gc.collect()
+        old_world = self._pending
+        if old_world() is None:
+            self._pending = None
+            return []
+
+        self._polls += 1
+        if self._polls < self._grace:
+            return []
+
+        self._pending = None
+        self._leaked += 1
+        referrers = [type(referrer).__name__ for referrer in gc.get_referrers(old_world())]
+        message = f"Previous world was not collected, referred to by: {', '.join(referrers)}"
+        if self._strict:
+            raise AssertionError(message)
+        return [message]
+
+    def get_leaked_count(self) -> int:
+        """(int) Returns the number of replaced worlds which were not collected"""
+        return self._leaked
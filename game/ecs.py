@@ -0,0 +1,279 @@
+"""
+An entity-component-system core: the state of game objects held in packed arrays of
+components, which systems run over each step
+
+Most components refer to pymunk bodies or to things, which still own their state,
+so their systems loop over the rows in Python. Only numeric components, such as
+the timers of TimerSystem, are updated as whole arrays.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+
+import numpy
+
+# The fields of each kind of component, as (name, numpy dtype) pairs
+COMPONENTS = {
+    # a thing whose own step method is called each step, see StepSystem
+    "step": [("thing", object)],
+    # a mob which walks at its tempo, see TempoSystem
+    "tempo": [("body", object), ("tempo", numpy.float64)],
+    # the world time at which a thing stops being invincible, see TimerSystem
+    "invincible": [("end", numpy.float64)],
+    # the shape of a mob and its level of detail bucket, None until it is bucketed
+    "detail": [("shape", object), ("bucket", object)],
+}
+
+
+class ComponentStore:
+    """The components of one kind, packed at the start of a numpy structured array.
+
+    Each entity has at most one component of a kind. Removing a component moves
+    the last component into its row, so the rows of the live components are
+    always contiguous, but their order changes.
+    """
+
+    def __init__(self, fields: List[Tuple[str, type]], capacity: int = 64):
+        """Construct a new, empty store
+
+        Parameters:
+            fields (list<tuple<str, type>>): The (name, numpy dtype) of each field of the component
+            capacity (int): The number of components to make room for, grown as needed
+        """
+        self._rows = numpy.zeros(capacity, dtype=fields)
+        self._entities = numpy.zeros(capacity, dtype=numpy.int64)
+        # mapping of entity to the row of its component
+        self._indices: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __contains__(self, entity: int) -> bool:
+        return entity in self._indices
+
+    def get_fields(self) -> Tuple[str, ...]:
+        """(tuple<str, ...>) Returns the names of the fields of the component"""
+        return self._rows.dtype.names
+
+    def add(self, entity: int, **values):
+        """Add the component of an entity
+
+        Parameters:
+            entity (int): The entity to add the component to
+            **values: The value of every field of the component
+
+        Raises:
+            ValueError: If the entity already has the component, or a field is missing or unknown
+        """
+        if entity in self._indices:
+            raise ValueError(f"Entity {entity} already has this component")
+        if set(values) != set(self.get_fields()):
+            raise ValueError(f"A component needs the fields {self.get_fields()}, not {tuple(values)}")
+
+        row = len(self._indices)
+        if row == len(self._rows):
+            self._rows = numpy.concatenate((self._rows, numpy.zeros_like(self._rows)))
+            self._entities = numpy.concatenate((self._entities, numpy.zeros_like(self._entities)))
+
+        self._rows[row] = tuple(values[name] for name in self.get_fields())
+        self._entities[row] = entity
+        self._indices[entity] = row
+
+    def remove(self, entity: int) -> bool:
+        """Remove the component of an entity, if it has one
+
+        Returns:
+            (bool): True iff the entity had the component
+        """
+        row = self._indices.pop(entity, None)
+        if row is None:
+            return False
+
+        last = len(self._indices)
+        if row != last:
+            self._rows[row] = self._rows[last]
+            self._entities[row] = self._entities[last]
+            self._indices[int(self._entities[row])] = row
+        # release the objects the last row refers to
+        self._rows[last] = numpy.zeros(1, dtype=self._rows.dtype)[0]
+        return True
+
+    def get(self, entity: int, field: str):
+        """Returns the value of a field of the component of an entity
+
+        Raises:
+            KeyError: If the entity does not have the component
+        """
+        return self._rows[field][self._indices[entity]]
+
+    def set(self, entity: int, field: str, value):
+        """Set the value of a field of the component of an entity
+
+        Raises:
+            KeyError: If the entity does not have the component
+        """
+        self._rows[field][self._indices[entity]] = value
+
+    def get_entities(self) -> numpy.ndarray:
+        """(numpy.ndarray) Returns a read only view of the entity of each component, by row"""
+        entities = self._entities[:len(self._indices)]
+        entities.flags.writeable = False
+        return entities
+
+    def get_column(self, field: str) -> numpy.ndarray:
+        """(numpy.ndarray) Returns a view of a field of each component, by row, which may be written to"""
+        return self._rows[field][:len(self._indices)]
+
+
+class Components:
+    """The entities of a world, each an integer id, and a store of each kind of component.
+
+    Things which take part in the world are adapted to entities by the world,
+    see World.get_components, and their behaviour is run by systems.
+    """
+
+    def __init__(self, components: Dict[str, List[Tuple[str, type]]] = None):
+        """Construct a new set of components, without any entities
+
+        Parameters:
+            components (dict<str: list<tuple<str, type>>>): The fields of each kind of component
+                    Defaults to the COMPONENTS constant
+        """
+        if components is None:
+            components = COMPONENTS
+        self._stores = {name: ComponentStore(fields) for name, fields in components.items()}
+        self._next_entity = 0
+        self._count = 0
+
+    def create(self) -> int:
+        """(int) Returns a new entity, without any components"""
+        entity = self._next_entity
+        self._next_entity += 1
+        self._count += 1
+        return entity
+
+    def destroy(self, entity: int):
+        """Remove an entity and all of its components"""
+        for store in self._stores.values():
+            store.remove(entity)
+        self._count -= 1
+
+    def get_count(self) -> int:
+        """(int) Returns the number of live entities"""
+        return self._count
+
+    def get_store(self, component: str) -> ComponentStore:
+        """(ComponentStore) Returns the store of a kind of component"""
+        return self._stores[component]
+
+    def get_counts(self) -> Dict[str, int]:
+        """(dict<str: int>) Returns the number of components of each kind"""
+        return {name: len(store) for name, store in self._stores.items()}
+
+    def add(self, entity: int, component: str, **values):
+        """Add a component to an entity, see ComponentStore.add"""
+        self._stores[component].add(entity, **values)
+
+    def remove(self, entity: int, component: str) -> bool:
+        """Remove a component from an entity, returning True iff it had one"""
+        return self._stores[component].remove(entity)
+
+    def has(self, entity: int, component: str) -> bool:
+        """(bool) Returns True iff an entity has a component"""
+        return entity in self._stores[component]
+
+    def get(self, entity: int, component: str, field: str):
+        """Returns the value of a field of the component of an entity"""
+        return self._stores[component].get(entity, field)
+
+    def set(self, entity: int, component: str, field: str, value):
+        """Set the value of a field of the component of an entity"""
+        self._stores[component].set(entity, field, value)
+
+
+class System(ABC):
+    """A behaviour of every entity with a component, run in a batch each step of a world.
+
+    Entities may be idle for a step, e.g. their body is asleep or they are
+    beyond the level of detail of the viewport. The idle entities map to the
+    multiple of the time delta they are stepped by, zero when not at all.
+    """
+
+    # the kind of component the system runs over
+    component = None
+
+    @abstractmethod
+    def update(self, world, time_delta: float, game_data, idle: Dict[int, int]):
+        """Run the system over every entity with its component
+
+        Parameters:
+            world (World): The world being stepped
+            time_delta (float): The time, in seconds, since the last step
+            game_data (tuple<World, Player>): Arbitrary data supplied by the app class
+            idle (dict<int: int>): The multiple of the time delta each idle entity is stepped by
+        """
+
+
+class StepSystem(System):
+    """Calls the step method of things which define their own, one by one.
+
+    Things are stepped in the order of their rows, which changes as
+    components are removed, see ComponentStore. Things added or removed by
+    a step take effect on the next step.
+    """
+
+    component = "step"
+
+    def update(self, world, time_delta: float, game_data, idle: Dict[int, int]):
+        store = world.get_components().get_store(self.component)
+        for entity, thing in list(zip(store.get_entities().tolist(), store.get_column("thing").tolist())):
+            scale = idle.get(entity, 1)
+            if scale:
+                thing.step(time_delta * scale, game_data)
+
+
+class TempoSystem(System):
+    """Walks mobs horizontally at their tempo.
+
+    The velocity of a body is only set when it differs from the tempo, as
+    setting it wakes the body, so a mob at rest is left to fall asleep.
+    """
+
+    component = "tempo"
+
+    def update(self, world, time_delta: float, game_data, idle: Dict[int, int]):
+        store = world.get_components().get_store(self.component)
+        rows = zip(store.get_entities().tolist(), store.get_column("body").tolist(),
+                   store.get_column("tempo").tolist())
+        for entity, body, tempo in rows:
+            if idle and not idle.get(entity, 1):
+                continue
+            vx, vy = body.velocity
+            if vx != tempo:
+                body.velocity = tempo, vy
+
+
+class TimerSystem(System):
+    """Removes the timer components whose end has passed, e.g. the invincibility of a player"""
+
+    def __init__(self, component: str):
+        """
+        Parameters:
+            component (str): The kind of timer component, with an "end" field of the world time it ends at
+        """
+        self.component = component
+
+    def update(self, world, time_delta: float, game_data, idle: Dict[int, int]):
+        components = world.get_components()
+        store = components.get_store(self.component)
+        if not len(store):
+            return
+
+        expired = store.get_entities()[store.get_column("end") < world.get_time()]
+        for entity in expired.tolist():
+            store.remove(entity)
+
+
+def get_default_systems() -> List[System]:
+    """(list<System>) Returns the systems of a world, in the order they are run each step"""
+    return [StepSystem(), TempoSystem(), TimerSystem("invincible")]
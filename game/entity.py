@@ -11,8 +11,14 @@ class Entity:
     """The highest-level abstract representation of an entity in the game world
 
     Should not be instantiated directly.
+
+    Entities declare their instance attributes in __slots__, as a level holds
+    thousands of them. A subclass which does not declare __slots__ still works,
+    but its instances each carry a __dict__.
     """
 
+    __slots__ = ("_shape",)
+
     _type = 0
 
     def __init__(self):
@@ -78,14 +84,47 @@ class DynamicEntity(Entity):
 
     This entity will have an associated health.
 
+    While in a world, a dynamic entity may be adapted to an entity of the
+    world's components, whose systems then run its behaviour, see attach.
+
     Should not be instantiated directly.
     """
 
+    __slots__ = ("_health", "_max_health", "_jumping", "_components", "_entity")
+
     def __init__(self, max_health=20):
         super().__init__()
 
         self._health = self._max_health = max_health
         self._jumping = False
+        # the components of the world the entity is in, and its entity there, see attach
+        self._components = None
+        self._entity = None
+
+    def attach(self, components, entity: int):
+        """Adapt this thing to an entity of a world's components, detaching it from any previous world
+
+        Parameters:
+            components (game.ecs.Components): The components of the world
+            entity (int): The entity of this thing
+        """
+        if self._components is not None:
+            self.detach()
+        self._components = components
+        self._entity = entity
+
+    def detach(self):
+        """Stop adapting this thing to an entity, keeping the state held in its components"""
+        self._components = None
+        self._entity = None
+
+    def get_entity(self):
+        """(int) Returns the entity this thing is adapted to, or None if it is not attached"""
+        return self._entity
+
+    def get_components(self):
+        """(game.ecs.Components) Returns the components this thing is attached to, or None"""
+        return self._components
 
     def change_health(self, change):
         """Increases the dynamic thing's health by 'change (float)'"""
@@ -140,6 +179,8 @@ class DynamicEntity(Entity):
 class BoundaryWall(Entity):
     """A boundary wall to prevent movement off the edge of the game world"""
 
+    __slots__ = ("_id",)
+
     _type = 1
 
     def __init__(self, wall_id: str, body: pymunk.Shape,
@@ -0,0 +1,87 @@
+"""
+Keyboard input sampled once per simulation step, independent of the key repeat rate
+"""
+
+from typing import Dict
+
+
+class InputState:
+    """The held state of keys bound to actions, stored as a bitset of actions.
+
+    Key events are queued as they arrive and applied by update, which is
+    called once at the start of each simulation step. A release followed by a
+    press before the next step, as sent by auto-repeat, is coalesced into the
+    key being held throughout, and pressing a held key has no effect.
+    """
+
+    def __init__(self, bindings: Dict[str, str]):
+        """Construct a new input state with no keys held
+
+        Parameters:
+            bindings (dict<str: str>): Mapping of key names to the action they perform,
+                                       several keys may perform the same action
+        """
+        self._bindings = bindings
+        self._bits = {}
+        for action in bindings.values():
+            self._bits.setdefault(action, 1 << len(self._bits))
+
+        self._held = 0
+        self._pressed = 0
+        self._releasing = 0
+
+        # the state as of the last update
+        self._current_held = 0
+        self._current_pressed = 0
+
+    def get_bindings(self) -> Dict[str, str]:
+        """(dict<str: str>) Returns the mapping of key names to actions"""
+        return self._bindings
+
+    def press(self, key: str) -> bool:
+        """Queue a key press
+
+        Parameters:
+            key (str): The name of the key pressed
+
+        Returns:
+            (bool): True iff the press started holding the key's action
+        """
+        bit = self._bits.get(self._bindings.get(key), 0)
+        self._releasing &= ~bit
+        if self._held & bit:
+            return False
+
+        self._held |= bit
+        self._pressed |= bit
+        return bit != 0
+
+    def release(self, key: str):
+        """Queue a key release, which takes effect at the next update
+
+        Parameters:
+            key (str): The name of the key released
+        """
+        self._releasing |= self._bits.get(self._bindings.get(key), 0)
+
+    def update(self):
+        """Apply the queued key events, to be called once per simulation step"""
+        self._current_held = self._held
+        self._current_pressed = self._pressed
+
+        self._held &= ~self._releasing
+        self._pressed = 0
+        self._releasing = 0
+
+    def is_held(self, action: str) -> bool:
+        """(bool) Returns True iff the action was held at the last update"""
+        return bool(self._current_held & self._bits.get(action, 0))
+
+    def was_pressed(self, action: str) -> bool:
+        """(bool) Returns True iff the action was pressed between the last two updates"""
+        return bool(self._current_pressed & self._bits.get(action, 0))
+
+    def clear(self):
+        """Release all keys immediately"""
+        self._held = self._pressed = self._releasing = 0
+        self._current_held = self._current_pressed = 0
@@ -2,6 +2,10 @@
 Classes to represent items dropped within the game world that players pickup.
 """
 
+from typing import Tuple
+
+import pymunk
+
 from game.entity import DynamicEntity
 
 from player import Player
@@ -13,6 +17,8 @@ class DroppedItem(DynamicEntity):
     Dropped items must implement the collect(Player) method to handle players
     picking up the items.
     """
+    __slots__ = ()
+
     _id = None
     _type = 4
 
@@ -20,6 +26,15 @@ class DroppedItem(DynamicEntity):
         """(str) Returns the unique id of this block"""
         return self._id
 
+    def get_position(self) -> Tuple[float, float]:
+        """(tuple<float, float>) Returns the (x, y) position of this item, the centre of its shape
+        if it hangs in place on the static body, see World.add_pickup"""
+        shape = self._shape
+        if shape.body.body_type == pymunk.Body.STATIC:
+            x, y = shape.bb.center()
+            return x, y
+        return super().get_position()
+
     def collect(self, player: Player):
         """Collect method activated when a player collides with the item.
 
@@ -35,6 +50,8 @@ class DroppedItem(DynamicEntity):
 class Coin(DroppedItem):
     """A dropped coin item that can be picked up to increment the players score.
     """
+    __slots__ = ("_value",)
+
     _id = "coin"
 
     def __init__(self, value: int = 1):
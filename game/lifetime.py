@@ -0,0 +1,78 @@
+"""
+Lifetimes of spawned things, the bounds beyond which things are despawned and spawn budgets
+"""
+
+from typing import Dict, Optional, Tuple
+
+# The counters of a world's lifetime policy, see World.get_lifetime_counts
+SPAWNED = "spawned"
+OVER_BUDGET = "over_budget"
+EXPIRED = "expired"
+OUT_OF_BOUNDS = "out_of_bounds"
+COUNTERS = (SPAWNED, OVER_BUDGET, EXPIRED, OUT_OF_BOUNDS)
+
+
+class LifetimePolicy:
+    """Rules keeping the number of things in a world bounded.
+
+    Things spawned during play, such as the fireballs of a cloud or the coins of
+    a mystery block, are despawned once they have lived for the time to live of
+    their id. A spawner may only have as many live things of an id as its budget.
+
+    Any item or mob which leaves the world by more than the margin, or falls to
+    within the floor of the bottom edge of the world, e.g. down a gap in the
+    ground, is despawned.
+    """
+
+    def __init__(self, ttls: Dict[str, float] = None, budgets: Dict[str, int] = None,
+                 margin: float = 64, floor: float = 16):
+        """Construct a new lifetime policy
+
+        Parameters:
+            ttls (dict<str: float>): The seconds a spawned thing of each id lives for, unlimited if absent
+            budgets (dict<str: int>): The most live things of each id a spawner may have, unlimited if absent
+            margin (float): The pixels beyond the left, top and right edges of the world
+                            at which things are despawned
+            floor (float): The pixels above the bottom edge of the world below which
+                           the centre of a thing has fallen out of the world
+
+        Raises:
+            ValueError: If a time to live or budget is negative
+        """
+        ttls = dict(ttls or {})
+        budgets = dict(budgets or {})
+        for thing_id, ttl in ttls.items():
+            if ttl < 0:
+                raise ValueError(f"The time to live of {thing_id!r} must not be negative, not {ttl}")
+        for thing_id, budget in budgets.items():
+            if budget < 0:
+                raise ValueError(f"The spawn budget of {thing_id!r} must not be negative, not {budget}")
+
+        self._ttls = ttls
+        self._budgets = budgets
+        self._margin = margin
+        self._floor = floor
+
+    def get_ttl(self, thing_id: str) -> Optional[float]:
+        """(float) Returns the seconds a spawned thing of an id lives for, or None if unlimited"""
+        return self._ttls.get(thing_id)
+
+    def get_budget(self, thing_id: str) -> Optional[int]:
+        """(int) Returns the most live things of an id a spawner may have, or None if unlimited"""
+        return self._budgets.get(thing_id)
+
+    def get_margins(self) -> Tuple[float, float]:
+        """(tuple<float, float>) Returns the margin beyond the edges and the floor above the bottom edge"""
+        return self._margin, self._floor
+
+    def get_bounds(self, width: float, height: float) -> Tuple[float, float, float, float]:
+        """Returns the area within which the centre of a thing stays in a world
+
+        Parameters:
+            width (float): The width of the world, in pixels
+            height (float): The height of the world, in pixels
+
+        Returns:
+            (tuple<float, float, float, float>): The (left, top, right, bottom) bounds, in pixels
+        """
+        return -self._margin, -self._margin, width + self._margin, height - self._floor
@@ -0,0 +1,56 @@
+"""
+Level of detail of the AI of mobs, by their distance from the viewport
+"""
+
+from typing import Tuple
+
+# The level of detail buckets, from most to least detailed
+NEAR = "near"
+MID = "mid"
+FAR = "far"
+BUCKETS = (NEAR, MID, FAR)
+
+
+class LevelOfDetail:
+    """Thresholds deciding how often a mob is stepped, by its distance from the viewport.
+
+    Near mobs are stepped every step of the world. Mid range mobs are stepped
+    every interval steps, with a time delta scaled by the interval. Far mobs
+    are not stepped and their bodies are put to sleep until they come closer.
+    """
+
+    def __init__(self, near: float = 128, far: float = 640, interval: int = 4):
+        """Construct a new level of detail
+
+        Parameters:
+            near (float): The distance from the viewport, in pixels, within which mobs are near
+            far (float): The distance from the viewport, in pixels, beyond which mobs are far
+            interval (int): The number of world steps between steps of a mid range mob
+
+        Raises:
+            ValueError: If the thresholds are out of order or the interval is not positive
+        """
+        if not 0 <= near <= far:
+            raise ValueError(f"The near threshold ({near}) must be between 0 and the far threshold ({far})")
+        if interval < 1:
+            raise ValueError(f"The interval of mid range mobs must be at least 1, not {interval}")
+
+        self._near = near
+        self._far = far
+        self._interval = interval
+
+    def get_thresholds(self) -> Tuple[float, float]:
+        """(tuple<float, float>) Returns the near and far distance thresholds, in pixels"""
+        return self._near, self._far
+
+    def get_interval(self) -> int:
+        """(int) Returns the number of world steps between steps of a mid range mob"""
+        return self._interval
+
+    def get_bucket(self, distance: float) -> str:
+        """(str) Returns the bucket of a mob at a distance from the viewport, one of BUCKETS"""
+        if distance <= self._near:
+            return NEAR
+        if distance <= self._far:
+            return MID
+        return FAR
@@ -2,16 +2,15 @@
 Classes to represent non-playable computer-controlled moving entity.
 """
 
-import random
-import pymunk
-import time
-
 from game.entity import DynamicEntity
 from game.util import get_collision_direction
 from game.item import Coin
+from game.projectile import Fireball
 
 MOB_DEFAULT_TEMPO = 30
 MOB_DEFAULT_WEIGHT = 100
+# The speed at which a cloud drops fireballs, in pixels per second
+FIREBALL_SPEED = 60
 
 
 class Mob(DynamicEntity):
@@ -20,6 +19,8 @@ class Mob(DynamicEntity):
     Can be friend, foe, or neither
 
     Should not be instantiated directly"""
+    __slots__ = ("_mob_id", "_size", "_weight", "_tempo", "_steps")
+
     _type = 5
 
     def __init__(self, mob_id, size, weight=MOB_DEFAULT_TEMPO,
@@ -40,7 +41,7 @@ class Mob(DynamicEntity):
         """
         super().__init__(max_health=max_health)
 
-        self._id = mob_id
+        self._mob_id = mob_id
         self._size = size
         self._weight = weight
         self._tempo = tempo
@@ -49,7 +50,7 @@ class Mob(DynamicEntity):
 
     def get_id(self):
         """(str) Returns the unique id for this type of mob"""
-        return self._id
+        return self._mob_id
 
     def get_size(self):
         """(str) Returns the physical (x, y) size of this mob"""
@@ -61,7 +62,11 @@ class Mob(DynamicEntity):
         - zero indicates no movement
         - further from zero means faster movement
         - negative is reversed
+
+        While the mob walks in a world, its tempo is held by its "tempo" component.
         """
+        if self._components is not None and self._components.has(self._entity, "tempo"):
+            return float(self._components.get(self._entity, "tempo", "tempo"))
         return self._tempo
 
     def set_tempo(self, tempo):
@@ -71,49 +76,49 @@ class Mob(DynamicEntity):
             tempo (int): Zero for no movement, larger values for faster
                          movement and negative for reversed.
         """
-        self._tempo = tempo
+        if self._components is not None and self._components.has(self._entity, "tempo"):
+            self._components.set(self._entity, "tempo", "tempo", tempo)
+        else:
+            self._tempo = tempo
+
+    def detach(self):
+        """Stop adapting this mob to an entity, keeping the tempo held in its component"""
+        self._tempo = self.get_tempo()
+        super().detach()
 
     def get_weight(self):
         """(int): Return the weight of this mob."""
         return self._weight
 
     def step(self, time_delta, game_data):
-        """Advance this mob by one time step"""
+        """Advance this mob by one time step
+
+        In a world, mobs which do not override step are walked by its
+        game.ecs.TempoSystem instead.
+        """
         # Track time via time_delta would be more precise, but a step counter is simpler
         # and works reasonably well, assuming time steps occur at roughly constant time deltas
         self._steps += 1
         vx = self.get_tempo()
-        self.set_velocity((vx, self.get_velocity()[1]))
+        velocity = self.get_velocity()
+        # setting the velocity wakes the body, so a mob at rest is left to fall asleep
+        if velocity[0] != vx:
+            self.set_velocity((vx, velocity[1]))
 
     def __repr__(self):
-        return f"{self.__class__.__name__}({self._id!r})"
+        return f"{self.__class__.__name__}({self._mob_id!r})"
 
     @property
     def tempo(self):
-        return self._tempo
-
-
-class Fireball(Mob):
-    """The fireball mob is a moving entity that moves straight in a direction.
-
-    When colliding with the player it will damage the player and explode.
-    """
-    _id = "fireball"
-
-    def __init__(self):
-        super().__init__(self._id, size=(16, 16), weight=300, tempo=0)
-
-    def on_hit(self, event: pymunk.Arbiter, data):
-        world, player = data
-        #if not player.get_invincible():
-        # player.change_health(float(-1))
-        world.remove_mob(self)
+        return self.get_tempo()
 
 
 class CloudMob(Mob):
     """Flying cloud which seeks out the player and when above the player
     will fire a fireball at them.
     """
+    __slots__ = ("_last_drop", "_fire_range", "_random")
+
     _id = "cloud"
     MAX_DISTANCE = 20
 
@@ -125,14 +130,22 @@ class CloudMob(Mob):
                               the cloud will start firing.
         """
         super().__init__(self._id, size=(16, 24), weight=0, tempo=80)
-        self._last_drop = time.time()
+        # the delay before firing starts from the first step in a world
+        self._last_drop = None
         self._fire_range = fire_range
+        self._random = None
 
     def step(self, time_delta, game_data):
         """Move towards the player and fire when within range."""
         world, player = game_data
         vx, vy = self.get_velocity()
 
+        if self._last_drop is None:
+            self._last_drop = world.get_time()
+            # each cloud draws from its own stream, keyed by where it spawned
+            x, y = self.get_position()
+            self._random = world.get_random((self._id, round(x), round(y)))
+
         mob_x, mob_y = self.get_position()
         player_x, player_y = player.get_position()
 
@@ -140,18 +153,17 @@ class CloudMob(Mob):
         if abs(player_x - mob_x) < self._fire_range:
             vx = 0
             # only fire after a delay
-            if time.time() - self._last_drop >= 2:
+            if world.get_time() - self._last_drop >= 2:
                 x, y = self.get_position()
 
-                rand_val = random.randint(1, 10)
-                # occasionally drop a coin instead
+                rand_val = self._random.randint(1, 10)
+                # occasionally drop a coin instead, within the budget of live drops of this cloud
                 if rand_val == 1:
-                    drop = Coin()
-                    world.add_item(drop, x, y + 22)
-                else:
-                    drop = Fireball()
-                    world.add_mob(drop, x, y + 22)
-                self._last_drop = time.time()
+                    if world.can_spawn(self, Coin._id):
+                        world.add_item(Coin(), x, y + 22, spawner=self)
+                elif world.can_spawn(self, Fireball._id):
+                    world.add_projectile(Fireball(), x, y + 22, (0, FIREBALL_SPEED), spawner=self)
+                self._last_drop = world.get_time()
 
         # move towards the player
         elif player_x < mob_x:
@@ -0,0 +1,247 @@
+"""
+A navigation graph of the walkable cells of a world's terrain, for mob path queries
+"""
+
+import heapq
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy
+
+from game.tilemap import TileMap
+
+Cell = Tuple[int, int]
+
+
+class NavigationGraph:
+    """A graph of the cells a mob can stand in, precomputed from a tile map.
+
+    A cell is walkable if it is empty and the cell below it is solid. Edges
+    join walkable cells a mob can move between:
+        - walking to the next cell of a surface
+        - jumping up onto a ledge at most max_jump cells higher
+        - falling off a ledge onto the surface below
+        - jumping over a gap at most max_gap cells wide, landing at most a cell higher or lower
+
+    Paths are found with A* and cached. When the terrain changes, invalidate
+    recomputes the edges of the cells within reach of the change and forgets
+    the cached paths which could have been affected.
+    """
+
+    def __init__(self, tile_map: TileMap, max_jump: int = 2, max_gap: int = 4,
+                 passable: Iterable[str] = (), cache_size: int = 1024):
+        """Precompute the navigation graph of a tile map
+
+        Parameters:
+            tile_map (TileMap): The terrain of the world
+            max_jump (int): The most cells a mob can jump up, the player clears 2 cells
+            max_gap (int): The widest gap, in cells, a mob can jump over, the player clears
+                           the 4 cell gaps of level1.txt
+            passable (iterable<str>): The block ids of the tile map which are not solid,
+                                      every block of the game's levels is solid
+            cache_size (int): The number of most recent paths to cache
+        """
+        self._tile_map = tile_map
+        self._max_jump = max_jump
+        self._max_gap = max_gap
+        self._passable = set(passable)
+        self._cache_size = cache_size
+
+        # cached paths, mapping (start, goal) to (path, lowest column, highest column)
+        self._paths = OrderedDict()
+        self._edges: Dict[Cell, List[Tuple[Cell, int]]] = {}
+
+        columns, rows = tile_map.get_size()
+        self._solid = self._read_solid(0, 0, columns, rows)
+        self._build(0, columns)
+
+    def _read_solid(self, column: int, row: int, width: int, height: int) -> numpy.ndarray:
+        """Returns whether each cell of a region of the tile map is solid"""
+        region = self._tile_map.get_region(column, row, width, height)
+        passable = [code for code, block_id in enumerate(self._tile_map.get_palette())
+                    if block_id is None or block_id in self._passable]
+        return ~numpy.isin(region, passable)
+
+    def _get_reach(self) -> int:
+        """(int) Returns the most columns an edge can span"""
+        return self._max_gap + 1
+
+    def is_solid(self, column: int, row: int) -> bool:
+        """(bool) Returns True iff the cell is solid, cells outside the map are not"""
+        rows, columns = self._solid.shape
+        return 0 <= column < columns and 0 <= row < rows and bool(self._solid[row, column])
+
+    def is_walkable(self, column: int, row: int) -> bool:
+        """(bool) Returns True iff a mob can stand in the cell, i.e. it is empty above a solid cell"""
+        rows, columns = self._solid.shape
+        return (0 <= column < columns and 0 <= row < rows
+                and not self._solid[row, column] and self.is_solid(column, row + 1))
+
+    def _build(self, first: int, last: int):
+        """Compute the edges of every walkable cell in the columns [first, last)"""
+        rows = self._solid.shape[0]
+        if self._edges:
+            for column in range(first, last):
+                for row in range(rows):
+                    self._edges.pop((column, row), None)
+
+        solid = self._solid[:, first:last]
+        below = numpy.zeros_like(solid)
+        below[:-1] = solid[1:]
+        for row, column in zip(*numpy.nonzero(~solid & below)):
+            column, row = int(column) + first, int(row)
+            self._edges[column, row] = self._find_edges(column, row)
+
+    def _find_edges(self, column: int, row: int) -> List[Tuple[Cell, int]]:
+        """Returns the (cell, cost) of every move from a walkable cell"""
+        edges = []
+        for direction in (-1, 1):
+            ahead = column + direction
+
+            # walk along the surface
+            if self.is_walkable(ahead, row):
+                edges.append(((ahead, row), 1))
+
+            # jump up onto a ledge, with headroom above the current cell
+            for height in range(1, self._max_jump + 1):
+                if self.is_solid(column, row - height):
+                    break
+                if self.is_walkable(ahead, row - height):
+                    edges.append(((ahead, row - height), 1 + height))
+                    break
+
+            if self.is_solid(ahead, row) or self.is_solid(ahead, row + 1):
+                continue
+
+            # fall off the ledge onto the surface below
+            landing = self._find_landing(ahead, row)
+            if landing is not None:
+                edges.append(((ahead, landing), 1 + landing - row))
+
+            # jump over the gap
+            for distance in range(2, self._max_gap + 2):
+                across = column + direction * distance
+                middle = column + direction * (distance - 1)
+                if self.is_solid(middle, row) or self.is_solid(middle, row - 1):
+                    break
+                targets = [target for target in (row - 1, row, row + 1) if self.is_walkable(across, target)]
+                if targets:
+                    edges.append(((across, targets[0]), distance + abs(targets[0] - row)))
+                    break
+
+        return edges
+
+    def _find_landing(self, column: int, row: int) -> Optional[int]:
+        """(int) Returns the row of the first walkable cell below a cell, or None if there is none"""
+        rows = self._solid.shape[0]
+        for below in range(row + 1, rows):
+            if self.is_solid(column, below):
+                return None
+            if self.is_walkable(column, below):
+                return below
+        return None
+
+    def get_node(self, column: int, row: int) -> Optional[Cell]:
+        """Returns the walkable cell a mob in a cell would come to stand in
+
+        Returns:
+            (tuple<int, int>): The walkable cell at or below the cell, or None if there is none
+        """
+        if self.is_walkable(column, row):
+            return column, row
+        if self.is_solid(column, row):
+            return None
+        landing = self._find_landing(column, row)
+        return None if landing is None else (column, landing)
+
+    def get_edges(self, cell: Cell) -> List[Tuple[Cell, int]]:
+        """(list<tuple<tuple<int, int>, int>>) Returns the (cell, cost) of every move from a walkable cell"""
+        return self._edges.get(cell, [])
+
+    def get_node_count(self) -> int:
+        """(int) Returns the number of walkable cells"""
+        return len(self._edges)
+
+    def find_path(self, start: Cell, goal: Cell) -> Optional[List[Cell]]:
+        """Find the cheapest path between two walkable cells, caching the result
+
+        Parameters:
+            start (tuple<int, int>): The (column, row) of the walkable cell to start from
+            goal (tuple<int, int>): The (column, row) of the walkable cell to reach
+
+        Returns:
+            (list<tuple<int, int>>): The cells of the path, including the start and goal,
+                                     or None if the goal cannot be reached
+        """
+        key = (start, goal)
+        if key in self._paths:
+            self._paths.move_to_end(key)
+            return self._paths[key][0]
+
+        path = self._search(start, goal)
+        if path is None:
+            # an unreachable goal may become reachable after any change
+            span = (float('-inf'), float('inf'))
+        else:
+            columns = [column for column, _ in path]
+            span = (min(columns), max(columns))
+
+        self._paths[key] = (path, *span)
+        if len(self._paths) > self._cache_size:
+            self._paths.popitem(last=False)
+        return path
+
+    def _search(self, start: Cell, goal: Cell) -> Optional[List[Cell]]:
+        """A* search between two walkable cells, every edge costs at least the columns it spans"""
+        if start not in self._edges or goal not in self._edges:
+            return None
+
+        costs = {start: 0}
+        previous = {start: None}
+        frontier = [(abs(goal[0] - start[0]), start)]
+        while frontier:
+            _, cell = heapq.heappop(frontier)
+            if cell == goal:
+                path = []
+                while cell is not None:
+                    path.append(cell)
+                    cell = previous[cell]
+                return path[::-1]
+
+            for neighbour, cost in self._edges[cell]:
+                new_cost = costs[cell] + cost
+                if new_cost < costs.get(neighbour, float('inf')):
+                    costs[neighbour] = new_cost
+                    previous[neighbour] = cell
+                    heapq.heappush(frontier, (new_cost + abs(goal[0] - neighbour[0]), neighbour))
+
+        return None
+
+    def invalidate(self, column: int, row: int, width: int = 1, height: int = 1):
+        """Update the graph after the terrain of a region of cells has changed
+
+        Parameters:
+            column (int): The left column of the changed region
+            row (int): The top row of the changed region
+            width (int): The number of columns changed
+            height (int): The number of rows changed
+        """
+        columns, rows = self._tile_map.get_size()
+        first, last = max(column, 0), min(column + width, columns)
+        top, bottom = max(row, 0), min(row + height, rows)
+        if first >= last or top >= bottom:
+            return
+
+        self._solid[top:bottom, first:last] = self._read_solid(first, top, last - first, bottom - top)
+
+        # edges span at most the reach in columns, any number of rows when falling
+        first, last = max(first - self._get_reach(), 0), min(last + self._get_reach(), columns)
+        self._build(first, last)
+
+        for key, (_, lowest, highest) in list(self._paths.items()):
+            if lowest < last and highest >= first:
+                del self._paths[key]
+
+    def clear_cache(self):
+        """Forget all of the cached paths"""
+        self._paths.clear()
@@ -0,0 +1,150 @@
+"""
+A particle system for visual effects, simulated in numpy arrays outside of the physics space
+"""
+
+from typing import List, Tuple
+
+import numpy
+
+# The largest number of distinct colours a particle system can hold
+MAX_COLOURS = 255
+
+
+class ParticleSystem:
+    """A fixed capacity of particles, each with a position, velocity, age,
+    lifetime and colour, stored in numpy arrays.
+
+    The live particles are packed at the start of the arrays. Each update
+    integrates every particle at once, then drops the particles which have
+    outlived their lifetime. Particles take no part in the physics simulation.
+    """
+
+    def __init__(self, capacity: int = 4096, gravity: Tuple[float, float] = (0, 300)):
+        """Construct a new, empty particle system
+
+        Parameters:
+            capacity (int): The most particles which can be live at once, further particles are not emitted
+            gravity (tuple<float, float>): The (x, y) acceleration of every particle
+
+        Raises:
+            ValueError: If the capacity is not positive
+        """
+        if capacity < 1:
+            raise ValueError(f"The capacity of a particle system must be at least 1, not {capacity}")
+
+        self._positions = numpy.zeros((capacity, 2), dtype=numpy.float32)
+        self._velocities = numpy.zeros((capacity, 2), dtype=numpy.float32)
+        self._ages = numpy.zeros(capacity, dtype=numpy.float32)
+        self._lifetimes = numpy.zeros(capacity, dtype=numpy.float32)
+        self._colours = numpy.zeros(capacity, dtype=numpy.uint8)
+        self._gravity = numpy.array(gravity, dtype=numpy.float32)
+
+        self._palette: List[str] = []
+        self._count = 0
+
+    def get_capacity(self) -> int:
+        """(int) Returns the most particles which can be live at once"""
+        return len(self._ages)
+
+    def get_count(self) -> int:
+        """(int) Returns the number of live particles"""
+        return self._count
+
+    def set_gravity(self, gravity: Tuple[float, float]):
+        """Set the (x, y) acceleration of every particle"""
+        self._gravity = numpy.array(gravity, dtype=numpy.float32)
+
+    def get_palette(self) -> List[str]:
+        """(list<str>) Returns the colour of each colour index, see get_particles"""
+        return list(self._palette)
+
+    def _get_colour_index(self, colour: str) -> int:
+        """Returns the index of a colour in the palette, adding it if it is new
+
+        Raises:
+            ValueError: If the palette already holds the maximum number of colours
+        """
+        if colour not in self._palette:
+            if len(self._palette) >= MAX_COLOURS:
+                raise ValueError(f"Unable to add {colour!r}, a particle system holds at most {MAX_COLOURS} colours")
+            self._palette.append(colour)
+        return self._palette.index(colour)
+
+    def emit(self, x: float, y: float, count: int, rng: numpy.random.Generator, colour: str = "white",
+             speed: Tuple[float, float] = (40, 120), angle: Tuple[float, float] = (0, 2 * numpy.pi),
+             lifetime: Tuple[float, float] = (0.3, 0.8)) -> int:
+        """Emit a burst of particles from the point ('x', 'y')
+
+        The speed, angle and lifetime of each particle are drawn uniformly from their ranges.
+
+        Parameters:
+            x (float): The x-coordinate to emit from
+            y (float): The y-coordinate to emit from
+            count (int): The number of particles to emit
+            rng (numpy.random.Generator): The random stream scattering the particles
+            colour (str): The colour of the particles
+            speed (tuple<float, float>): The range of speeds, in pixels per second
+            angle (tuple<float, float>): The range of directions, in radians clockwise from the x axis
+            lifetime (tuple<float, float>): The range of lifetimes, in seconds
+
+        Returns:
+            (int): The number of particles emitted, fewer than count when at capacity
+        """
+        count = max(min(count, self.get_capacity() - self._count), 0)
+        if not count:
+            return 0
+
+        start, end = self._count, self._count + count
+        speeds = rng.uniform(*speed, count)
+        angles = rng.uniform(*angle, count)
+
+        self._positions[start:end] = x, y
+        self._velocities[start:end, 0] = speeds * numpy.cos(angles)
+        self._velocities[start:end, 1] = speeds * numpy.sin(angles)
+        self._ages[start:end] = 0
+        self._lifetimes[start:end] = rng.uniform(*lifetime, count)
+        self._colours[start:end] = self._get_colour_index(colour)
+
+        self._count = end
+        return count
+
+    def update(self, time_delta: float):
+        """Advance every live particle by a time step, dropping those which have expired
+
+        Parameters:
+            time_delta (float): The time, in seconds, to advance by
+        """
+        count = self._count
+        if not count:
+            return
+
+        velocities = self._velocities[:count]
+        velocities += self._gravity * time_delta
+        self._positions[:count] += velocities * time_delta
+        ages = self._ages[:count]
+        ages += time_delta
+
+        alive = ages < self._lifetimes[:count]
+        live = int(numpy.count_nonzero(alive))
+        if live < count:
+            # pack the live particles at the start of the arrays
+            for array in (self._positions, self._velocities, self._ages, self._lifetimes, self._colours):
+                array[:live] = array[:count][alive]
+            self._count = live
+
+    def get_particles(self) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """Returns the live particles
+
+        Returns:
+            (tuple<numpy.ndarray, numpy.ndarray>): Read only views of the (x, y) position
+                                                   and the colour index of each live particle
+        """
+        positions = self._positions[:self._count]
+        colours = self._colours[:self._count]
+        positions.flags.writeable = False
+        colours.flags.writeable = False
+        return positions, colours
+
+    def clear(self):
+        """Remove every particle"""
+        self._count = 0
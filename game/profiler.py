@@ -0,0 +1,181 @@
+"""
+Instruments to measure where the time of each frame of the game goes
+"""
+
+from typing import Dict, List, Tuple
+
+# The phases of a frame, in the order they are reported. Each is exclusive of the others,
+# e.g. physics excludes the collision callbacks run during the space step
+PHASES = ("entities", "physics", "collisions", "switch", "scroll", "redraw")
+
+
+class FrameProfiler:
+    """Aggregates the time spent in each phase of a frame over the most recent
+    frames, stored in fixed size ring buffers.
+
+    Used as an instrument of the world (see World.add_instrument). Spans of the
+    "collision" category are summed into the "collisions" phase, spans of the
+    "frame" category mark the end of a frame and enclosing spans of the "span"
+    category are ignored. Any other span is a phase of its own name.
+    """
+
+    def __init__(self, capacity: int = 240):
+        """Construct a new frame profiler
+
+        Parameters:
+            capacity (int): The number of most recent frames to aggregate over
+        """
+        self._capacity = capacity
+        self._count = 0
+
+        self._current = {}
+        self._phases = {phase: [0.] * capacity for phase in PHASES}
+        self._frame_times = [0.] * capacity
+        self._frame_ends = [0.] * capacity
+
+    def record(self, category: str, name: str, start: float, end: float):
+        """Record a timed span, see World.record"""
+        if category == "frame":
+            self._end_frame(start, end)
+            return
+        if category == "span":
+            return
+
+        phase = "collisions" if category == "collision" else name
+        self._current[phase] = self._current.get(phase, 0.) + end - start
+
+    def _end_frame(self, start: float, end: float):
+        """Store the phase times of the current frame in the ring buffers"""
+        index = self._count % self._capacity
+
+        for phase in self._current:
+            if phase not in self._phases:
+                self._phases[phase] = [0.] * self._capacity
+        for phase, times in self._phases.items():
+            times[index] = self._current.get(phase, 0.)
+
+        self._frame_times[index] = end - start
+        self._frame_ends[index] = end
+        self._current.clear()
+        self._count += 1
+
+    def get_frame_count(self) -> int:
+        """(int) Returns the number of frames recorded, including those no longer stored"""
+        return self._count
+
+    def _stored(self, times: List[float]) -> List[float]:
+        """Returns the values of a ring buffer which have been recorded"""
+        return times[:min(self._count, self._capacity)]
+
+    def get_percentile(self, phase: str, percentile: float) -> float:
+        """Returns a percentile of the time spent in a phase per frame, in seconds
+
+        Parameters:
+            phase (str): The phase, or "frame" for the time of whole frames
+            percentile (float): The percentile, between 0 and 100
+        """
+        times = self._frame_times if phase == "frame" else self._phases.get(phase, [])
+        times = sorted(self._stored(times))
+        if not times:
+            return 0.
+
+        index = round(percentile / 100 * (len(times) - 1))
+        return times[index]
+
+    def get_summary(self) -> Dict[str, Tuple[float, float, float]]:
+        """(dict<str: tuple<float, float, float>>) Returns the 50th, 95th and 100th
+        percentile of the time spent in each phase, including "frame", in milliseconds"""
+        summary = {}
+        for phase in (*self._phases, "frame"):
+            summary[phase] = tuple(self.get_percentile(phase, percentile) * 1000
+                                   for percentile in (50, 95, 100))
+        return summary
+
+    def get_fps(self) -> float:
+        """(float) Returns the average number of frames per second over the stored frames"""
+        stored = min(self._count, self._capacity)
+        if stored < 2:
+            return 0.
+
+        last = (self._count - 1) % self._capacity
+        first = (self._count - stored) % self._capacity
+        elapsed = self._frame_ends[last] - self._frame_ends[first]
+        return (stored - 1) / elapsed if elapsed > 0 else 0.
+
+    def format_lines(self, counts: Dict[str, int] = None) -> List[str]:
+        """Format the summary of the profiler as lines of text
+
+        Parameters:
+            counts (dict<str: int>): The number of each type of entity in the world
+
+        Returns:
+            (list<str>): The lines of text, with one line per phase
+        """
+        lines = [f"{self.get_fps():5.1f} FPS   p50   p95   max (ms)"]
+        for phase, (median, high, highest) in self.get_summary().items():
+            lines.append(f"{phase:>10} {median:5.2f} {high:5.2f} {highest:5.2f}")
+
+        if counts:
+            lines.append(" ".join(f"{name}:{count}" for name, count in sorted(counts.items())))
+        return lines
+
+
+class CollisionAccounting:
+    """Counts the invocations of, and time spent in, collision callbacks per
+    (collision_type_a, collision_type_b, event) key, see World.set_collision_accounting.
+
+    Also counts how often begin & pre_solve callbacks rejected the contact by
+    returning False. Pairs which are almost always rejected are better handled
+    by shape filter masks, so pymunk never reports the contact.
+    """
+
+    # Collision events where returning False rejects the contact
+    REJECTABLE_EVENTS = ("begin", "pre_solve")
+
+    def __init__(self):
+        # key -> [calls, total time, maximum time, rejections]
+        self._stats = {}
+
+    def record(self, key: Tuple[str, str, str], duration: float, result):
+        """Record an invocation of a collision callback
+
+        Parameters:
+            key (tuple<str, str, str>): The (collision_type_a, collision_type_b, event)
+            duration (float): The time spent in the callback, in seconds
+            result: The value returned by the callback
+        """
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = [0, 0., 0., 0]
+
+        stats[0] += 1
+        stats[1] += duration
+        if duration > stats[2]:
+            stats[2] = duration
+        if result is False and key[2] in self.REJECTABLE_EVENTS:
+            stats[3] += 1
+
+    def get_stats(self) -> Dict[Tuple[str, str, str], Dict[str, float]]:
+        """Returns the accounting of each collision callback
+
+        Returns:
+            (dict<tuple<str, str, str>: dict<str: float>>): Mapping of each key to the
+                number of "calls", "total" and "max" time in seconds, and "rejected" calls
+        """
+        return {key: {"calls": calls, "total": total, "max": highest, "rejected": rejected}
+                for key, (calls, total, highest, rejected) in self._stats.items()}
+
+    def clear(self):
+        """Discard all of the recorded invocations"""
+        self._stats.clear()
+
+    def format_lines(self) -> List[str]:
+        """(list<str>) Returns a line of text per collision callback, most expensive first"""
+        lines = []
+        for (type_a, type_b, event), stats in sorted(self.get_stats().items(),
+                                                     key=lambda item: -item[1]["total"]):
+            rejected = stats["rejected"] / stats["calls"] * 100
+            lines.append(f"{type_a}/{type_b} {event}: {stats['calls']} calls, "
+                         f"{stats['total'] * 1000:.2f} ms total, {stats['max'] * 1000:.3f} ms max, "
+                         f"{stats['rejected']} rejected ({rejected:.0f}%)")
+        return lines
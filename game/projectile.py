@@ -0,0 +1,290 @@
+"""
+Projectiles, things which fly in a line through a world and stop at the first thing they hit
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy
+
+from game.entity import Entity
+
+
+class Projectile(Entity):
+    """A small, fast thing, such as a fireball, which takes no part in the physics simulation.
+
+    A projectile is never added to the physics space. Each step the world
+    advances it analytically and casts a segment from its old position to its
+    new one, see World.add_projectile. At the first thing the segment hits,
+    the projectile is removed and the hit handlers of the projectile and the
+    thing are called, see HitTable.
+
+    While a projectile is live its motion is held by the ProjectileSystem of
+    the world, and the projectile is a handle to it.
+    """
+
+    __slots__ = ("_position", "_velocity", "_system", "_index")
+
+    _id = None
+    # the radius of the projectile, zero casts a thin ray
+    _radius = 0
+    # the fraction of the world's gravity the projectile falls with, zero flies in a straight line
+    _gravity_scale = 0
+    # the categories of thing the projectile hits, see game.world.PHYSICAL_THING_CATEGORIES
+    _hits = ("wall", "block", "player", "mob")
+
+    def __init__(self):
+        super().__init__()
+        self._position = (0., 0.)
+        self._velocity = (0., 0.)
+        # the system holding the motion of the projectile while it is live, and its index there
+        self._system: Optional[ProjectileSystem] = None
+        self._index = 0
+
+    def get_id(self) -> str:
+        """(str) Returns the unique id of this kind of projectile"""
+        return self._id
+
+    def get_radius(self) -> float:
+        """(float) Returns the radius of this projectile"""
+        return self._radius
+
+    def get_gravity_scale(self) -> float:
+        """(float) Returns the fraction of the world's gravity this projectile falls with"""
+        return self._gravity_scale
+
+    def get_hits(self) -> Tuple[str, ...]:
+        """(tuple<str, ...>) Returns the categories of thing this projectile hits"""
+        return self._hits
+
+    def get_position(self) -> Tuple[float, float]:
+        """(tuple<float, float>) Returns the (x, y) position of the centre of this projectile"""
+        if self._system is not None:
+            x, y = self._system._positions[self._index]
+            return float(x), float(y)
+        return self._position
+
+    def set_position(self, position: Tuple[float, float]):
+        """Set the (x, y) position of the centre of this projectile"""
+        if self._system is not None:
+            self._system._positions[self._index] = position
+        self._position = tuple(position)
+
+    def get_velocity(self) -> Tuple[float, float]:
+        """(tuple<float, float>) Returns the (x, y) velocity of this projectile"""
+        if self._system is not None:
+            vx, vy = self._system._velocities[self._index]
+            return float(vx), float(vy)
+        return self._velocity
+
+    def set_velocity(self, velocity: Tuple[float, float]):
+        """Set the (x, y) velocity of this projectile"""
+        if self._system is not None:
+            self._system._velocities[self._index] = velocity
+        self._velocity = tuple(velocity)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.get_id()!r})"
+
+
+class Fireball(Projectile):
+    """A fireball, dropped by a cloud, which falls until it hits something."""
+
+    __slots__ = ()
+
+    _id = "fireball"
+    _radius = 8
+    _gravity_scale = 1
+
+
+class ProjectileSystem:
+    """The motion of the live projectiles of a world, stored in numpy arrays.
+
+    The live projectiles are packed at the start of the arrays in the order
+    they were added. Removed projectiles are only marked as dead, so indices
+    stay valid until the next advance, which packs the arrays and then moves
+    every projectile at once.
+    """
+
+    def __init__(self, capacity: int = 64):
+        """Construct a new, empty projectile system
+
+        Parameters:
+            capacity (int): The number of projectiles to make room for, grown as needed
+
+        Raises:
+            ValueError: If the capacity is not positive
+        """
+        if capacity < 1:
+            raise ValueError(f"The capacity of a projectile system must be at least 1, not {capacity}")
+
+        self._projectiles: List[Optional[Projectile]] = []
+        self._positions = numpy.zeros((capacity, 2))
+        self._velocities = numpy.zeros((capacity, 2))
+        self._radii = numpy.zeros(capacity)
+        self._gravity_scales = numpy.zeros(capacity)
+        self._masks = numpy.zeros(capacity, dtype=numpy.uint32)
+        self._dead = 0
+
+    def get_count(self) -> int:
+        """(int) Returns the number of live projectiles"""
+        return len(self._projectiles) - self._dead
+
+    def get_projectiles(self) -> List[Projectile]:
+        """(list<Projectile>) Returns the live projectiles, in the order they were added"""
+        return [projectile for projectile in self._projectiles if projectile is not None]
+
+    def get_projectile(self, index: int) -> Optional[Projectile]:
+        """(Projectile) Returns the projectile at an index, or None if it has been removed since the last advance"""
+        return self._projectiles[index]
+
+    def add(self, projectile: Projectile, position: Tuple[float, float], velocity: Tuple[float, float],
+            mask: int):
+        """Add a projectile, moving from a position at a velocity
+
+        Parameters:
+            projectile (Projectile): The projectile to add
+            position (tuple<float, float>): The (x, y) position of the centre of the projectile
+            velocity (tuple<float, float>): The (x, y) velocity of the projectile
+            mask (int): The query categories of the things the projectile hits
+
+        Raises:
+            ValueError: If the projectile is already live
+        """
+        if projectile._system is not None:
+            raise ValueError(f"Unable to add {projectile!r}, it has already been added")
+
+        index = len(self._projectiles)
+        if index == len(self._radii):
+            self._resize(2 * index)
+
+        self._projectiles.append(projectile)
+        self._positions[index] = position
+        self._velocities[index] = velocity
+        self._radii[index] = projectile.get_radius()
+        self._gravity_scales[index] = projectile.get_gravity_scale()
+        self._masks[index] = mask
+        projectile._system, projectile._index = self, index
+
+    def remove(self, projectile: Projectile) -> bool:
+        """Remove a projectile, keeping its last position and velocity
+
+        Returns:
+            (bool): True iff the projectile was live
+        """
+        if projectile._system is not self:
+            return False
+
+        index = projectile._index
+        projectile._position = projectile.get_position()
+        projectile._velocity = projectile.get_velocity()
+        projectile._system = None
+        self._projectiles[index] = None
+        self._dead += 1
+        return True
+
+    def _resize(self, capacity: int):
+        """Grow the arrays to a capacity"""
+        for name in ("_positions", "_velocities", "_radii", "_gravity_scales", "_masks"):
+            array = getattr(self, name)
+            grown = numpy.zeros((capacity, *array.shape[1:]), dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    def _pack(self):
+        """Pack the live projectiles at the start of the arrays"""
+        count = len(self._projectiles)
+        alive = numpy.fromiter((projectile is not None for projectile in self._projectiles), bool, count)
+        live = count - self._dead
+        for array in (self._positions, self._velocities, self._radii, self._gravity_scales, self._masks):
+            array[:live] = array[:count][alive]
+
+        self._projectiles = [projectile for projectile in self._projectiles if projectile is not None]
+        for index, projectile in enumerate(self._projectiles):
+            projectile._index = index
+        self._dead = 0
+
+    def advance(self, time_delta: float, gravity: Tuple[float, float]) -> Tuple[numpy.ndarray, ...]:
+        """Move every live projectile by a time step, falling with its share of gravity
+
+        Parameters:
+            time_delta (float): The time, in seconds, to advance by
+            gravity (tuple<float, float>): The (x, y) acceleration of gravity
+
+        Returns:
+            (tuple<numpy.ndarray, ...>): The (x, y) positions each projectile moved from and to,
+                                         and the radius and mask of each projectile
+        """
+        if self._dead:
+            self._pack()
+
+        count = len(self._projectiles)
+        velocities = self._velocities[:count]
+        if any(gravity):
+            velocities += numpy.multiply.outer(self._gravity_scales[:count], gravity) * time_delta
+
+        positions = self._positions[:count]
+        starts = positions.copy()
+        positions += velocities * time_delta
+        return starts, positions, self._radii[:count], self._masks[:count]
+
+    def get_positions(self) -> numpy.ndarray:
+        """(numpy.ndarray) Returns a read only view of the (x, y) position of each projectile, by index"""
+        positions = self._positions[:len(self._projectiles)]
+        positions.flags.writeable = False
+        return positions
+
+
+class HitTable:
+    """A table of the callbacks of projectiles hitting things, by the type of
+    projectile and the type of thing it hit.
+
+    Each callback takes the projectile, the thing and the point of the hit, e.g.
+        on_hit(projectile: Projectile, thing: Entity, point: tuple<float, float>)
+
+    The callback of the closest registered base classes of the projectile and
+    the thing is used, so a handler for (Projectile, Entity) handles any hit.
+    """
+
+    def __init__(self):
+        # mapping of (projectile type, thing type) to its callback
+        self._handlers: Dict[Tuple[type, type], Callable] = {}
+        # the resolved callback of each pair of concrete types
+        self._resolved: Dict[Tuple[type, type], Optional[Callable]] = {}
+
+    def register(self, projectile_type: type, thing_type: type, on_hit: Callable):
+        """Register the callback of a type of projectile hitting a type of thing
+
+        Parameters:
+            projectile_type (type): The subclass of Projectile to handle
+            thing_type (type): The subclass of Entity which is hit
+            on_hit (Callable<Projectile, Entity, tuple<float, float>>): Called on the step the thing is hit
+        """
+        self._handlers[projectile_type, thing_type] = on_hit
+        self._resolved.clear()
+
+    def unregister(self, projectile_type: type, thing_type: type = Entity):
+        """Remove the callback of a type of projectile hitting a type of thing"""
+        self._handlers.pop((projectile_type, thing_type), None)
+        self._resolved.clear()
+
+    def _resolve(self, projectile_type: type, thing_type: type) -> Optional[Callable]:
+        """Returns the callback of the closest registered base classes of a projectile and a thing"""
+        key = (projectile_type, thing_type)
+        if key not in self._resolved:
+            self._resolved[key] = next((self._handlers[projectile_base, thing_base]
+                                        for projectile_base in projectile_type.__mro__
+                                        for thing_base in thing_type.__mro__
+                                        if (projectile_base, thing_base) in self._handlers), None)
+        return self._resolved[key]
+
+    def dispatch(self, projectile: Projectile, thing: Entity, point: Tuple[float, float]):
+        """Call the callback of a projectile hitting a thing, if there is one
+
+        Parameters:
+            projectile (Projectile): The projectile which hit
+            thing (Entity): The thing which was hit
+            point (tuple<float, float>): The point on the surface of the thing which was hit
+        """
+        callback = self._resolve(type(projectile), type(thing))
+        if callback is not None:
+            callback(projectile, thing, point)
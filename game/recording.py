@@ -0,0 +1,124 @@
+"""
+Recording of the input to a game session, so that it can be replayed exactly
+"""
+
+import hashlib
+import json
+from typing import List, Tuple
+
+
+def state_hash(world, player) -> str:
+    """Returns a hash of the physical state of a world and the player
+
+    Parameters:
+        world (World): The world to hash, including the position & velocity
+                       of every body and projectile and the bounds of every static shape
+        player (Player): The player, whose health & score are included
+
+    Returns:
+        (str): A short hexadecimal digest of the state
+    """
+    states = []
+    for shape in world.get_space().shapes:
+        body = shape.body
+        if body.body_type == body.STATIC:
+            bb = shape.bb
+            state = (type(shape.object).__name__, bb.left, bb.bottom, bb.right, bb.top)
+        else:
+            state = (type(shape.object).__name__, *body.position, *body.velocity)
+        states.append(repr(state))
+    for projectile in world.get_projectiles():
+        states.append(repr((type(projectile).__name__, *projectile.get_position(), *projectile.get_velocity())))
+
+    # shapes added during a step are added in an arbitrary order, so are sorted
+    digest = hashlib.blake2b(digest_size=8)
+    for state in sorted(states):
+        digest.update(state.encode())
+
+    digest.update(repr((player.get_health(), player.get_score())).encode())
+    return digest.hexdigest()
+
+
+class InputRecording:
+    """A log of everything needed to replay a game session: the configuration
+    it started from, the random seed, the tick-indexed input events and the
+    hash of the game state after each tick.
+    """
+
+    def __init__(self, config: str, seed: int, level: str = None):
+        """Construct a new, empty recording
+
+        Parameters:
+            config (str): The configuration file the session was started with
+            seed (int): The seed of the random number generator
+            level (str): The level file the session started in
+        """
+        self._config = config
+        self._seed = seed
+        self._level = level
+        self._events = []
+        self._hashes = []
+
+    def get_config(self) -> str:
+        """(str) Returns the configuration file the session was started with"""
+        return self._config
+
+    def get_seed(self) -> int:
+        """(int) Returns the seed of the random number generator"""
+        return self._seed
+
+    def get_level(self) -> str:
+        """(str) Returns the level file the session started in"""
+        return self._level
+
+    def set_level(self, level: str):
+        """Set the level file the session started in"""
+        self._level = level
+
+    def add_event(self, tick: int, action: str, argument: str = None):
+        """Record an input event
+
+        Parameters:
+            tick (int): The number of ticks completed before the event
+            action (str): The kind of event, e.g. "key"
+            argument (str): The detail of the event, e.g. the key pressed
+        """
+        self._events.append((tick, action, argument))
+
+    def get_events(self) -> List[Tuple[int, str, str]]:
+        """(list<tuple<int, str, str>>) Returns the (tick, action, argument) of each event"""
+        return self._events
+
+    def add_hash(self, digest: str):
+        """Record the state hash after the next tick, see state_hash"""
+        self._hashes.append(digest)
+
+    def get_hashes(self) -> List[str]:
+        """(list<str>) Returns the state hash after each tick"""
+        return self._hashes
+
+    def get_tick_count(self) -> int:
+        """(int) Returns the number of ticks recorded"""
+        return len(self._hashes)
+
+    def save(self, filename: str):
+        """Write the recording to a JSON file"""
+        with open(filename, 'w') as file:
+            json.dump({
+                "config": self._config,
+                "seed": self._seed,
+                "level": self._level,
+                "events": self._events,
+                "hashes": self._hashes
+            }, file)
+
+    @classmethod
+    def load(cls, filename: str) -> "InputRecording":
+        """Read a recording written by save"""
+        with open(filename) as file:
+            data = json.load(file)
+
+        recording = cls(data["config"], data["seed"], data["level"])
+        recording._events = [tuple(event) for event in data["events"]]
+        recording._hashes = data["hashes"]
+        return recording
@@ -0,0 +1,74 @@
+"""
+Seeded streams of random numbers, independent of each other and of the random module
+"""
+
+import hashlib
+import random
+from typing import Dict, Hashable
+
+import numpy
+
+
+class RandomStreams:
+    """A family of random number generators derived from a single seed.
+
+    Each stream is identified by a stable key, such as an entity's id and
+    spawn position, and seeded from the hash of the seed and the key. Drawing
+    from one stream never affects another, so adding an entity only changes
+    the outcomes of that entity.
+
+    Keys should be built from strings, ints & floats, whose repr is stable
+    across runs; the built in hash of a string is not.
+    """
+
+    def __init__(self, seed: int = None):
+        """Construct a new family of random streams
+
+        Parameters:
+            seed (int): The seed all streams are derived from,
+                        a random seed is chosen if not given
+        """
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 64)
+        self._seed = seed
+        self._streams: Dict[Hashable, random.Random] = {}
+        self._generators: Dict[Hashable, numpy.random.Generator] = {}
+
+    def get_seed(self) -> int:
+        """(int) Returns the seed all streams are derived from"""
+        return self._seed
+
+    def derive_seed(self, key: Hashable) -> int:
+        """(int) Returns the seed of the stream identified by key"""
+        digest = hashlib.blake2b(repr((self._seed, key)).encode(), digest_size=8)
+        return int.from_bytes(digest.digest(), "little")
+
+    def get(self, key: Hashable) -> random.Random:
+        """Returns the stream identified by key, creating it on first use
+
+        Parameters:
+            key (Hashable): The stable key of the stream
+
+        Returns:
+            (random.Random): The random number generator of the stream
+        """
+        stream = self._streams.get(key)
+        if stream is None:
+            stream = self._streams[key] = random.Random(self.derive_seed(key))
+        return stream
+
+    def get_generator(self, key: Hashable) -> numpy.random.Generator:
+        """Returns a vectorised generator identified by key, for drawing many values at once
+
+        The generator is independent of the stream returned by get for the same key.
+
+        Parameters:
+            key (Hashable): The stable key of the generator
+
+        Returns:
+            (numpy.random.Generator): The random number generator
+        """
+        generator = self._generators.get(key)
+        if generator is None:
+            generator = self._generators[key] = numpy.random.default_rng(self.derive_seed(key))
+        return generator
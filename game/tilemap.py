@@ -0,0 +1,180 @@
+"""
+A compact grid of the terrain of a world, one tile code per grid cell
+"""
+
+import base64
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy
+
+# The code of an empty tile
+EMPTY = 0
+
+# The largest number of distinct block ids a tile map can hold
+MAX_CODES = 255
+
+
+class TileMap:
+    """A 2d array of tile codes, one per (column, row) cell of a world's grid.
+
+    Each code stands for a block id, through the palette of the map. Code 0
+    (EMPTY) is a cell without a block. Every change to a tile is recorded as an
+    edit of (column, row, old block id, new block id), until the edits are cleared.
+    """
+
+    def __init__(self, size: Tuple[int, int], palette: Iterable[str] = ()):
+        """Construct a new, empty tile map
+
+        Parameters:
+            size (tuple<int, int>): The (columns, rows) size of the map
+            palette (iterable<str>): The block ids to assign the first codes to
+        """
+        columns, rows = size
+        self._tiles = numpy.zeros((rows, columns), dtype=numpy.uint8)
+        self._palette: List[Optional[str]] = [None]
+        self._codes: Dict[str, int] = {}
+        self._edits: List[Tuple[int, int, Optional[str], Optional[str]]] = []
+
+        for block_id in palette:
+            self.get_code(block_id)
+
+    def get_size(self) -> Tuple[int, int]:
+        """(tuple<int, int>) Returns the (columns, rows) size of the map"""
+        rows, columns = self._tiles.shape
+        return columns, rows
+
+    def get_palette(self) -> List[Optional[str]]:
+        """(list<str>) Returns the block id of each code, None for EMPTY"""
+        return list(self._palette)
+
+    def get_code(self, block_id: Optional[str]) -> int:
+        """Returns the code of a block id, assigning the next code to a new id
+
+        Raises:
+            ValueError: If the map already holds the maximum number of ids
+        """
+        if block_id is None:
+            return EMPTY
+
+        code = self._codes.get(block_id)
+        if code is None:
+            if len(self._palette) > MAX_CODES:
+                raise ValueError(f"Unable to add {block_id!r}, a tile map holds at most {MAX_CODES} block ids")
+            code = self._codes[block_id] = len(self._palette)
+            self._palette.append(block_id)
+        return code
+
+    def contains(self, column: int, row: int) -> bool:
+        """(bool) Returns True iff the cell (column, row) is within the map"""
+        rows, columns = self._tiles.shape
+        return 0 <= column < columns and 0 <= row < rows
+
+    def get_tile(self, column: int, row: int) -> Optional[str]:
+        """(str) Returns the block id at the cell (column, row), or None if it is empty or outside the map"""
+        if not self.contains(column, row):
+            return None
+        return self._palette[self._tiles[row, column]]
+
+    def set_tile(self, column: int, row: int, block_id: Optional[str]):
+        """Set the block id at the cell (column, row), None to empty it, recording the edit
+
+        Cells outside the map are ignored.
+        """
+        if not self.contains(column, row):
+            return
+
+        code = self.get_code(block_id)
+        old = self._tiles[row, column]
+        if old != code:
+            self._tiles[row, column] = code
+            self._edits.append((column, row, self._palette[old], block_id))
+
+    def fill(self, column: int, row: int, width: int, height: int, block_id: Optional[str]):
+        """Set the block id of every cell of a rectangle, see set_tile
+
+        Parameters:
+            column (int): The left column of the rectangle
+            row (int): The top row of the rectangle
+            width (int): The number of columns in the rectangle
+            height (int): The number of rows in the rectangle
+            block_id (str): The block id to set, or None to empty the cells
+        """
+        for y in range(row, row + height):
+            for x in range(column, column + width):
+                self.set_tile(x, y, block_id)
+
+    def get_region(self, column: int, row: int, width: int, height: int) -> numpy.ndarray:
+        """Returns the codes of a rectangle of cells, clipped to the map, see get_palette
+
+        Returns:
+            (numpy.ndarray): A read only (rows, columns) view of the tile codes
+        """
+        region = self._tiles[max(row, 0):max(row + height, 0), max(column, 0):max(column + width, 0)]
+        region.flags.writeable = False
+        return region
+
+    def find(self, block_id: str) -> List[Tuple[int, int]]:
+        """(list<tuple<int, int>>) Returns the (column, row) of every cell holding a block id"""
+        code = self._codes.get(block_id)
+        if code is None:
+            return []
+        rows, columns = numpy.nonzero(self._tiles == code)
+        return list(zip(columns.tolist(), rows.tolist()))
+
+    def get_edits(self) -> List[Tuple[int, int, Optional[str], Optional[str]]]:
+        """(list<tuple<int, int, str, str>>) Returns the (column, row, old block id, new block id)
+        of every tile edit since the edits were last cleared"""
+        return self._edits
+
+    def clear_edits(self):
+        """Forget the recorded tile edits, e.g. once a world has been built"""
+        self._edits = []
+
+    def diff(self, other: "TileMap") -> List[Tuple[int, int, Optional[str], Optional[str]]]:
+        """Compare this map against another of the same size
+
+        Returns:
+            (list<tuple<int, int, str, str>>): The (column, row, block id in this map,
+                                               block id in the other map) of each differing cell
+
+        Raises:
+            ValueError: If the maps are of different sizes
+        """
+        if self.get_size() != other.get_size():
+            raise ValueError(f"Unable to diff tile maps of size {self.get_size()} and {other.get_size()}")
+
+        # translate the codes of the other map into the codes of this map
+        translation = numpy.array([self._codes.get(block_id, -1) if block_id is not None else EMPTY
+                                   for block_id in other._palette], dtype=numpy.int16)
+        rows, columns = numpy.nonzero(translation[other._tiles] != self._tiles)
+        return [(column, row, self._palette[self._tiles[row, column]], other._palette[other._tiles[row, column]])
+                for column, row in zip(columns.tolist(), rows.tolist())]
+
+    def to_dict(self) -> dict:
+        """(dict) Returns the map as JSON serializable data, see from_dict"""
+        return {
+            "size": self.get_size(),
+            "palette": self._palette[1:],
+            "tiles": base64.b64encode(self._tiles.tobytes()).decode("ascii")
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TileMap":
+        """Construct a map from the data returned by to_dict"""
+        tile_map = cls(data["size"], data["palette"])
+        columns, rows = data["size"]
+        tiles = numpy.frombuffer(base64.b64decode(data["tiles"]), dtype=numpy.uint8)
+        tile_map._tiles = tiles.reshape((rows, columns)).copy()
+        return tile_map
+
+    def save(self, filename: str):
+        """Write the map to a JSON file"""
+        with open(filename, 'w') as file:
+            json.dump(self.to_dict(), file)
+
+    @classmethod
+    def load(cls, filename: str) -> "TileMap":
+        """Read a map written by save"""
+        with open(filename) as file:
+            return cls.from_dict(json.load(file))
@@ -0,0 +1,77 @@
+"""
+Recording of timed spans to the Chrome trace event format, which can be
+loaded in Perfetto (https://ui.perfetto.dev) or chrome://tracing
+"""
+
+import json
+import os
+from collections import deque
+
+
+class TraceRecorder:
+    """Records every span of the game loop as a complete trace event.
+
+    Used as an instrument of the world (see World.add_instrument). Spans are
+    buffered in memory as they are recorded, and only converted & written to
+    a file when the recording is saved. Recording is bounded by a ring buffer
+    of the most recent events and, optionally, a number of frames.
+    """
+
+    def __init__(self, filename: str, max_frames: int = None, max_events: int = 1000000):
+        """Construct a new trace recorder
+
+        Parameters:
+            filename (str): The file to save the trace to
+            max_frames (int): The number of frames to record before the
+                              recording is complete, or None to record until saved
+            max_events (int): The maximum number of most recent events to keep
+        """
+        self._filename = filename
+        self._max_frames = max_frames
+        self._events = deque(maxlen=max_events)
+        self._frames = 0
+        self._complete = False
+
+    def record(self, category: str, name: str, start: float, end: float):
+        """Record a timed span, see World.record"""
+        if self._complete:
+            return
+
+        self._events.append((category, name, start, end))
+
+        if category == "frame":
+            self._frames += 1
+            if self._max_frames is not None and self._frames >= self._max_frames:
+                self._complete = True
+
+    def is_complete(self) -> bool:
+        """(bool) Returns True iff the configured number of frames has been recorded"""
+        return self._complete
+
+    def get_filename(self) -> str:
+        """(str) Returns the file the trace is saved to"""
+        return self._filename
+
+    def get_events(self):
+        """(list<dict>) Returns the recorded spans as Chrome trace events
+
+        Times are relative to the earliest start of a span. Spans are recorded
+        when they end, so the first span recorded is usually nested in another.
+        """
+        pid = os.getpid()
+        origin = min((start for _, _, start, _ in self._events), default=0.)
+        return [{
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start - origin) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": pid,
+            "tid": 1
+        } for category, name, start, end in self._events]
+
+    def save(self):
+        """Stop recording and write the trace to its file"""
+        self._complete = True
+        with open(self._filename, 'w') as file:
+            json.dump({"traceEvents": self.get_events(), "displayTimeUnit": "ms"}, file)
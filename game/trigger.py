@@ -0,0 +1,112 @@
+"""
+Trigger zones, sensor areas of a world which report things entering, staying in and exiting them
+"""
+
+from typing import Callable, Dict, Optional, Tuple
+
+from game.entity import Entity
+
+# The events of a trigger zone, dispatched after each step of the world
+ENTER = "enter"
+STAY = "stay"
+EXIT = "exit"
+EVENTS = (ENTER, STAY, EXIT)
+
+
+class TriggerZone(Entity):
+    """An area of a world which takes no part in the physics simulation, but
+    reports the things which enter it, stay in it and exit it.
+
+    A zone covers a rectangle of grid cells, bottom aligned to the cell it is
+    placed in, see World.add_trigger. Subclasses distinguish the kinds of zone,
+    e.g. goals or checkpoints, which handlers are registered for in a TriggerTable.
+    """
+
+    __slots__ = ()
+
+    _id = None
+    _type = 6
+    _cell_size = (1, 1)
+
+    def get_id(self) -> str:
+        """(str) Returns the unique id of this kind of zone"""
+        return self._id
+
+    def get_cell_size(self) -> Tuple[float, float]:
+        """(tuple<float, float>) Returns the (width, height) of the zone, in grid cells"""
+        return self._cell_size
+
+    def get_position(self) -> Tuple[float, float]:
+        """(tuple<float, float>) Returns the position of the centre of this zone"""
+        x, y = self.get_shape().bb.center()
+        return x, y
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.get_id()!r})"
+
+
+class TriggerTable:
+    """A table of the callbacks of each event of trigger zones, by the type of
+    zone and the type of thing which triggered it.
+
+    Each callback takes the zone and the thing, e.g.
+        on_enter(zone: TriggerZone, thing: Entity)
+
+    The callbacks of the closest registered base classes of the zone and the
+    thing are used, so a handler for (TriggerZone, Entity) handles any event.
+    """
+
+    def __init__(self):
+        # mapping of (zone type, thing type) to a callback of each event
+        self._handlers: Dict[Tuple[type, type], Dict[str, Callable]] = {}
+        # the resolved handlers of each pair of concrete types
+        self._resolved: Dict[Tuple[type, type], Optional[Dict[str, Callable]]] = {}
+
+    def register(self, zone_type: type, thing_type: type = Entity, on_enter: Callable = None,
+                 on_stay: Callable = None, on_exit: Callable = None):
+        """Register the callbacks of the events of a type of zone triggered by a type of thing
+
+        Parameters:
+            zone_type (type): The subclass of TriggerZone to handle
+            thing_type (type): The subclass of Entity which triggers the zone
+            on_enter (Callable<TriggerZone, Entity>): Called on the step a thing enters the zone
+            on_stay (Callable<TriggerZone, Entity>): Called on every step a thing is in the zone
+            on_exit (Callable<TriggerZone, Entity>): Called on the step a thing exits the zone
+        """
+        callbacks = {ENTER: on_enter, STAY: on_stay, EXIT: on_exit}
+        self._handlers[zone_type, thing_type] = {event: callback for event, callback in callbacks.items()
+                                                 if callback is not None}
+        self._resolved.clear()
+
+    def unregister(self, zone_type: type, thing_type: type = Entity):
+        """Remove the callbacks of a type of zone triggered by a type of thing"""
+        self._handlers.pop((zone_type, thing_type), None)
+        self._resolved.clear()
+
+    def _resolve(self, zone_type: type, thing_type: type) -> Optional[Dict[str, Callable]]:
+        """Returns the callbacks of the closest registered base classes of a zone and a thing"""
+        key = (zone_type, thing_type)
+        if key not in self._resolved:
+            self._resolved[key] = next((self._handlers[zone_base, thing_base]
+                                        for zone_base in zone_type.__mro__
+                                        for thing_base in thing_type.__mro__
+                                        if (zone_base, thing_base) in self._handlers), None)
+        return self._resolved[key]
+
+    def has_stay(self) -> bool:
+        """(bool) Returns True iff any callback is registered for the stay event"""
+        return any(STAY in callbacks for callbacks in self._handlers.values())
+
+    def dispatch(self, event: str, zone: TriggerZone, thing: Entity):
+        """Call the callback of an event of a zone triggered by a thing, if there is one
+
+        Parameters:
+            event (str): The event, one of EVENTS
+            zone (TriggerZone): The zone which was triggered
+            thing (Entity): The thing which triggered the zone
+        """
+        callbacks = self._resolve(type(zone), type(thing))
+        if callbacks is not None:
+            callback = callbacks.get(event)
+            if callback is not None:
+                callback(zone, thing)
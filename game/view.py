@@ -6,12 +6,16 @@ import tkinter as tk
 from typing import Iterable, Tuple, List
 from functools import singledispatch, update_wrapper
 
+import numpy
 import pymunk
 
 from game.entity import Entity
 from game.block import Block
 from game.item import DroppedItem
 from game.mob import Mob
+from game.particles import ParticleSystem
+from game.projectile import Projectile
+from game.trigger import TriggerZone
 
 
 # Warning: You do not need to understand how this function works
@@ -52,7 +56,7 @@ class ViewRenderer:
     Where Type would be the class of the entity you wish to render.
     """
 
-    def __init__(self, block_images, item_images, mob_images):
+    def __init__(self, block_images, item_images, mob_images, trigger_images=None, projectile_images=None):
         """
         Construct a new ViewRouter with appropriate entity id to image file mappings.
 
@@ -60,6 +64,9 @@ class ViewRenderer:
              block_images (dict<str: str>): A mapping of block ids to their respective images
              item_images (dict<str: str>): A mapping of item ids to their respective images
              mob_images (dict<str: str>): A mapping of mob ids to their respective images
+             trigger_images (dict<str: str>): A mapping of trigger zone ids to their respective images,
+                                              zones without an image are not drawn
+             projectile_images (dict<str: str>): A mapping of projectile ids to their respective images
         """
         super().__init__()
 
@@ -68,6 +75,8 @@ class ViewRenderer:
         self._block_images = block_images
         self._item_images = item_images
         self._mob_images = mob_images
+        self._trigger_images = trigger_images or {}
+        self._projectile_images = projectile_images or {}
 
     def load_image(self, file: str) -> tk.PhotoImage:
         """Load an image in the file location of images/{file}.png or images/{file}.gif
@@ -126,6 +135,94 @@ class ViewRenderer:
         return [view.create_image(shape.bb.center().x + offset[0], shape.bb.center().y,
                                   image=image, tags="mob")]
 
+    @draw.register(TriggerZone)
+    def _draw_trigger(self, instance: TriggerZone, shape: pymunk.Shape,
+                      view: tk.Canvas, offset: Tuple[int, int]) -> List[int]:
+        image = self._trigger_images.get(instance.get_id())
+        if image is None:
+            return []
+        return [view.create_image(shape.bb.center().x + offset[0], shape.bb.center().y,
+                                  image=self.load_image(image), tags="trigger")]
+
+    @draw.register(Projectile)
+    def _draw_projectile(self, instance: Projectile, shape: pymunk.Shape,
+                         view: tk.Canvas, offset: Tuple[int, int]) -> List[int]:
+        # projectiles have no shape, they are drawn at their position
+        x, y = instance.get_position()
+        image = self.load_image(self._projectile_images[instance.get_id()])
+        return [view.create_image(x + offset[0], y, image=image, tags="projectile")]
+
+
+class ParticleLayer:
+    """Draws the particles of a particle system through a pool of canvas rectangles.
+
+    The rectangles are created once and kept between frames, tagged "particle",
+    then moved, recoloured and hidden as the particles change. At most pool_size
+    particles within the view are drawn.
+    """
+
+    def __init__(self, canvas: tk.Canvas, size: Tuple[int, int], particle_size: float = 2,
+                 pool_size: int = 1024):
+        """Construct a new particle layer
+
+        Parameters:
+            canvas (tk.Canvas): The canvas to draw on
+            size (tuple<int, int>): The (width, height) of the view, in pixels
+            particle_size (float): The width & height of each particle, in pixels
+            pool_size (int): The most canvas items to draw particles with
+        """
+        self._canvas = canvas
+        self._size = size
+        self._radius = particle_size / 2
+        self._pool_size = pool_size
+
+        self._items: List[int] = []
+        self._colours: List[str] = []
+        self._shown = 0
+
+    def get_pool(self) -> List[int]:
+        """(list<int>) Returns the ids of the canvas items of the pool"""
+        return list(self._items)
+
+    def draw(self, particles: ParticleSystem, offset: Tuple[int, int]):
+        """Draw the live particles within the view, hiding the unused items of the pool
+
+        Parameters:
+            particles (ParticleSystem): The particles to draw
+            offset (tuple<int, int>): The offset of the logical view from the canvas
+        """
+        positions, colours = particles.get_particles()
+        radius = self._radius
+        width, height = self._size
+
+        xs = positions[:, 0] + offset[0]
+        ys = positions[:, 1]
+        visible = numpy.flatnonzero((xs >= -radius) & (xs < width + radius)
+                                    & (ys >= -radius) & (ys < height + radius))[:self._pool_size]
+        count = len(visible)
+
+        canvas = self._canvas
+        while len(self._items) < count:
+            self._items.append(canvas.create_rectangle(0, 0, 0, 0, width=0, state=tk.HIDDEN, tags="particle"))
+            self._colours.append(None)
+
+        palette = particles.get_palette()
+        for index, x, y, colour in zip(range(count), xs[visible].tolist(), ys[visible].tolist(),
+                                       colours[visible].tolist()):
+            item = self._items[index]
+            canvas.coords(item, x - radius, y - radius, x + radius, y + radius)
+            colour = palette[colour]
+            if index >= self._shown or self._colours[index] != colour:
+                canvas.itemconfigure(item, fill=colour, state=tk.NORMAL)
+                self._colours[index] = colour
+
+        for item in self._items[count:self._shown]:
+            canvas.itemconfigure(item, state=tk.HIDDEN)
+        self._shown = count
+
+        if count:
+            canvas.tag_raise("particle")
+
 
 class GameView(tk.Canvas):
     """A view class for the sandbox game, with convenience methods to draw various parts of the UI"""
@@ -146,6 +243,7 @@ class GameView(tk.Canvas):
 
         self._world_view_router = physical_view_router
         self._offset = (0, 0)
+        self._particles = ParticleLayer(self, size)
 
     def shift(self, offset: Tuple[int, int]):
         """Shift the view offset by the given offset.
@@ -164,6 +262,15 @@ class GameView(tk.Canvas):
         """(tuple<int, int>): Return the X and Y pixel offsets of the view."""
         return self._offset
 
+    def get_visible_area(self) -> Tuple[float, float, float, float]:
+        """(tuple<float, float, float, float>) Returns the (left, top, right, bottom) area of the
+        world drawn on the canvas, from the offset and the size of the canvas on screen"""
+        # the canvas has no size on screen until it is first drawn
+        width = self.winfo_width() if self.winfo_ismapped() else int(self.cget("width"))
+        height = self.winfo_height() if self.winfo_ismapped() else int(self.cget("height"))
+        left, top = -self._offset[0], -self._offset[1]
+        return left, top, left + width, top + height
+
     def draw_entities(self, things: Iterable[Entity]):
         """Draws all entities, according to their draw method (on the view renderer)
 
@@ -174,3 +281,22 @@ class GameView(tk.Canvas):
             shape = thing.get_shape()
 
             self._world_view_router.draw(thing, shape, self, self._offset)
+
+    def draw_particles(self, particles: ParticleSystem):
+        """Draws the particles of a particle system, reusing the canvas items tagged "particle"
+
+        The view should be cleared by deleting "!particle" rather than tk.ALL, to keep the items.
+
+        Parameters:
+            particles (ParticleSystem): The particles to draw.
+        """
+        self._particles.draw(particles, self._offset)
+
+    def draw_overlay(self, lines: Iterable[str]):
+        """Draws lines of text in the top left corner of the view, regardless of its offset
+
+        Parameters:
+            lines (iterable<str>): The lines of text to draw.
+        """
+        self.create_text(5, 5, text="\n".join(lines), anchor=tk.NW, fill="white",
+                         font=("Courier", 9), tags="overlay")
@@ -2,15 +2,28 @@
 A class to represent a world made up of physical things
 """
 
+import math
 import pymunk
+import random
 import time
-from typing import Tuple, Iterable
+from typing import Tuple, Iterable, Dict, Hashable, List, Optional
 
-from game.entity import BoundaryWall, Entity
+import numpy
+
+from game.ecs import Components, System, get_default_systems
+from game.entity import BoundaryWall, DynamicEntity, Entity
 from player import Player
 from game.item import DroppedItem
-from game.block import Block
+from game.block import Block, TerrainBlock, TerrainCell
+from game.lifetime import COUNTERS, EXPIRED, OUT_OF_BOUNDS, OVER_BUDGET, SPAWNED, LifetimePolicy
+from game.lod import BUCKETS, FAR, MID, LevelOfDetail
 from game.mob import Mob
+from game.navigation import NavigationGraph
+from game.particles import ParticleSystem
+from game.projectile import HitTable, Projectile, ProjectileSystem
+from game.rng import RandomStreams
+from game.tilemap import TileMap
+from game.trigger import ENTER, EXIT, STAY, TriggerTable, TriggerZone
 
 # The intention with the following constants is to express a finite range of values that
 # can effectively be treated as their own type in this code. We have used collections of
@@ -25,7 +38,8 @@ COLLISION_TYPES = {
     "block": 2,
     "player": 3,
     "item": 4,
-    "mob": 5
+    "mob": 5,
+    "trigger": 6
 }
 
 # Unique ids for each category of physical thing
@@ -36,7 +50,8 @@ PHYSICAL_THING_CATEGORIES = {
     "block": 2 ** 2,
     "player": 2 ** 3,
     "item": 2 ** 4,
-    "mob": 2 ** 5
+    "mob": 2 ** 5,
+    "trigger": 2 ** 6
 }
 
 # Names for each collision event recognised by pymunk (can have a callback attached)
@@ -45,6 +60,13 @@ COLLISION_HANDLER_CALLBACKS = {'begin', 'separate', 'pre_solve', 'post_solve'}
 # The size of a time delta between steps
 STEP_SIZE = 0.02
 
+# The time a body must be idle before pymunk puts it to sleep by itself, effectively never.
+# Sleeping must be enabled for far mobs to be put to sleep, see World.set_level_of_detail
+SLEEP_TIME_THRESHOLD = 1e9
+
+# The default time, in seconds, a body must be idle before it falls asleep, see World.set_sleeping
+IDLE_SLEEP_TIME = 0.5
+
 
 class World:
     """Game world that contains things in physical space.
@@ -64,7 +86,7 @@ class World:
     """
 
     def __init__(self, grid_size, cell_expanse, gravity=(0, 300), boundary_thickness=50,
-                 collision_types=None, thing_categories=None):
+                 collision_types=None, thing_categories=None, clock=time.time, seed=None):
         """Creates a new world with four boundary walls
 
         Parameters:
@@ -78,6 +100,10 @@ class World:
             thing_categories (dict<str: int>):
                     Mapping of thing categories to unique powers of 2
                     Defaults to PHYSZICAL_THING_CATEGORIES constant
+            clock (Callable<> -> float): Returns the current time, in seconds
+                    Defaults to time.time, a simulated clock makes the world deterministic
+            seed (int): The seed of the world's random streams, see get_random
+                    Defaults to a random seed
 
         """
         if collision_types is None:
@@ -99,11 +125,67 @@ class World:
 
         self._create_boundaries(boundary_thickness)
 
-        self._last_time = time.time()
-        #
-
-
-
+        # the block id of every grid cell, recording each change to the terrain
+        self._tiles = TileMap(grid_size)
+        # the flyweight of each id of terrain, whose shapes are derived from the tiles,
+        # and whether each (row, column) cell is covered by the shape of a block
+        self._terrain: Dict[str, TerrainBlock] = {}
+        self._block_cells = numpy.zeros((grid_size[1], grid_size[0]), dtype=bool)
+        # the walkable cells of the terrain, see build_navigation
+        self._navigation = None
+
+        self._clock = clock
+        self._last_time = clock()
+        # additions & removals made while stepping, see _step_space
+        self._deferred = None
+
+        self._random = RandomStreams(seed)
+
+        # the level of detail of mobs by distance from the viewport, see set_level_of_detail
+        self._lod = None
+        self._viewport = None
+        self._lod_counts = dict.fromkeys(BUCKETS, 0)
+        self._steps = 0
+        # the time bodies must be idle to fall asleep, see set_sleeping
+        self._sleep_time = None
+
+        # the things spawned during play, see set_lifetime_policy
+        self._lifetime = None
+        # mapping of the shape of each live spawned thing to its (spawner, id, spawn time)
+        self._spawns = {}
+        # mapping of (spawner, id) to the number of live things spawned
+        self._spawn_counts = {}
+        self._lifetime_counts = dict.fromkeys(COUNTERS, 0)
+
+        # the things in each trigger zone, mapping (zone shape, thing shape) to None in the order they entered
+        self._triggers = TriggerTable()
+        self._occupants = {}
+        self._trigger_events = []
+        handler = self._space.add_wildcard_collision_handler(self._collision_types["trigger"])
+        handler.begin = self._begin_trigger
+        handler.separate = self._separate_trigger
+
+        # visual effects, simulated outside of the space
+        self._particles = ParticleSystem(gravity=gravity)
+
+        # projectiles, simulated outside of the space, see add_projectile
+        self._projectiles = ProjectileSystem()
+        self._hits = HitTable()
+        # the query mask of each collection of categories, and the shape filter of each mask
+        self._category_masks = {}
+        self._query_filters = {}
+
+        # the things with behaviour adapted to entities, mapping each of their shapes to
+        # its entity, and the systems run over the entities each step, see get_components
+        self._components = Components()
+        self._entities = {}
+        self._systems = get_default_systems()
+
+        # instruments which record the time spent in each part of a step
+        self._instruments = []
+        self._collision_accounting = None
+        # the time spent in collision callbacks during the current space step
+        self._collision_time = 0.
 
     def get_space(self) -> pymunk.Space:
         """(pymunk.Space): Return the space used by the world."""
@@ -134,6 +216,48 @@ class World:
             gravity_y (float): The y component of the gravity
         """
         self._space.gravity = (gravity_x, gravity_y)
+        self._particles.set_gravity((gravity_x, gravity_y))
+
+    def get_time(self) -> float:
+        """(float) Returns the current time of the world's clock, in seconds"""
+        return self._clock()
+
+    def get_seed(self) -> int:
+        """(int) Returns the seed of the world's random streams"""
+        return self._random.get_seed()
+
+    def get_random(self, key: Hashable) -> random.Random:
+        """Returns the random stream identified by a stable key, such as an entity's
+        id & spawn position. Streams are independent of each other and derived
+        from the seed of the world.
+
+        Parameters:
+            key (Hashable): The key of the stream, built from strings & numbers
+
+        Returns:
+            (random.Random): The random number generator of the stream
+        """
+        return self._random.get(key)
+
+    def get_generator(self, key: Hashable) -> numpy.random.Generator:
+        """Returns the vectorised random generator identified by a stable key,
+        for drawing many values at once, see get_random
+
+        Returns:
+            (numpy.random.Generator): The random number generator
+        """
+        return self._random.get_generator(key)
+
+    def get_particles(self) -> ParticleSystem:
+        """(ParticleSystem) Returns the particles of the visual effects of the world"""
+        return self._particles
+
+    def emit_particles(self, x: float, y: float, count: int, **kwargs) -> int:
+        """Emit a burst of particles from the point ('x', 'y'), scattered by the world's particle stream
+
+        See ParticleSystem.emit for parameters.
+        """
+        return self._particles.emit(x, y, count, self.get_generator("particles"), **kwargs)
 
     def get_pixel_size(self):
         """Returns the (width, height) size of the world"""
@@ -143,6 +267,88 @@ class World:
         """Returns the (column, row) size of the world grid"""
         return self._grid_size
 
+    def get_tile_map(self) -> TileMap:
+        """(TileMap) Returns the block id of every grid cell of the world"""
+        return self._tiles
+
+    def get_tile(self, column: int, row: int) -> str:
+        """(str) Returns the id of the block in the grid cell ('column', 'row'), or None if it is empty"""
+        return self._tiles.get_tile(column, row)
+
+    def build_navigation(self, *args, **kwargs) -> NavigationGraph:
+        """Precompute the navigation graph of the terrain, kept up to date as blocks are added and removed
+
+        See NavigationGraph for parameters.
+        """
+        self._navigation = NavigationGraph(self._tiles, *args, **kwargs)
+        return self._navigation
+
+    def get_navigation(self) -> NavigationGraph:
+        """(NavigationGraph) Returns the navigation graph of the terrain, or None if it has not been built"""
+        return self._navigation
+
+    def find_path(self, start: Tuple[float, float], goal: Tuple[float, float]) -> Optional[List[Tuple[int, int]]]:
+        """Find a path over the terrain between two positions, see NavigationGraph.find_path
+
+        Each position is resolved to the walkable cell that a mob there would come to stand in.
+
+        Parameters:
+            start (tuple<float, float>): The (x, y) position to start from
+            goal (tuple<float, float>): The (x, y) position to reach
+
+        Returns:
+            (list<tuple<int, int>>): The (x, y) centre of each cell of the path, or None if
+                                     there is no path or the navigation graph has not been built
+        """
+        if self._navigation is None:
+            return None
+
+        start, goal = (self._navigation.get_node(*self.xy_to_grid(*position)) for position in (start, goal))
+        if start is None or goal is None:
+            return None
+
+        path = self._navigation.find_path(start, goal)
+        if path is None:
+            return None
+        return [self.grid_to_xy_centre(*cell) for cell in path]
+
+    def set_tile(self, column: int, row: int, block_id: Optional[str], friction: float = 1.):
+        """Set the block id of a grid cell, replacing any block in it
+
+        The tile map is the terrain of the world: the shape of a block of terrain
+        is derived from its tile, and removed along with it.
+
+        Parameters:
+            column (int): The column of the cell
+            row (int): The row of the cell
+            block_id (str): The id of the terrain to fill the cell with, or None to empty it
+            friction (float): The friction on the surface of the terrain
+
+        Raises:
+            ValueError: If the block id is not of terrain placed in this world
+        """
+        if block_id is not None and block_id not in self._terrain:
+            raise ValueError(f"Unable to set the tile of ({column}, {row}) to {block_id!r}, "
+                             f"which is not one of the terrain of the world {tuple(self._terrain)}")
+        if not self._tiles.contains(column, row):
+            return
+
+        if self._block_cells[row, column]:
+            block = self.get_block(*self.grid_to_xy_centre(column, row))
+            if block is not None:
+                self.remove_thing(block)
+        self._update_tiles(column, row, 1, 1, block_id)
+        if block_id is not None:
+            self._add_to_space(self._create_block_shape(self._terrain[block_id], column, row, 1, 1, friction))
+
+    def _update_tiles(self, column: int, row: int, width: int, height: int, block_id: Optional[str]):
+        """Set the block id of a rectangle of cells of the tile map, updating the navigation graph"""
+        self._tiles.fill(column, row, width, height, block_id)
+        if block_id is None:
+            self._block_cells[max(row, 0):max(row + height, 0), max(column, 0):max(column + width, 0)] = False
+        if self._navigation is not None:
+            self._navigation.invalidate(column, row, width, height)
+
     def get_cell_expanse(self) -> int:
         """Returns the expanse (width/height) of each grid cell"""
         return self._cell_expanse
@@ -159,17 +365,381 @@ class World:
         Parameters:
             game_data (tuple<World, Player>): Arbitrary data to be passed on to all things
         """
-        now = time.time()
+        now = self._clock()
         time_delta = now - self._last_time
-        for shape in self._space.shapes:
-            thing = shape.object
 
-            if thing:
-                thing.step(time_delta, game_data)
+        if self._instruments:
+            self._step_instrumented(time_delta, game_data)
+        else:
+            self._step_things(time_delta, game_data)
+            self._step_space()
+            self._step_projectiles()
+            self._despawn()
+            self._particles.update(STEP_SIZE)
 
-        self._space.step(STEP_SIZE)
         self._last_time = now
 
+    def _step_space(self):
+        """Resolves physics, then applies the additions & removals of physical objects
+        made by collision callbacks during it, in the order they were made.
+
+        pymunk defers these in a set, whose arbitrary order would make the
+        resulting simulation differ between runs.
+        """
+        self._deferred = {}
+        try:
+            self._space.step(STEP_SIZE)
+        finally:
+            deferred, self._deferred = self._deferred, None
+
+        for add, objects in deferred:
+            if add:
+                self._space.add(*objects)
+            else:
+                self._space.remove(*objects)
+
+        self._dispatch_triggers()
+
+    def _add_to_space(self, *objects):
+        """Adds physical objects to the space, after the current step if stepping"""
+        if self._deferred is not None:
+            self._deferred[(True, objects)] = None
+        else:
+            self._space.add(*objects)
+
+    def _remove_from_space(self, *objects):
+        """Removes physical objects from the space, after the current step if stepping"""
+        if self._deferred is not None:
+            self._deferred[(False, objects)] = None
+        else:
+            self._space.remove(*objects)
+
+    def _step_things(self, time_delta, game_data):
+        """Runs every system of the world over its entities, see get_components"""
+        self._steps += 1
+        idle = self._get_idle_entities()
+        for system in self._systems:
+            system.update(self, time_delta, game_data, idle)
+
+    def _get_idle_entities(self) -> Dict[int, int]:
+        """Returns the entities which are not stepped at the normal rate this step,
+        mapped to the multiple of the time delta they are stepped by, zero for not at all
+
+        The items and mobs of sleeping bodies are not stepped, nor are mobs
+        beyond the level of detail of the viewport, see set_level_of_detail.
+        """
+        idle = {}
+        sleeping = self._get_sleeping_bodies()
+        if sleeping:
+            # far fewer things are entities than there are sleeping bodies, e.g. resting coins
+            for shape, entity in self._entities.items():
+                if shape.body in sleeping and isinstance(shape.object, (DroppedItem, Mob)):
+                    idle[entity] = 0
+
+        if self._lod is not None and self._viewport is not None:
+            self._update_detail(idle)
+        return idle
+
+    def _get_sleeping_bodies(self) -> set:
+        """Returns the bodies which have fallen asleep by being idle, whose things are not stepped
+
+        Bodies without mass cannot safely sleep in pymunk, so are woken instead.
+        """
+        if self._sleep_time is None:
+            return set()
+
+        sleeping = set()
+        for body in self._space.bodies:
+            if body.is_sleeping:
+                if body.mass == 0:
+                    body.activate()
+                else:
+                    sleeping.add(body)
+        return sleeping
+
+    def _update_detail(self, idle: Dict[int, int]):
+        """Buckets every mob by the level of detail of its distance from the viewport,
+        adding the mobs which are not stepped at the normal rate to the idle entities
+
+        Mid range mobs are stepped once per interval, staggered by their entity,
+        and the bucket of each mob is only reconsidered on the step it would be
+        stepped if it were mid range.
+
+        Parameters:
+            idle (dict<int: int>): The idle entities, see _get_idle_entities
+        """
+        interval = self._lod.get_interval()
+        counts = dict.fromkeys(BUCKETS, 0)
+
+        store = self._components.get_store("detail")
+        buckets = store.get_column("bucket")
+        rows = zip(store.get_entities().tolist(), store.get_column("shape").tolist(), buckets.tolist())
+        for row, (entity, shape, bucket) in enumerate(rows):
+            due = (self._steps + entity) % interval == 0
+            if bucket is None or due:
+                bucket = buckets[row] = self._update_bucket(shape, bucket)
+            counts[bucket] += 1
+
+            if entity in idle:
+                continue
+            if bucket == MID:
+                idle[entity] = interval if due else 0
+            elif bucket == FAR:
+                idle[entity] = 0
+                # bodies without mass cannot safely sleep in pymunk, so are only held still
+                if shape.body.mass == 0:
+                    shape.body.velocity = (0, 0)
+
+        self._lod_counts = counts
+
+    def _update_bucket(self, shape: pymunk.Shape, bucket: str) -> str:
+        """Moves the shape of a mob into the bucket of its distance from the viewport,
+        putting its body to sleep when far and waking it otherwise
+
+        Parameters:
+            shape (pymunk.Shape): The shape of the mob
+            bucket (str): The bucket the mob was in, None if it was not in one
+
+        Returns:
+            (str): The bucket the mob is now in
+        """
+        new_bucket = self._lod.get_bucket(self.get_viewport_distance(shape.bb))
+        if new_bucket == bucket:
+            return bucket
+
+        body = shape.body
+        if new_bucket == FAR:
+            if body.mass != 0 and not body.is_sleeping:
+                body.sleep()
+        elif body.is_sleeping:
+            body.activate()
+        return new_bucket
+
+    def set_level_of_detail(self, lod: LevelOfDetail = None):
+        """Set the level of detail of mobs by distance from the viewport, or None to step every mob
+
+        Far mobs are put to sleep, which enables sleeping on the world's space.
+        """
+        self._lod = lod
+        self._lod_counts = dict.fromkeys(BUCKETS, 0)
+        self._components.get_store("detail").get_column("bucket")[:] = None
+        self._update_sleeping()
+
+    def set_sleeping(self, sleep_time: float = IDLE_SLEEP_TIME, idle_speed: float = 0):
+        """Let the bodies of items and mobs fall asleep once they come to rest, or disable it
+
+        Sleeping bodies are neither simulated nor stepped until they are woken, which
+        pymunk does when they are hit, their velocity is set or a block they touch is removed.
+
+        Parameters:
+            sleep_time (float): The seconds a body must be idle to fall asleep, None to never sleep
+            idle_speed (float): The speed below which a body is idle, 0 to let pymunk estimate it from gravity
+        """
+        self._sleep_time = sleep_time
+        self._space.idle_speed_threshold = idle_speed
+        self._update_sleeping()
+
+    def get_sleeping(self) -> Tuple[float, float]:
+        """(tuple<float, float>) Returns the sleep time, None if bodies never fall asleep, and idle speed"""
+        return self._sleep_time, self._space.idle_speed_threshold
+
+    def _update_sleeping(self):
+        """Enables sleeping on the space when either idle bodies or far mobs are put to sleep, disabling it otherwise"""
+        if self._sleep_time is not None:
+            self._space.sleep_time_threshold = self._sleep_time
+            return
+
+        # wake every body, far mobs are put back to sleep as they are bucketed again
+        for body in self._space.bodies:
+            if body.is_sleeping:
+                body.activate()
+        self._components.get_store("detail").get_column("bucket")[:] = None
+        if self._lod is not None:
+            self._space.sleep_time_threshold = SLEEP_TIME_THRESHOLD
+        else:
+            self._space.sleep_time_threshold = float('inf')
+
+    def get_level_of_detail(self) -> LevelOfDetail:
+        """(LevelOfDetail) Returns the level of detail of mobs, or None if every mob is stepped"""
+        return self._lod
+
+    def get_lod_counts(self) -> Dict[str, int]:
+        """(dict<str: int>) Returns the number of mobs in each level of detail bucket at the last step"""
+        return dict(self._lod_counts)
+
+    def set_viewport(self, left: float, top: float, right: float, bottom: float):
+        """Set the area of the world which is visible, in pixels"""
+        self._viewport = (left, top, right, bottom)
+
+    def get_viewport(self) -> Tuple[float, float, float, float]:
+        """(tuple<float, float, float, float>) Returns the (left, top, right, bottom) visible area,
+        or None if it has not been set"""
+        return self._viewport
+
+    def get_viewport_distance(self, bb: pymunk.BB) -> float:
+        """(float) Returns the distance from the viewport to a bounding box, 0 if they overlap"""
+        left, top, right, bottom = self._viewport
+        # the y axis points down, so the bottom of the bounding box is its top edge
+        dx = max(left - bb.right, bb.left - right, 0)
+        dy = max(top - bb.top, bb.bottom - bottom, 0)
+        return math.hypot(dx, dy)
+
+    def set_lifetime_policy(self, policy: LifetimePolicy = None):
+        """Set the lifetimes, despawn bounds and spawn budgets of things, or None to keep every thing"""
+        self._lifetime = policy
+
+    def get_lifetime_policy(self) -> LifetimePolicy:
+        """(LifetimePolicy) Returns the lifetime policy of things, or None if every thing is kept"""
+        return self._lifetime
+
+    def get_lifetime_counts(self) -> Dict[str, int]:
+        """(dict<str: int>) Returns the number of things spawned, refused by a spawn budget,
+        expired and despawned out of bounds, see game.lifetime.COUNTERS"""
+        return dict(self._lifetime_counts)
+
+    def get_spawn_count(self, spawner: Entity, thing_id: str) -> int:
+        """(int) Returns the number of live things of an id spawned by a spawner"""
+        return self._spawn_counts.get((spawner, thing_id), 0)
+
+    def can_spawn(self, spawner: Entity, thing_id: str) -> bool:
+        """Check whether a spawner is within its budget of live things of an id, counting refusals
+
+        Parameters:
+            spawner (Entity): The thing which would spawn, e.g. a cloud
+            thing_id (str): The id of the thing it would spawn, e.g. "fireball"
+
+        Returns:
+            (bool): True iff the spawner may spawn another thing of the id
+        """
+        budget = None if self._lifetime is None else self._lifetime.get_budget(thing_id)
+        if budget is None or self.get_spawn_count(spawner, thing_id) < budget:
+            return True
+        self._lifetime_counts[OVER_BUDGET] += 1
+        return False
+
+    def _add_spawn(self, spawned, thing_id: str, spawner: Entity):
+        """Records the spawning of a thing by a spawner
+
+        Parameters:
+            spawned (pymunk.Shape | Projectile): The shape of the thing, or the projectile
+            thing_id (str): The id of the thing
+            spawner (Entity): The thing which spawned it
+        """
+        key = (spawner, thing_id)
+        self._spawns[spawned] = (*key, self.get_time())
+        self._spawn_counts[key] = self._spawn_counts.get(key, 0) + 1
+        self._lifetime_counts[SPAWNED] += 1
+
+    def _remove_spawn(self, spawned):
+        """Forgets the spawning of the thing of a shape, or of a projectile, if it was spawned"""
+        spawn = self._spawns.pop(spawned, None)
+        if spawn is None:
+            return
+
+        key = spawn[:2]
+        self._spawn_counts[key] -= 1
+        if not self._spawn_counts[key]:
+            del self._spawn_counts[key]
+
+    def _despawn(self):
+        """Removes the spawned things which have outlived their time to live,
+        and the items and mobs which have left the bounds of the world"""
+        if self._lifetime is None:
+            return
+
+        now = self.get_time()
+        expired = []
+        for spawned, (_, thing_id, spawn_time) in self._spawns.items():
+            ttl = self._lifetime.get_ttl(thing_id)
+            if ttl is not None and now - spawn_time >= ttl:
+                expired.append(spawned)
+        for spawned in expired:
+            self._lifetime_counts[EXPIRED] += 1
+            if isinstance(spawned, Projectile):
+                self.remove_projectile(spawned)
+            else:
+                self.remove_thing(spawned.object)
+
+        left, top, right, bottom = self._lifetime.get_bounds(*self._pixel_size)
+        positions = self._projectiles.get_positions()
+        outside = ((positions[:, 0] < left) | (positions[:, 0] > right)
+                   | (positions[:, 1] < top) | (positions[:, 1] > bottom))
+        for index in numpy.flatnonzero(outside):
+            projectile = self._projectiles.get_projectile(index)
+            if projectile is not None:
+                self._lifetime_counts[OUT_OF_BOUNDS] += 1
+                self.remove_projectile(projectile)
+
+        types = self._collision_types["item"], self._collision_types["mob"]
+        for body in self._space.bodies:
+            x, y = body.position
+            if left <= x <= right and top <= y <= bottom:
+                continue
+            for shape in body.shapes:
+                if shape.collision_type in types and shape.object is not None:
+                    self._lifetime_counts[OUT_OF_BOUNDS] += 1
+                    self.remove_thing(shape.object)
+
+    def _step_instrumented(self, time_delta, game_data):
+        """Steps the game world, recording the time spent stepping things and
+        resolving physics to each instrument
+
+        The physics phase excludes the time spent in collision callbacks, which
+        are recorded as the "collision" spans within the enclosing "space step" span.
+        """
+        start = time.perf_counter()
+        self._step_things(time_delta, game_data)
+        middle = time.perf_counter()
+        self._collision_time = 0.
+        self._step_space()
+        physics = time.perf_counter()
+        self._step_projectiles()
+        projectiles = time.perf_counter()
+        self._despawn()
+        despawn = time.perf_counter()
+        self._particles.update(STEP_SIZE)
+        end = time.perf_counter()
+
+        self.record("span", "world step", start, end)
+        self.record("world", "entities", start, middle)
+        # the collision callbacks are recorded as spans of their own, so are excluded from physics
+        self.record("span", "space step", middle, physics)
+        self.record("world", "physics", middle, physics - self._collision_time)
+        self.record("world", "projectiles", physics, projectiles)
+        self.record("world", "despawn", projectiles, despawn)
+        self.record("world", "particles", despawn, end)
+
+    def add_instrument(self, instrument):
+        """Adds an instrument which is informed of the time spent in each part of a step
+
+        The instrument must implement the method:
+            record(category: str, name: str, start: float, end: float)
+        where start and end are time.perf_counter values.
+
+        Parameters:
+            instrument: The instrument to add, e.g. a game.profiler.FrameProfiler
+        """
+        if instrument not in self._instruments:
+            self._instruments.append(instrument)
+
+    def remove_instrument(self, instrument):
+        """Removes an instrument previously added to the world"""
+        if instrument in self._instruments:
+            self._instruments.remove(instrument)
+
+    def record(self, category: str, name: str, start: float, end: float):
+        """Records a timed span to every instrument of the world
+
+        Parameters:
+            category (str): The category of the span, e.g. "world" or "collision".
+                            Spans of the "span" category only enclose other spans.
+            name (str): The name of the span
+            start (float): The time.perf_counter value at the start of the span
+            end (float): The time.perf_counter value at the end of the span
+        """
+        for instrument in self._instruments:
+            instrument.record(category, name, start, end)
+
     def xy_to_grid(self, x: float, y: float) -> Tuple[int, int]:
         """Converts pixel position (xy) to grid position"""
         return int(x // self._cell_expanse), int(y // self._cell_expanse)
@@ -182,15 +752,44 @@ class World:
         """Converts grid position to pixel position of its centre"""
         return int((x + .5) * self._cell_expanse), int((y + .5) * self._cell_expanse)
 
-    def _wrap_callback(self, callback):
-        """Wraps a pymunk collision callback into a more OOP form"""
+    def _wrap_callback(self, callback, key: Tuple[str, str, str]):
+        """Wraps a pymunk collision callback into a more OOP form
+
+        The time spent in the callback is recorded to the world's instruments
+        and collision accounting, under the key (collision_type_a, collision_type_b, event).
+        """
+        name = "{}/{} {}".format(*key)
 
         def wrapped_callback(arbiter, space, data):
-            thing_a, thing_b = [s.object for s in arbiter.shapes]
-            return callback(thing_a, thing_b, data['data'], arbiter)
+            thing_a, thing_b = [self._get_shape_thing(s) for s in arbiter.shapes]
+            if not self._instruments and self._collision_accounting is None:
+                return callback(thing_a, thing_b, data['data'], arbiter)
+
+            start = time.perf_counter()
+            result = callback(thing_a, thing_b, data['data'], arbiter)
+            end = time.perf_counter()
+
+            if self._instruments:
+                self._collision_time += end - start
+                self.record("collision", name, start, end)
+            if self._collision_accounting is not None:
+                self._collision_accounting.record(key, end - start, result)
+            return result
 
         return wrapped_callback
 
+    def set_collision_accounting(self, accounting):
+        """Sets the accounting of collision callback invocations, or None to stop accounting
+
+        Parameters:
+            accounting (game.profiler.CollisionAccounting): The accounting to record to
+        """
+        self._collision_accounting = accounting
+
+    def get_collision_accounting(self):
+        """(game.profiler.CollisionAccounting) Returns the accounting of collision callbacks, if any"""
+        return self._collision_accounting
+
     def add_collision_handler(self, collision_type_a, collision_type_b, data=None,
                               on_begin=None, on_separate=None, on_pre_solve=None, on_post_solve=None):
         """Adds a collision handler to the game world
@@ -208,7 +807,7 @@ class World:
         for key in COLLISION_HANDLER_CALLBACKS:
             callback = local_variables[f"on_{key}"]
             if callback:
-                setattr(handler, key, self._wrap_callback(callback))
+                setattr(handler, key, self._wrap_callback(callback, (collision_type_a, collision_type_b, key)))
 
     def get_all_things(self) -> Iterable[Entity]:
         """Yields all physical things in this world, including boundary walls
@@ -217,13 +816,68 @@ class World:
             Entity
         """
         for shape in self._space.shapes:
-            thing = shape.object
-
-            if thing:
-                yield thing
+            if shape.object:
+                yield self._get_shape_thing(shape)
+
+    @staticmethod
+    def _get_shape_thing(shape: pymunk.Shape) -> Entity:
+        """(Entity) Returns the thing of a shape, resolving terrain to a cell of the shape"""
+        thing = shape.object
+        if isinstance(thing, TerrainBlock):
+            return TerrainCell(thing, shape)
+        return thing
+
+    def get_components(self) -> Components:
+        """(Components) Returns the entities & components of the things with behaviour in this world
+
+        Each thing added to the world which has behaviour is adapted to an entity:
+            - mobs which walk at their tempo have a "tempo" component
+            - things which define their own step method have a "step" component
+            - mobs have a "detail" component, of their level of detail
+        and dynamic entities, e.g. the player, are attached to theirs, see DynamicEntity.attach.
+        """
+        return self._components
+
+    def add_system(self, system: System):
+        """Adds a system, run over the entities of the world after the existing systems each step"""
+        self._systems.append(system)
+
+    def get_systems(self) -> List[System]:
+        """(list<System>) Returns the systems of the world, in the order they are run each step"""
+        return list(self._systems)
+
+    def _attach(self, thing: Entity, shape: pymunk.Shape):
+        """Adapts a thing to a new entity, if it has behaviour"""
+        kind = type(thing)
+        walks = isinstance(thing, Mob) and kind.step is Mob.step
+        stepped = kind.step is not Entity.step and not walks
+        if not (walks or stepped or isinstance(thing, (Mob, Player))):
+            return
+
+        entity = self._components.create()
+        self._entities[shape] = entity
+        if walks:
+            self._components.add(entity, "tempo", body=shape.body, tempo=thing.get_tempo())
+        elif stepped:
+            self._components.add(entity, "step", thing=thing)
+        if isinstance(thing, Mob):
+            self._components.add(entity, "detail", shape=shape, bucket=None)
+        if isinstance(thing, DynamicEntity):
+            thing.attach(self._components, entity)
+
+    def _detach(self, shape: pymunk.Shape):
+        """Removes the entity of the thing of a shape, if it has one"""
+        entity = self._entities.pop(shape, None)
+        if entity is None:
+            return
+
+        thing = shape.object
+        if isinstance(thing, DynamicEntity) and thing.get_components() is self._components:
+            thing.detach()
+        self._components.destroy(entity)
 
     def add_thing(self, thing: Entity, x: float, y: float, size: Tuple[float, float], collision_type=None,
-                  categories=None, mass: float = 1, friction: float = 1):
+                  categories=None, mass: float = 1, friction: float = 1, spawner: Entity = None):
         """Adds a thing to the game world centred at the position ('x', 'y')
 
         Parameters:
@@ -236,6 +890,8 @@ class World:
                               value of self._physical_thing_categories
             mass (float): The mass of the thing
             friction (float): The friction of the thing
+            spawner (Entity): The thing which spawned this thing during play, if any,
+                              making it subject to the time to live of its id
         """
         width, height = size
 
@@ -258,11 +914,25 @@ class World:
         shape.friction = friction
 
         thing.set_shape(shape)
-        self._space.add(body, shape)
+        self._add_to_space(body, shape)
+        self._attach(thing, shape)
+        if spawner is not None:
+            self._add_spawn(shape, thing.get_id(), spawner)
 
     def remove_thing(self, thing: Entity):
-        """Removes a thing from the world"""
-        self._space.remove(thing.get_shape())
+        """Removes a thing from the world, along with its body unless it is static
+
+        Removing a block empties its cells of the tile map.
+        """
+        shape = thing.get_shape()
+        if isinstance(thing, Block):
+            self._update_tiles(*self._get_shape_cells(shape), None)
+        self._remove_spawn(shape)
+        self._detach(shape)
+        if shape.body.body_type == pymunk.Body.STATIC:
+            self._remove_from_space(shape)
+        else:
+            self._remove_from_space(shape.body, shape)
 
     def add_player(self, player: Player, x: float, y: float, mass: float = 100, friction: float = .5):
         """Adds a player to game world at the position ('x', 'y')"""
@@ -278,26 +948,23 @@ class World:
         shape.filter = pymunk.ShapeFilter(categories=self._thing_categories["player"])
 
         player.set_shape(shape)
+        player.set_clock(self._clock)
 
-        self._space.add(body, shape)
+        self._add_to_space(body, shape)
+        self._attach(player, shape)
 
     def remove_player(self, player: Player):
         """Removes the player from the game world"""
-        self._space.remove(player.get_shape())
+        self._detach(player.get_shape())
+        self._remove_from_space(player.get_shape())
 
-    def add_block_to_grid(self, entity, column: int, row: int,
-                         width: int, height: int, friction: float = 1.):
-        """Adds a block to the game world at the grid cell centred at ('column', 'row')
+    def _create_block_shape(self, entity, column: int, row: int,
+                            width: int, height: int, friction: float = 1.) -> pymunk.Shape:
+        """Creates the static shape of a block at the grid cell ('column', 'row'),
+        without adding it to the space, and marks the cells it covers.
 
-        Parameters:
-            item (Entity): The item to add to the grid
-            column (int): The column of the grid cell at which to place the block
-            row (int): The row of the grid cell at which to place the block
-            width (int): The width in cells of this entity
-            height (int): The height in cells of this entity
-            friction (float): The friction on the surface of the block
+        The block should already be placed in the tile map, see add_block_to_grid for parameters.
         """
-
         left = column * self._cell_expanse
         right = (column + width) * self._cell_expanse
         top = row * self._cell_expanse
@@ -312,7 +979,41 @@ class World:
         shape.filter = pymunk.ShapeFilter(categories=self._thing_categories["block"])
 
         entity.set_shape(shape)
-        self._space.add(shape)
+        self._attach(entity, shape)
+        self._block_cells[max(row, 0):max(row + math.ceil(height), 0),
+                          max(column, 0):max(column + math.ceil(width), 0)] = True
+        return shape
+
+    def _get_shape_cells(self, shape: pymunk.Shape) -> Tuple[int, int, int, int]:
+        """Returns the (column, row, width, height) of the grid cells covered by a static shape"""
+        bb = shape.bb
+        # the y axis points down, so the bottom of the bounding box is the top of the shape
+        column, row = self.xy_to_grid(bb.left, bb.bottom)
+        return (column, row, math.ceil(bb.right / self._cell_expanse) - column,
+                math.ceil(bb.top / self._cell_expanse) - row)
+
+    def _block_cell(self, block: Block, x: float, y: float) -> Tuple[int, int, int, int]:
+        """Returns the (column, row, width, height) of the grid cells occupied by
+        'block' when placed at the grid cell that contains ('x', 'y')"""
+        col, row = self.xy_to_grid(x, y)
+        row -= block.get_cell_size()[1] - 1
+        return (col, row, *block.get_cell_size())
+
+    def add_block_to_grid(self, entity, column: int, row: int,
+                         width: int, height: int, friction: float = 1.):
+        """Adds a block to the game world at the grid cell centred at ('column', 'row')
+
+        The block is placed in the tile map, and the shape of terrain is derived from its tiles.
+
+        Parameters:
+            item (Entity): The item to add to the grid
+            column (int): The column of the grid cell at which to place the block
+            row (int): The row of the grid cell at which to place the block
+            width (int): The width in cells of this entity
+            height (int): The height in cells of this entity
+            friction (float): The friction on the surface of the block
+        """
+        self.build_terrain(self.place_blocks([(entity, column, row, width, height)]), friction)
 
     def add_block(self, block: Block, x: float, y: float, *args, **kwargs):
         """Adds a block to the game world at the grid cell that contains ('x', 'y')
@@ -324,10 +1025,76 @@ class World:
 
             - See add_block_to_grid for other parameters
         """
-        col, row = self.xy_to_grid(x, y)
-        row -= block.get_cell_size()[1] - 1
-        return self.add_block_to_grid(block, col, row,
-                                      *block.get_cell_size(), *args, **kwargs)
+        return self.add_block_to_grid(block, *self._block_cell(block, x, y), *args, **kwargs)
+
+    def add_blocks(self, placements: Iterable[Tuple[Block, float, float]],
+                   friction: float = 1., reindex: bool = False):
+        """Adds many blocks to the game world at once
+
+        The blocks are placed in the tile map first, then their static shapes
+        are derived from it and added to the space in a single call, see build_terrain.
+
+        Parameters:
+            placements (iterable<tuple<Block, float, float>>):
+                    The (block, x, y) of each block to add, see add_block
+            friction (float): The friction on the surface of the blocks
+            reindex (bool): Whether to rebuild the static spatial index once
+                            all the blocks have been added
+        """
+        self.build_terrain(self.place_blocks((block, *self._block_cell(block, x, y)) for block, x, y in placements),
+                           friction, reindex)
+
+    def place_blocks(self, placements: Iterable[Tuple[Block, int, int, int, int]]) \
+            -> List[Tuple[Block, int, int, int, int]]:
+        """Places blocks in the tile map, without creating their shapes
+
+        Terrain is only placed as tiles, as its shapes are derived from them,
+        see build_terrain. The other blocks have state of their own, so are
+        returned to have their shapes created from the blocks themselves.
+
+        Parameters:
+            placements (iterable<tuple<Block, int, int, int, int>>):
+                    The (block, column, row, width, height) of each block, see add_block_to_grid
+
+        Returns:
+            (list<tuple<Block, int, int, int, int>>): The placements of the blocks which are not terrain
+        """
+        blocks = []
+        for placement in placements:
+            block, column, row, width, height = placement
+            self._update_tiles(column, row, math.ceil(width), math.ceil(height), block.get_id())
+            if isinstance(block, TerrainBlock):
+                self._terrain.setdefault(block.get_id(), block)
+            else:
+                blocks.append(placement)
+        return blocks
+
+    def build_terrain(self, blocks: Iterable[Tuple[Block, int, int, int, int]] = (),
+                      friction: float = 1., reindex: bool = False):
+        """Derives the shape of each tile of terrain which does not have one yet,
+        and creates the shapes of blocks which are not terrain, adding them to the space in a single call
+
+        Parameters:
+            blocks (iterable<tuple<Block, int, int, int, int>>):
+                    The (block, column, row, width, height) of each block which is not terrain, see place_blocks
+            friction (float): The friction on the surface of the blocks
+            reindex (bool): Whether to rebuild the static spatial index once the blocks have been added
+        """
+        shapes = [self._create_block_shape(block, column, row, width, height, friction)
+                  for block, column, row, width, height in blocks]
+
+        # the flyweight of each code of the tile map, None if it is not terrain
+        flyweights = [self._terrain.get(block_id) for block_id in self._tiles.get_palette()]
+        is_terrain = numpy.array([flyweight is not None for flyweight in flyweights])
+        tiles = self._tiles.get_region(0, 0, *self._tiles.get_size())
+        rows, columns = numpy.nonzero(is_terrain[tiles] & ~self._block_cells)
+        for column, row, code in zip(columns.tolist(), rows.tolist(), tiles[rows, columns].tolist()):
+            shapes.append(self._create_block_shape(flyweights[code], column, row, 1, 1, friction))
+
+        if shapes:
+            self._add_to_space(*shapes)
+        if reindex:
+            self._space.reindex_static()
 
     def get_block(self, x, y):
         """(Block) Returns a block on the point ('x', 'y'), or None if there is no block there
@@ -338,14 +1105,14 @@ class World:
         blocks = self._space.point_query((x, y), 0, pymunk.ShapeFilter(mask=self._thing_categories["block"]))
 
         if blocks:
-            return blocks[0].shape.object
+            return self._get_shape_thing(blocks[0].shape)
 
     def remove_block(self, block: Block):
-        """Removes a block from the game world"""
+        """Removes a block from the game world, emptying its cells of the tile map, see remove_thing"""
         self.remove_thing(block)
 
     def add_item(self, item: DroppedItem, x: float, y: float, size: Tuple[float, float] = (8, 8),
-                 mass: float = 2, friction: float = 1.):
+                 mass: float = 2, friction: float = 1., spawner: Entity = None):
         """Adds an item to the game world centred at the position ('x', 'y')
 
         Parameters:
@@ -356,13 +1123,124 @@ class World:
         """
 
         self.add_thing(item, x, y, size, collision_type=self._collision_types['item'],
-                       categories=self._thing_categories["item"], mass=mass, friction=friction)
+                       categories=self._thing_categories["item"], mass=mass, friction=friction, spawner=spawner)
+
+    def add_pickup(self, item: DroppedItem, x: float, y: float, size: Tuple[float, float] = (8, 8)):
+        """Adds an item which hangs in place, centred at the position ('x', 'y'), to be picked up
+
+        The item is a sensor shape on the static body, so it takes no part in the
+        physics simulation, but colliding with it still calls the collision handlers of items.
+
+        Parameters:
+            item (DroppedItem): The item to add to the game world
+            x (float): The x-coordinate at which to place the item
+            y (float): The y-coordinate at which to place the item
+            size (tuple<float, float>): The (x, y) size of the item
+        """
+        width, height = size
+
+        left = x - width // 2
+        right = left + width
+        top = y - height // 2
+        bottom = top + height
+
+        shape = pymunk.Poly(self._space.static_body, [(left, top), (left, bottom), (right, bottom), (right, top)])
+        shape.object = item
+        shape.sensor = True
+        shape.collision_type = self._collision_types['item']
+        shape.filter = pymunk.ShapeFilter(categories=self._thing_categories["item"])
+
+        item.set_shape(shape)
+        self._add_to_space(shape)
+        self._attach(item, shape)
+
+    def add_trigger(self, zone: TriggerZone, x: float, y: float):
+        """Adds a trigger zone to the game world, bottom aligned to the grid cell that contains ('x', 'y')
+
+        The zone is a sensor shape on the static body, touched only by players, mobs and items.
+        Its events are dispatched to the callbacks registered with add_trigger_handler.
+
+        Parameters:
+            zone (TriggerZone): The zone to add
+            x (float): The x-coordinate of the position contained by the cell
+            y (float): The y-coordinate of the position contained by the cell
+        """
+        column, row = self.xy_to_grid(x, y)
+        width, height = zone.get_cell_size()
+
+        left = column * self._cell_expanse
+        right = left + width * self._cell_expanse
+        bottom = (row + 1) * self._cell_expanse
+        top = bottom - height * self._cell_expanse
+
+        shape = pymunk.Poly(self._space.static_body, [(left, top), (left, bottom), (right, bottom), (right, top)])
+        shape.object = zone
+        shape.sensor = True
+        shape.collision_type = self._collision_types["trigger"]
+        shape.filter = pymunk.ShapeFilter(categories=self._thing_categories["trigger"],
+                                          mask=self._thing_categories["player"] | self._thing_categories["mob"]
+                                          | self._thing_categories["item"])
+
+        zone.set_shape(shape)
+        self._add_to_space(shape)
+        self._attach(zone, shape)
+
+    def remove_trigger(self, zone: TriggerZone):
+        """Removes a trigger zone from the world, the things in it exit it"""
+        self.remove_thing(zone)
+
+    def add_trigger_handler(self, zone_type: type, thing_type: type = Entity, on_enter=None,
+                            on_stay=None, on_exit=None):
+        """Register the callbacks of the events of a type of trigger zone triggered by a type of thing
+
+        See TriggerTable.register for parameters.
+        """
+        self._triggers.register(zone_type, thing_type, on_enter=on_enter, on_stay=on_stay, on_exit=on_exit)
+
+    def get_occupants(self, zone: TriggerZone) -> List[Entity]:
+        """(list<Entity>) Returns the things in a trigger zone, in the order they entered"""
+        shape = zone.get_shape()
+        return [thing_shape.object for zone_shape, thing_shape in self._occupants if zone_shape is shape]
+
+    @staticmethod
+    def _split_trigger(arbiter: pymunk.Arbiter) -> Tuple[pymunk.Shape, pymunk.Shape]:
+        """Returns the (zone shape, thing shape) of a collision with a trigger zone"""
+        first, second = arbiter.shapes
+        if isinstance(first.object, TriggerZone):
+            return first, second
+        return second, first
+
+    def _begin_trigger(self, arbiter: pymunk.Arbiter, space: pymunk.Space, data) -> bool:
+        """Records a thing entering a trigger zone, to be dispatched after the step"""
+        key = self._split_trigger(arbiter)
+        if key not in self._occupants:
+            self._occupants[key] = None
+            self._trigger_events.append((ENTER, *key))
+        return True
+
+    def _separate_trigger(self, arbiter: pymunk.Arbiter, space: pymunk.Space, data):
+        """Records a thing exiting a trigger zone, to be dispatched after the step"""
+        key = self._split_trigger(arbiter)
+        if key in self._occupants:
+            del self._occupants[key]
+            self._trigger_events.append((EXIT, *key))
+
+    def _dispatch_triggers(self):
+        """Dispatches the enter & exit events of trigger zones since the last step,
+        then the stay event of every thing in a zone"""
+        events, self._trigger_events = self._trigger_events, []
+        for event, zone_shape, thing_shape in events:
+            self._triggers.dispatch(event, zone_shape.object, thing_shape.object)
+
+        if self._occupants and self._triggers.has_stay():
+            for zone_shape, thing_shape in list(self._occupants):
+                self._triggers.dispatch(STAY, zone_shape.object, thing_shape.object)
 
     def remove_item(self, item: DroppedItem):
         """Removes an item from the world"""
         self.remove_thing(item)
 
-    def add_mob(self, mob: Mob, x: float, y: float, friction: float = 1.):
+    def add_mob(self, mob: Mob, x: float, y: float, friction: float = 1., spawner: Entity = None):
         """Adds a mob to the game world centred at the position ('x', 'y')
 
         Parameters:
@@ -372,18 +1250,182 @@ class World:
         """
 
         self.add_thing(mob, x, y, mob.get_size(), collision_type=self._collision_types['mob'],
-                       categories=self._thing_categories["mob"], mass=mob.get_weight(), friction=friction)
+                       categories=self._thing_categories["mob"], mass=mob.get_weight(), friction=friction,
+                       spawner=spawner)
 
     def remove_mob(self, mob: Mob):
         """Removes a mob from the world"""
         self.remove_thing(mob)
 
+    def add_projectile(self, projectile: Projectile, x: float, y: float,
+                       velocity: Tuple[float, float] = (0, 0), spawner: Entity = None):
+        """Fires a projectile from the position ('x', 'y')
+
+        The projectile is not added to the physics space. After each step of
+        the space, it is moved by its velocity, falling with its share of
+        gravity, and stops at the first thing of its hit categories in its path.
+        It should be fired from outside of the spawner, so as not to hit it.
+
+        Parameters:
+            projectile (Projectile): The projectile to fire
+            x (float): The x-coordinate to fire from
+            y (float): The y-coordinate to fire from
+            velocity (tuple<float, float>): The (x, y) velocity to fire at
+            spawner (Entity): The thing which fired the projectile during play, if any,
+                              making it subject to the time to live of its id
+        """
+        self._projectiles.add(projectile, (x, y), velocity, self._get_projectile_mask(projectile))
+        if spawner is not None:
+            self._add_spawn(projectile, projectile.get_id(), spawner)
+
+    def remove_projectile(self, projectile: Projectile):
+        """Removes a projectile from the world, if it has not already hit something"""
+        if self._projectiles.remove(projectile):
+            self._remove_spawn(projectile)
+
+    def get_projectiles(self) -> List[Projectile]:
+        """(list<Projectile>) Returns the live projectiles, in the order they were fired"""
+        return self._projectiles.get_projectiles()
+
+    def add_hit_handler(self, projectile_type: type, thing_type: type, on_hit):
+        """Adds the callback of a type of projectile hitting a type of thing, see game.projectile.HitTable
+
+        Parameters:
+            projectile_type (type): The subclass of Projectile to handle
+            thing_type (type): The subclass of Entity which is hit
+            on_hit (Callable<Projectile, Entity, tuple<float, float>>): Called after the step the thing is hit,
+                                                                         once the projectile has been removed
+        """
+        self._hits.register(projectile_type, thing_type, on_hit)
+
+    def _get_projectile_mask(self, projectile: Projectile) -> int:
+        """(int) Returns the query categories of the things a type of projectile hits"""
+        return self.get_category_mask(projectile.get_hits())
+
+    def _find_projectile_candidates(self, starts: numpy.ndarray, ends: numpy.ndarray,
+                                    radii: numpy.ndarray, masks: numpy.ndarray) -> numpy.ndarray:
+        """Finds the projectiles whose paths may hit a thing, without querying the space
+
+        The path of a projectile is bounded by a box, which may only hit:
+            - the boundary walls, if it leaves the world
+            - the terrain, if one of the grid cells at its corners holds a block
+            - the things on the bodies of the space, e.g. the player & mobs,
+              if it overlaps their bounding box
+
+        Projectiles whose box spans more than two cells, or which hit any other
+        category, such as items placed in a level, are always candidates.
+
+        Parameters:
+            starts (numpy.ndarray): The (x, y) position each projectile moved from
+            ends (numpy.ndarray): The (x, y) position each projectile moved to
+            radii (numpy.ndarray): The radius of each projectile
+            masks (numpy.ndarray): The query categories of the things each projectile hits
+
+        Returns:
+            (numpy.ndarray): The indices of the candidates, in ascending order
+        """
+        lows = numpy.minimum(starts, ends) - radii[:, None]
+        highs = numpy.maximum(starts, ends) + radii[:, None]
+        width, height = self._pixel_size
+
+        categories = self._thing_categories
+        indexed = categories["wall"] | categories["block"] | categories["player"] | categories["mob"]
+        candidates = (masks & ~numpy.uint32(indexed)) != 0
+
+        # the boundary walls lie just beyond the edges of the world
+        candidates |= ((masks & categories["wall"]) != 0) & ((lows[:, 0] < 0) | (lows[:, 1] < 0)
+                                                              | (highs[:, 0] > width) | (highs[:, 1] > height))
+
+        columns, rows = self._grid_size
+        low_cells = numpy.floor(lows / self._cell_expanse).astype(int)
+        high_cells = numpy.floor(highs / self._cell_expanse).astype(int)
+        candidates |= (high_cells - low_cells).max(axis=1) > 1
+        solid = self._tiles.get_region(0, 0, columns, rows) != 0
+        low_columns, high_columns = (numpy.clip(cells[:, 0], 0, columns - 1) for cells in (low_cells, high_cells))
+        low_rows, high_rows = (numpy.clip(cells[:, 1], 0, rows - 1) for cells in (low_cells, high_cells))
+        terrain = (solid[low_rows, low_columns] | solid[low_rows, high_columns]
+                   | solid[high_rows, low_columns] | solid[high_rows, high_columns])
+        candidates |= ((masks & categories["block"]) != 0) & terrain
+
+        # the y axis points down, so the bottom of a bounding box is its top edge
+        boxes = [(shape.bb.left, shape.bb.bottom, shape.bb.right, shape.bb.top, shape.filter.categories)
+                 for body in self._space.bodies for shape in body.shapes]
+        if boxes:
+            left, top, right, bottom, box_categories = (numpy.array(column) for column in zip(*boxes))
+            overlaps = ((lows[:, 0, None] <= right) & (highs[:, 0, None] >= left)
+                        & (lows[:, 1, None] <= bottom) & (highs[:, 1, None] >= top)
+                        & ((masks[:, None] & box_categories.astype(numpy.uint32)) != 0))
+            candidates |= overlaps.any(axis=1)
+
+        return numpy.flatnonzero(candidates)
+
+    def _query_segment(self, start: Tuple[float, float], end: Tuple[float, float], radius: float,
+                       shape_filter: pymunk.ShapeFilter) -> List[pymunk.SegmentQueryInfo]:
+        """Returns the hits of a segment on the shapes of things, nearest to the start first
+
+        The segment queries of a pymunk space only find shapes whose bounding box
+        the thin centre line crosses, ignoring the radius. So a thick segment
+        instead queries each shape whose bounding box its swept box overlaps.
+        """
+        if radius == 0:
+            hits = self._space.segment_query(start, end, 0, shape_filter)
+        else:
+            (x1, y1), (x2, y2) = start, end
+            bb = pymunk.BB(min(x1, x2) - radius, min(y1, y2) - radius, max(x1, x2) + radius, max(y1, y2) + radius)
+            hits = [shape.segment_query(start, end, radius) for shape in self._space.bb_query(bb, shape_filter)]
+
+        hits = [hit for hit in hits if hit.shape is not None and hit.shape.object]
+        hits.sort(key=lambda hit: hit.alpha)
+        return hits
+
+    def _step_projectiles(self):
+        """Moves every projectile by one time step, removing those which hit a thing
+        and calling the handlers of their hits
+
+        Every projectile is moved at once, then only those whose paths may hit
+        a thing cast a segment query along their path, rather than being
+        simulated by the space. Projectiles fired by hit handlers first move
+        on the next step.
+        """
+        if not self._projectiles.get_count():
+            return
+
+        starts, ends, radii, masks = self._projectiles.advance(STEP_SIZE, self._space.gravity)
+        for index in self._find_projectile_candidates(starts, ends, radii, masks):
+            projectile = self._projectiles.get_projectile(index)
+            # removed by the handler of an earlier hit
+            if projectile is None:
+                continue
+
+            hits = self._query_segment(tuple(starts[index]), tuple(ends[index]), float(radii[index]),
+                                       self._get_query_filter(int(masks[index])))
+            if not hits:
+                continue
+            hit = hits[0]
+
+            point = hit.point.x, hit.point.y
+            projectile.set_position(point)
+            self.remove_projectile(projectile)
+            self._hits.dispatch(projectile, self._get_shape_thing(hit.shape), point)
+
+    def get_thing_counts(self) -> Dict[str, int]:
+        """(dict<str: int>) Returns the number of things in the world of each collision type"""
+        names = {value: key for key, value in self._collision_types.items()}
+        counts = {}
+        for shape in self._space.shapes:
+            name = names.get(shape.collision_type, "other")
+            counts[name] = counts.get(name, 0) + 1
+        if self._projectiles.get_count():
+            counts["projectile"] = self._projectiles.get_count()
+
+        return counts
+
     def get_things_in_range(self, x: float, y: float, distance: float):
         """(list<Entity>) Returns all things within the given distance range from point ('x', 'y')"""
         queries = self._space.point_query((x, y), distance, pymunk.ShapeFilter(
             mask=pymunk.ShapeFilter.ALL_MASKS ^ self._thing_categories["wall"]))
 
-        return [q.shape.object for q in queries]
+        return [self._get_shape_thing(q.shape) for q in queries]
 
     def get_things(self, x: float, y: float) -> [Entity]:
         """(list<Entity>) Returns all things on the point ('x', 'y')"""
@@ -411,3 +1453,127 @@ class World:
                                           pymunk.ShapeFilter(mask=self._thing_categories["mob"]))
 
         return [q.shape.object for q in queries]
+
+    def get_category_mask(self, categories: Iterable[str] = None) -> int:
+        """Returns the query mask of categories of thing, see PHYSICAL_THING_CATEGORIES
+
+        Parameters:
+            categories (iterable<str>): The names of the categories, None for every category but walls
+
+        Returns:
+            (int): The bitwise or of the categories
+
+        Raises:
+            ValueError: If a category is not one of the world's categories of thing
+        """
+        key = None if categories is None else tuple(categories)
+        mask = self._category_masks.get(key)
+        if mask is None:
+            if key is None:
+                mask = pymunk.ShapeFilter.ALL_MASKS ^ self._thing_categories["wall"]
+            else:
+                mask = 0
+                for category in key:
+                    if category not in self._thing_categories:
+                        raise ValueError(f"Unknown category of thing {category!r}, "
+                                         f"expected one of {tuple(self._thing_categories)}")
+                    mask |= self._thing_categories[category]
+            self._category_masks[key] = mask
+        return mask
+
+    def _get_query_filter(self, mask: int) -> pymunk.ShapeFilter:
+        """(pymunk.ShapeFilter) Returns the shape filter of a query mask"""
+        shape_filter = self._query_filters.get(mask)
+        if shape_filter is None:
+            shape_filter = self._query_filters[mask] = pymunk.ShapeFilter(mask=mask)
+        return shape_filter
+
+    def get_things_in_bb(self, left: float, top: float, right: float, bottom: float,
+                         categories: Iterable[str] = None) -> List[Entity]:
+        """Returns the things whose bounding box overlaps a rectangle, in no particular order
+
+        Things are matched by their bounding box rather than their exact shape,
+        which is the same for the axis aligned boxes of blocks, items & mobs.
+
+        Parameters:
+            left (float): The left edge of the rectangle
+            top (float): The top edge of the rectangle, i.e. the lesser y-coordinate
+            right (float): The right edge of the rectangle
+            bottom (float): The bottom edge of the rectangle, i.e. the greater y-coordinate
+            categories (iterable<str>): The categories of thing to find, None for every category but walls
+
+        Returns:
+            (list<Entity>): The things in the rectangle
+        """
+        # the y axis points down, so the top edge of the rectangle is the bottom of the bounding box
+        shapes = self._space.bb_query(pymunk.BB(left, top, right, bottom),
+                                      self._get_query_filter(self.get_category_mask(categories)))
+        return [self._get_shape_thing(shape) for shape in shapes if shape.object]
+
+    def get_things_on_segment(self, start: Tuple[float, float], end: Tuple[float, float], radius: float = 0,
+                              categories: Iterable[str] = None) -> List[Tuple[Entity, Tuple[float, float], float]]:
+        """Returns the things a segment passes through, nearest to the start first
+
+        Parameters:
+            start (tuple<float, float>): The (x, y) position the segment starts at
+            end (tuple<float, float>): The (x, y) position the segment ends at
+            radius (float): The radius of the segment, 0 for a thin ray
+            categories (iterable<str>): The categories of thing to find, None for every category but walls
+
+        Returns:
+            (list<tuple<Entity, tuple<float, float>, float>>): The (thing, point, alpha) of each hit,
+                    where the point is where the segment enters the thing and alpha is the
+                    fraction of the way from start to end it is at
+        """
+        hits = self._query_segment(start, end, radius, self._get_query_filter(self.get_category_mask(categories)))
+        return [(self._get_shape_thing(hit.shape), (hit.point.x, hit.point.y), hit.alpha) for hit in hits]
+
+    def get_first_thing_on_segment(self, start: Tuple[float, float], end: Tuple[float, float], radius: float = 0,
+                                   categories: Iterable[str] = None) \
+            -> Optional[Tuple[Entity, Tuple[float, float], float]]:
+        """Returns the thing a segment passes through nearest to its start, or None if it hits nothing
+
+        A thin ray is cheaper than get_things_on_segment, as the query stops at the first hit.
+
+        Returns:
+            (tuple<Entity, tuple<float, float>, float>): The (thing, point, alpha) of the hit,
+                    see get_things_on_segment for the parameters and result
+        """
+        shape_filter = self._get_query_filter(self.get_category_mask(categories))
+        if radius == 0:
+            hit = self._space.segment_query_first(start, end, 0, shape_filter)
+            if hit is None or hit.shape.object is None:
+                hit = None
+        else:
+            hit = next(iter(self._query_segment(start, end, radius, shape_filter)), None)
+
+        if hit is None:
+            return None
+        return self._get_shape_thing(hit.shape), (hit.point.x, hit.point.y), hit.alpha
+
+    def has_line_of_sight(self, start: Tuple[float, float], end: Tuple[float, float],
+                          categories: Iterable[str] = ("wall", "block")) -> bool:
+        """(bool) Returns True iff no thing of the categories, by default terrain & walls, lies between two points"""
+        return self.get_first_thing_on_segment(start, end, 0, categories) is None
+
+    def get_things_near_points(self, points: Iterable[Tuple[float, float]], max_distance: float,
+                               categories: Iterable[str] = None) -> List[Tuple[int, Entity, float]]:
+        """Returns the things within a distance of each of a batch of points
+
+        The points share one shape filter, and the hits of every point are
+        returned in a single flat list, e.g. for every mob to look around at once.
+
+        Parameters:
+            points (iterable<tuple<float, float>>): The (x, y) position of each point
+            max_distance (float): The distance from a point to the surface of a thing to find it within
+            categories (iterable<str>): The categories of thing to find, None for every category but walls
+
+        Returns:
+            (list<tuple<int, Entity, float>>): The (index of the point, thing, distance) of each hit,
+                    by the order of the points, where the distance is negative inside the thing
+        """
+        shape_filter = self._get_query_filter(self.get_category_mask(categories))
+        query = self._space.point_query
+        return [(index, self._get_shape_thing(hit.shape), hit.distance)
+                for index, point in enumerate(points)
+                for hit in query(tuple(point), max_distance, shape_filter) if hit.shape.object]
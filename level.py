@@ -4,8 +4,13 @@ tokens of entities.
 
 __version__ = "1.1.0"
 
-from typing import Tuple, Callable, Iterable
+import copy
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, Callable, Iterable, List, Dict
 
+from game.entity import Entity
 from game.world import World
 
 
@@ -14,7 +19,8 @@ class WorldBuilder:
     entity ids by dynamically assigning processors to ids.
     """
     def __init__(self, block_size: int, gravity: Tuple[int, int] = (0, 300),
-                 fallback: Callable = None):
+                 fallback: Callable = None, clock: Callable = time.time, seed: int = None,
+                 navigation: bool = False):
         """Construct a new world builder with a specific block size.
 
         The args passed to the fallback callback is determined by what is given
@@ -26,6 +32,10 @@ class WorldBuilder:
             gravity (tuple<int, int>): The gravity of the world.
             fallback (Callable<World, str, int, int, *> -> None): The builder
                 callback to add an entity to the world for an unknown id.
+            clock (Callable<> -> float): The clock of the built worlds, see World.
+            seed (int): The seed of the random streams of the built worlds, see World.
+            navigation (bool): Whether to precompute the navigation graph of the built worlds,
+                               see World.build_navigation.
         """
         # the builders dictionary contains mappings on how to
         # process ids of entities
@@ -34,6 +44,9 @@ class WorldBuilder:
         self._fallback = fallback
         self._block_size = block_size
         self._gravity = gravity
+        self._clock = clock
+        self._seed = seed
+        self._navigation = navigation
         self._width = 0
         self._height = 0
 
@@ -48,6 +61,10 @@ class WorldBuilder:
         The args passed to the builder callback is determined by what is given
         to the add_entity method.
 
+        Rather than adding a block to the world itself, a builder may return a
+        (Block, x, y) placement, in pixels. Placements are added to the world
+        together once every entity has been processed (see World.add_blocks).
+
         Parameters:
             entity_id (str): String identifier for an entity.
             builder (Callable): The builder callback to add an entity to the world.
@@ -63,7 +80,7 @@ class WorldBuilder:
         The signature of the builder method should be as follows:
             builder(world: World, entity_id: str, x: int, y: int, *args) -> None
         The args passed to the builder callback is determined by what is given
-        to the add_entity method.
+        to the add_entity method. See register_builder for returning placements.
 
         Parameters:
             entity_ids (<str, ...>): Iterable of string identifiers for an entity.
@@ -94,18 +111,26 @@ class WorldBuilder:
 
         return self
 
-    def build(self) -> World:
+    def build(self, reindex: bool = True) -> World:
         """Construct a new world containing all the added entities.
 
         The size of the world is determined by the maximum entity space occupied.
 
-        Each entity builder is called during this construction.
+        Each entity builder is called during this construction. Block placements
+        returned by builders are added to the world in bulk afterwards, placed
+        in its tile map and then given shapes, see World.add_blocks.
+
+        Parameters:
+            reindex (bool): Whether to rebuild the static spatial index of the
+                            world after the bulk placement of blocks.
 
         Raises:
             KeyError: If there is no associated builder for an entity id and no
                       fallback builder has been set.
         """
-        world = World((self._width, self._height), self._block_size, gravity=self._gravity)
+        world = World((self._width, self._height), self._block_size, gravity=self._gravity,
+                      clock=self._clock, seed=self._seed)
+        placements = []
         for entity in self._entities:
             entity_id, x, y, args = entity
 
@@ -113,11 +138,20 @@ class WorldBuilder:
                 if self._fallback is None:
                     raise KeyError(f"Unable to build world,"
                                    f"no matching processor for entity id of {entity_id}")
-                self._fallback(world, *entity)
-                continue
+                placement = self._fallback(world, *entity)
+            else:
+                processor = self._builders[entity_id]
+                placement = processor(world, entity_id, x, y, *args)
+
+            if placement is not None:
+                placements.append(placement)
 
-            processor = self._builders[entity_id]
-            processor(world, entity_id, x, y, *args)
+        # the blocks fill the tile map first, then the shapes of the terrain are derived from its tiles
+        world.add_blocks(placements, reindex=reindex)
+        # only changes to the terrain once built are edits
+        world.get_tile_map().clear_edits()
+        if self._navigation:
+            world.build_navigation()
 
         return world
 
@@ -130,6 +164,110 @@ class WorldBuilder:
         self._height = 0
 
 
+class EntityRegistry:
+    """Declarative table of the entities which can be placed in a level.
+
+    Each level character maps to the kind of entity it creates, the class and
+    constructor arguments of the entity and the sprite it is drawn with. A
+    prototype of each entity is constructed once when it is registered, and
+    cloned whenever the character is built.
+
+    The kind of an entity is the collision type it is added to the world with,
+    one of "block", "item", "mob", "trigger" or "projectile".
+    """
+
+    # items placed in a level hang in place, unlike those dropped during the game
+    _adders = {
+        "item": World.add_pickup,
+        "mob": World.add_mob,
+        "trigger": World.add_trigger,
+        "projectile": World.add_projectile
+    }
+
+    def __init__(self, block_size: int):
+        """Construct a new, empty entity registry.
+
+        Parameters:
+            block_size (int): The pixel dimensions of a level cell.
+        """
+        self._block_size = block_size
+        self._entries = {}
+        self._sprites = {"block": {}, "item": {}, "mob": {}, "trigger": {}, "projectile": {}}
+
+    def register(self, character: str, kind: str, cls: Callable, *args,
+                 sprite: str = None, **kwargs):
+        """Register the entity created by a level character.
+
+        Parameters:
+            character (str): The level character of the entity, or None for
+                             entities which are only created during the game.
+            kind (str): The kind of entity, one of "block", "item", "mob", "trigger" or "projectile".
+            cls (Callable): The entity class to construct.
+            *args, **kwargs: The arguments to construct the entity with.
+            sprite (str): The image of the entity, or None if the entity
+                          has a custom renderer.
+
+        Returns:
+            (EntityRegistry): self, allows for chained method calls.
+
+        Raises:
+            ValueError: If the kind of entity is not known.
+        """
+        if kind not in self._sprites:
+            raise ValueError(f"Unable to register {character!r}, unknown entity kind {kind!r}")
+
+        prototype = cls(*args, **kwargs)
+        if character is not None:
+            self._entries[character] = (kind, prototype)
+        if sprite is not None:
+            self._sprites[kind][prototype.get_id()] = sprite
+
+        return self
+
+    def get_characters(self, kind: str = None) -> List[str]:
+        """(list<str>) Returns the registered level characters, optionally only
+        those of the given kind of entity."""
+        return [character for character, (entity_kind, _) in self._entries.items()
+                if kind is None or entity_kind == kind]
+
+    def get_sprites(self, kind: str) -> Dict[str, str]:
+        """(dict<str: str>) Returns a mapping of entity ids to their images, for
+        the given kind of entity."""
+        return self._sprites[kind]
+
+    def create(self, character: str) -> Entity:
+        """Create a new entity for the given level character, without adding it
+        to a world.
+
+        Raises:
+            KeyError: If the character has not been registered.
+        """
+        _, prototype = self._entries[character]
+        return copy.copy(prototype)
+
+    def build(self, world: World, character: str, x: int, y: int, *args):
+        """Builder for the registered entities, see WorldBuilder.register_builder.
+
+        Items and mobs are added to the world directly, blocks are returned as
+        placements to be added in bulk.
+        """
+        kind, prototype = self._entries[character]
+        entity = copy.copy(prototype)
+        x, y = x * self._block_size, y * self._block_size
+
+        if kind == "block":
+            return entity, x, y
+        self._adders[kind](world, entity, x, y)
+
+    def register_with(self, builder: WorldBuilder):
+        """Register the builder of every registered level character.
+
+        Parameters:
+            builder (WorldBuilder): The world builder to build entities with.
+        """
+        builder.register_builders(self._entries.keys(), self.build)
+
+
 def level_size(level: str) -> Tuple[int, int]:
     """Calculate the rows, columns dimensions of a level from the level string.
 
@@ -169,22 +307,141 @@ def load_level(filename: str) -> str:
     return "\n".join(level)
 
 
-def load_world(builder: WorldBuilder, filename: str, *args):
-    """Loads entities within a file into a world builder.
+def compile_level(filename: str) -> List[Tuple[str, int, int]]:
+    """Load a level file and parse it into the entities it contains.
+
+    The compiled level can be handed to build_level any number of times
+    without touching the file system again.
 
     Parameters:
-        builder (WorldBuilder): The builder to append found entities to.
-        filename (str): The game world file to load with blocks.
+        filename (str): The game world file to compile.
 
     Returns:
-        (World): The world produced by adding the found entities.
+        (list<tuple<str, int, int>>): The (entity id, x, y) of each entity.
     """
     level = load_level(filename)
+    entities = []
     for y, line in enumerate(level.split('\n')):
         for x, character in enumerate(line):
             if character in ('\n', ' '):
                 continue
 
-            builder.add_entity(character, x, y, *args)
+            entities.append((character, x, y))
+
+    return entities
+
+
+def build_level(builder: WorldBuilder, entities: Iterable[Tuple[str, int, int]], *args):
+    """Loads the entities of a compiled level into a world builder.
+
+    Parameters:
+        builder (WorldBuilder): The builder to append the entities to.
+        entities (iterable<tuple<str, int, int>>): A level compiled by compile_level.
+
+    Returns:
+        (World): The world produced by adding the entities.
+    """
+    for character, x, y in entities:
+        builder.add_entity(character, x, y, *args)
 
     return builder.build()
+
+
+def load_world(builder: WorldBuilder, filename: str, *args):
+    """Loads entities within a file into a world builder.
+
+    Parameters:
+        builder (WorldBuilder): The builder to append found entities to.
+        filename (str): The game world file to load with blocks.
+
+    Returns:
+        (World): The world produced by adding the found entities.
+    """
+    return build_level(builder, compile_level(filename), *args)
+
+
+class LevelPrefetcher:
+    """Compiles the levels reachable from the current level on a background
+    thread, so that moving to the next level does not stall on file loading.
+
+    Compiled levels are kept in a bounded least recently used cache.
+    """
+
+    def __init__(self, graph: Dict[str, Iterable[str]] = None, capacity: int = 4,
+                 loader: Callable = compile_level):
+        """Construct a new level prefetcher.
+
+        Parameters:
+            graph (dict<str: iterable<str>>): Mapping of a level filename to the
+                                              filenames of the levels reachable from it.
+            capacity (int): The maximum number of compiled levels to keep.
+            loader (Callable<str> -> list): Compiles a level filename.
+        """
+        self._graph = graph if graph is not None else {}
+        self._capacity = capacity
+        self._loader = loader
+        self._cache = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=1,
+                                            thread_name_prefix="level-prefetch")
+
+    def get_neighbours(self, filename: str) -> List[str]:
+        """(list<str>) Returns the levels reachable from the given level."""
+        return list(self._graph.get(filename, ()))
+
+    def prefetch(self, filename: str):
+        """Start compiling a level in the background, unless it is already cached.
+
+        Parameters:
+            filename (str): The level file to compile.
+        """
+        if filename in self._cache:
+            self._cache.move_to_end(filename)
+            return
+
+        self._cache[filename] = self._executor.submit(self._loader, filename)
+        while len(self._cache) > self._capacity:
+            _, future = self._cache.popitem(last=False)
+            future.cancel()
+
+    def prefetch_neighbours(self, filename: str):
+        """Start compiling every level reachable from the given level.
+
+        Parameters:
+            filename (str): The level currently being played.
+        """
+        for neighbour in self.get_neighbours(filename):
+            self.prefetch(neighbour)
+
+    def get(self, filename: str) -> List[Tuple[str, int, int]]:
+        """Get a compiled level, waiting on the background compilation if it
+        is still in progress.
+
+        Levels which were never prefetched, or failed to compile in the
+        background, are compiled synchronously so errors are raised to the caller.
+
+        Parameters:
+            filename (str): The level file to get.
+
+        Returns:
+            (list<tuple<str, int, int>>): The compiled level.
+        """
+        future = self._cache.get(filename)
+        if future is not None:
+            self._cache.move_to_end(filename)
+            try:
+                return future.result()
+            except Exception:
+                del self._cache[filename]
+
+        return self._loader(filename)
+
+    def clear(self):
+        """Discard all compiled levels."""
+        for future in self._cache.values():
+            future.cancel()
+        self._cache.clear()
+
+    def shutdown(self):
+        """Stop the background thread, discarding any pending compilations."""
+        self.clear()
+        self._executor.shutdown(wait=False)
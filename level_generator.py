@@ -0,0 +1,165 @@
+"""Procedural generation of level files, used as input for benchmarks.
+
+Generated levels use the same characters as the hand written levels, e.g.
+    $python level_generator.py huge.txt --width 100000 --seed 1
+"""
+
+__version__ = "1.1.0"
+
+import random
+import sys
+import argparse
+from typing import List
+
+# Columns at the start of the level which are kept clear for the player
+START_CLEARANCE = 8
+# Columns at the end of the level which are reserved for the flag
+END_CLEARANCE = 12
+# The minimum height of a level, enough for a flag above the floor
+MIN_HEIGHT = 13
+
+
+def _place(grid: List[bytearray], surface: List[int], character: str, column: int, row: int):
+    """Place a block character in the grid, raising the surface of its column."""
+    grid[row][column] = ord(character)
+    if surface[column] is None or row < surface[column]:
+        surface[column] = row
+
+
+def _is_clear(grid: List[bytearray], columns: range, rows: range) -> bool:
+    """(bool) Returns True iff all of the given cells in the grid are empty."""
+    return all(grid[row][column] == ord(' ') for row in rows for column in columns)
+
+
+def generate_level(width: int, height: int = 20, seed: int = None, mob_density: float = 0.03,
+                   coin_density: float = 0.05, terrain_complexity: float = 0.5) -> str:
+    """Generate a level string, in the format read by level.load_level.
+
+    The player starts at the top left of the level and the flag is at the end.
+
+    Parameters:
+        width (int): The number of columns in the level.
+        height (int): The number of rows in the level.
+        seed (int): The seed of the random generator, the same seed and
+                    parameters always generate the same level.
+        mob_density (float): The chance of a mob being placed in each column.
+        coin_density (float): The chance of a coin being placed in each column.
+        terrain_complexity (float): Between 0 and 1, how often terrain features
+                                    such as gaps, hills and platforms occur.
+
+    Returns:
+        (str): The generated level, with every line of equal length.
+
+    Raises:
+        ValueError: If the level is too small to contain a start and a flag.
+    """
+    if width < START_CLEARANCE + END_CLEARANCE:
+        raise ValueError(f"A level must be at least {START_CLEARANCE + END_CLEARANCE} columns wide")
+    if height < MIN_HEIGHT:
+        raise ValueError(f"A level must be at least {MIN_HEIGHT} rows high")
+
+    rng = random.Random(seed)
+    grid = [bytearray(b' ' * width) for _ in range(height)]
+    ground = height - 2
+    surface = [None] * width
+
+    for column in range(width):
+        _place(grid, surface, '%', column, ground + 1)
+        _place(grid, surface, '#', column, ground)
+
+    column = START_CLEARANCE
+    end = width - END_CLEARANCE
+    while column < end:
+        roll = rng.random() / max(terrain_complexity, 1e-9)
+
+        # gap in the floor
+        if roll < 0.12:
+            length = min(rng.randint(2, 3), end - column)
+            for gap in range(column, column + length):
+                grid[ground][gap] = grid[ground + 1][gap] = ord(' ')
+                surface[gap] = None
+            column += length + 2
+
+        # stepped hill
+        elif roll < 0.3:
+            size = rng.randint(2, 4)
+            if column + 2 * size > end:
+                column += 1
+                continue
+            for level in range(size):
+                for hill in range(column + level, column + 2 * size - 1 - level):
+                    _place(grid, surface, '#', hill, ground - 1 - level)
+            column += 2 * size
+
+        # floating platform, sometimes with mystery blocks
+        elif roll < 0.45:
+            length = min(rng.randint(3, 6), end - column)
+            row = ground - rng.randint(4, 5)
+            for platform in range(column, column + length):
+                character = rng.choice('$?') if rng.random() < 0.25 else '#'
+                grid[row][platform] = ord(character)
+            column += length + 1
+
+        # single special block on the floor
+        elif roll < 0.55:
+            character = rng.choice('^b=S')
+            row = ground - 1
+            columns = range(column, column + (2 if character == '=' else 1))
+            if surface[columns[-1]] != ground or not _is_clear(grid, columns, range(row - 1, row + 1)):
+                column += 1
+                continue
+            grid[row][column] = ord(character)
+            for occupied in columns:
+                surface[occupied] = row - 1 if character == '=' else row
+            column += len(columns) + 1
+
+        else:
+            column += rng.randint(1, 4)
+
+    for column in range(START_CLEARANCE, end):
+        top = surface[column]
+        if top is not None and top > 1 and rng.random() < mob_density:
+            grid[top - 1][column] = ord('@')
+        elif rng.random() < mob_density / 4:
+            grid[rng.randint(1, 3)][column] = ord('&')
+
+        if rng.random() < coin_density:
+            row = (top if top is not None else ground) - rng.randint(3, 4)
+            if row > 0 and grid[row][column] == ord(' '):
+                grid[row][column] = ord('*' if rng.random() < 0.05 else 'C')
+
+    grid[ground - 1][width - END_CLEARANCE // 2] = ord('I')
+
+    return "\n".join(line.decode() for line in grid)
+
+
+def write_level(filename: str, width: int, **kwargs):
+    """Generate a level and write it to a file.
+
+    Parameters:
+        filename (str): The level file to write.
+        width (int): The number of columns in the level.
+        **kwargs: See generate_level for the other parameters.
+    """
+    with open(filename, 'w') as file:
+        file.write(generate_level(width, **kwargs))
+
+
+def main(argv: List[str]):
+    parser = argparse.ArgumentParser(description="Generate a level file.")
+    parser.add_argument("filename", help="the level file to write")
+    parser.add_argument("--width", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--mob-density", type=float, default=0.03)
+    parser.add_argument("--coin-density", type=float, default=0.05)
+    parser.add_argument("--terrain-complexity", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    write_level(args.filename, args.width, height=args.height, seed=args.seed,
+                mob_density=args.mob_density, coin_density=args.coin_density,
+                terrain_complexity=args.terrain_complexity)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -5,9 +5,15 @@ __version__ = "1.1.0"
 from game.entity import DynamicEntity
 import time
 
+# The seconds a player stays invincible for after collecting a star
+INVINCIBLE_TIME = 10
+
 
 class Player(DynamicEntity):
     """A player in the game"""
+    __slots__ = ("_name", "_score", "_invincible", "_invincible_start_time", "_switch_start_time",
+                 "_switch_active", "_get_switch", "_bricks_position", "_clock")
+
     _type = 3
 
     def __init__(self, name: str = "Mario", max_health: float = 20):
@@ -29,6 +35,15 @@ class Player(DynamicEntity):
         self._get_switch = None
         self._bricks_position = []
         self._max_health = max_health
+        self._clock = time.time
+
+    def set_clock(self, clock):
+        """Set the clock used for the player's timers, the clock of the world they are in
+
+        Parameters:
+            clock (Callable<> -> float): Returns the current time, in seconds
+        """
+        self._clock = clock
 
     def set_switch_to_none(self):
         """Set the Switch object got from removing things by Switch to be NONE
@@ -53,14 +68,35 @@ class Player(DynamicEntity):
         """(Tuple(float,float)) Return the list of removed bricks position after pressing Switch """
         return self._bricks_position
 
+    def clear_bricks_position(self):
+        """ Forget the positions of removed bricks once they have been added back """
+        self._bricks_position.clear()
+
+    def attach(self, components, entity: int):
+        """Adapt the player to an entity of a world's components, whose TimerSystem ends their invincibility"""
+        invincible = self.get_invincible()
+        super().attach(components, entity)
+        if invincible:
+            components.add(entity, "invincible", end=self._invincible_start_time + INVINCIBLE_TIME)
+
+    def detach(self):
+        """Stop adapting the player to an entity, keeping whether they are invincible"""
+        if self._components is not None:
+            self._invincible = self._components.has(self._entity, "invincible")
+        super().detach()
+
     def get_invincible(self):
         """(bool) Return the current state of player whether is invincible or not """
+        if self._components is not None:
+            return self._components.has(self._entity, "invincible")
+        if self._invincible and (self._clock() - self._invincible_start_time) > INVINCIBLE_TIME:
+            self._invincible = False
         return self._invincible
 
     def set_switch_start_time(self):
         """ Inform that switch is pressed then set pressed time is current time"""
         self._switch_active = False
-        self._switch_start_time = time.time()
+        self._switch_start_time = self._clock()
 
     def get_switch_start_time(self):
         """(float) Return the start time when Switch is pressed """
@@ -81,7 +117,10 @@ class Player(DynamicEntity):
     def is_invincible(self):
         """(bool) Inform that Star is collected then set collected time is current time """
         self._invincible = True
-        self._invincible_start_time = time.time()
+        self._invincible_start_time = self._clock()
+        if self._components is not None:
+            self._components.remove(self._entity, "invincible")
+            self._components.add(self._entity, "invincible", end=self._invincible_start_time + INVINCIBLE_TIME)
         return True
 
     def get_name(self) -> str:
@@ -104,17 +143,6 @@ class Player(DynamicEntity):
     def reset_score(self):
         return self._score == 0
 
-    def step(self, time_delta: float, game_data):
-        """Advance this thing by one time-step
-
-        Parameters:
-            time_delta (float): The amount of time that has passed since the last step, in seconds
-            game_data (tuple<World, Player>): Arbitrary data supplied by the app class
-        """
-        if self._invincible:
-            if (time.time() - self._invincible_start_time) > 10:
-                self._invincible = False
-
     def upgrade_max_health(self, upgrade: float):
         """ Increase the max health of player
 
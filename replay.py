@@ -0,0 +1,117 @@
+"""Replay of a recorded game session at maximum speed, without a window.
+
+Sessions are recorded by running the game with the MARIO_RECORD environment
+variable set to the file to record to, then replayed with
+    $python replay.py recording.json
+
+The hash of the game state after every tick is checked against the recording,
+reporting the first tick at which the replay diverged.
+"""
+
+import sys
+import time
+import argparse
+from typing import List, Optional
+
+from game.recording import InputRecording, state_hash
+from MarioApp import MarioApp, read_config
+
+
+class HeadlessStatusDisplay:
+    """A status display which displays nothing"""
+
+    def reset_score(self):
+        pass
+
+    def reset_health(self):
+        pass
+
+    def update_score(self):
+        pass
+
+    def update_health(self):
+        pass
+
+    def update_invincible(self):
+        pass
+
+    def not_invincible(self):
+        pass
+
+
+class HeadlessMarioApp(MarioApp):
+    """A game of Mario which is only ever ticked, never drawn or bound to input"""
+
+    def __init__(self, recording: InputRecording):
+        """Construct the game a recording was started from
+
+        Parameters:
+            recording (InputRecording): The recording of the game
+        """
+        self._master = None
+        config = read_config(recording.get_config())
+        self._setup_game(config, seed=recording.get_seed())
+        self._status_display = HeadlessStatusDisplay()
+
+    def _record_high_score(self):
+        """High scores are not recorded by a replay"""
+        pass
+
+    def _game_over(self):
+        """A replay ends when the player is out of health, rather than asking to restart"""
+        pass
+
+
+def replay(recording: InputRecording) -> Optional[int]:
+    """Replay a recording, checking the state after each tick against it
+
+    Parameters:
+        recording (InputRecording): The recording to replay
+
+    Returns:
+        (int): The first tick at which the replay diverged from the recording,
+               or None if the replay matched every recorded tick
+    """
+    app = HeadlessMarioApp(recording)
+    events = recording.get_events()
+    index = 0
+
+    for tick, expected in enumerate(recording.get_hashes()):
+        while index < len(events) and events[index][0] == tick:
+            _, action, argument = events[index]
+            if action == "press":
+                app.press_key(argument)
+            elif action == "release":
+                app.release_key(argument)
+            elif action == "reset":
+                app.reset_level()
+            elif action == "load":
+                app.reset_world(argument)
+            index += 1
+
+        app.tick()
+        if state_hash(app._world, app._player) != expected:
+            return tick
+
+    return None
+
+
+def main(argv: List[str]):
+    parser = argparse.ArgumentParser(description="Replay a recorded game session.")
+    parser.add_argument("recording", help="the recording file to replay")
+    args = parser.parse_args(argv)
+
+    recording = InputRecording.load(args.recording)
+    start = time.perf_counter()
+    diverged = replay(recording)
+    elapsed = time.perf_counter() - start
+
+    print(f"Replayed {recording.get_tick_count()} ticks in {elapsed:.2f}s")
+    if diverged is not None:
+        print(f"Diverged from the recording at tick {diverged}")
+        sys.exit(1)
+    print("Matched the recording at every tick")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
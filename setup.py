@@ -3,6 +3,9 @@ __version__ = "1.1.0"
 import sys
 import subprocess
 
+# The packages required to run the game, neither of which is optional
+REQUIREMENTS = ["pymunk", "numpy"]
+
 
 def execute(cmd):
     process = subprocess.run(cmd,
@@ -21,4 +24,5 @@ def execute(cmd):
 
 
 if __name__ == '__main__':
-    execute([sys.executable, "-m", "pip", "install", "pymunk"])
+    for requirement in REQUIREMENTS:
+        execute([sys.executable, "-m", "pip", "install", requirement])
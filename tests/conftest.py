@@ -0,0 +1,54 @@
+"""
+Fixtures shared by the tests, which run without a display from the repository root:
+    $python -m pytest tests
+"""
+
+import os
+
+import pytest
+
+import MarioApp
+from level import WorldBuilder, build_level, compile_level
+from player import Player
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEVEL = os.path.join(ROOT, "level1.txt")
+
+
+class Clock:
+    """A simulated clock, advanced by hand"""
+
+    def __init__(self):
+        self.time = 0.
+
+    def __call__(self) -> float:
+        return self.time
+
+
+def build_world(level: str = LEVEL, clock=None, **kwargs):
+    """Build the world of a level with the game's entities, and a player in its top left corner
+
+    Returns:
+        (tuple<World, Player>): The world and its player
+    """
+    builder = WorldBuilder(MarioApp.BLOCK_SIZE, fallback=MarioApp.create_unknown,
+                           clock=clock or Clock(), seed=1, **kwargs)
+    MarioApp.register_builders(builder)
+    world = build_level(builder, compile_level(level))
+    player = Player(max_health=5)
+    world.add_player(player, MarioApp.BLOCK_SIZE, MarioApp.BLOCK_SIZE)
+    return world, player
+
+
+def settle(world, player, steps: int = 50):
+    """Step a world until its player has landed"""
+    for _ in range(steps):
+        world.step((world, player))
+
+
+@pytest.fixture
+def level1():
+    """(tuple<World, Player>) The world of level1.txt, with its player landed"""
+    world, player = build_world()
+    settle(world, player)
+    return world, player
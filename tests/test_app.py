@@ -0,0 +1,100 @@
+import math
+
+import pytest
+
+import MarioApp
+from game.recording import InputRecording
+from game.world import STEP_SIZE
+from replay import HeadlessMarioApp
+from tests.conftest import ROOT
+
+# the seconds until the bricks removed by a switch are added back, with a step to spare
+SWITCH_TIME = 10.1
+
+# the goals of the starting level, which every configuration needs
+LEVELS = "==level1.txt==\ntunnel : bonus.txt\ngoal : level2.txt\n==bonus.txt==\ngoal : level1.txt\n"
+
+
+def create_app(tmp_path, monkeypatch, config: str) -> HeadlessMarioApp:
+    """Returns a game set up from the lines of a configuration file, run from the repository root"""
+    monkeypatch.chdir(ROOT)
+    filename = tmp_path / "config.txt"
+    filename.write_text(config)
+    return HeadlessMarioApp(InputRecording(str(filename), 1))
+
+
+def test_player_health_is_configured(tmp_path, monkeypatch):
+    app = create_app(tmp_path, monkeypatch, "==World==\nstart : level1.txt\n==Player==\nhealth : 3\n" + LEVELS)
+    assert app._player.get_max_health() == 3
+    assert app._player.get_health() == 3
+
+
+def test_player_health_defaults_to_five(tmp_path, monkeypatch):
+    app = create_app(tmp_path, monkeypatch, "==World==\nstart : level1.txt\n" + LEVELS)
+    assert app._player.get_max_health() == 5
+
+
+@pytest.fixture
+def pressed_switch(monkeypatch):
+    """(tuple<HeadlessMarioApp, list<tuple<int, int>>>) A game of level1.txt whose switch the player
+    has just pressed, and the cells of the bricks it removed"""
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setattr(MarioApp, "get_collision_direction", lambda player, block: "A")
+    app = HeadlessMarioApp(InputRecording("config.txt", 1))
+    world = app._world
+    switch = world.get_block(*world.grid_to_xy_centre(*world.get_tile_map().find("switch")[0]))
+    switch.on_hit(None, (world, app._player))
+    cells = [world.xy_to_grid(x, y) for x, y in app._player.get_bricks_position()]
+    assert cells and all(world.get_tile(*cell) is None for cell in cells)
+    return app, cells
+
+
+def wait_for_switch(app: HeadlessMarioApp):
+    """Ticks a game once the time of its switch is up"""
+    app._ticks += int(SWITCH_TIME / STEP_SIZE)
+    app.tick()
+
+
+def test_switch_restores_bricks_into_empty_cells(pressed_switch):
+    app, cells = pressed_switch
+    app._world.set_tile(*cells[0], "cube")
+    wait_for_switch(app)
+    assert app._world.get_tile(*cells[0]) == "cube"
+    assert all(app._world.get_tile(*cell) == "brick" for cell in cells[1:])
+    assert app._player.get_bricks_position() == []
+
+
+def test_switch_restores_bricks_only_into_its_world(pressed_switch):
+    app, cells = pressed_switch
+    app.reset_level()
+    app._world.set_tile(*cells[0], None)
+    wait_for_switch(app)
+    assert app._world.get_tile(*cells[0]) is None
+    assert app._player.get_bricks_position() == []
+
+
+def test_switch_removes_bricks_within_its_radius(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setattr(MarioApp, "get_collision_direction", lambda player, block: "A")
+    app = HeadlessMarioApp(InputRecording("config.txt", 1))
+    world = app._world
+    column, row = world.get_tile_map().find("switch")[0]
+    x, y = world.grid_to_xy_centre(column, row)
+    # fill the square around the switch with bricks, its corners beyond the switch's reach
+    cells = []
+    for dx in range(-4, 5):
+        for dy in range(-4, 5):
+            cell = column + dx, row + dy
+            if world.get_tile(*cell) is None:
+                world.set_tile(*cell, "brick")
+                # cells beyond the edges of the level are left empty
+                if world.get_tile(*cell) == "brick":
+                    cells.append(cell)
+
+    world.get_block(x, y).on_hit(None, (world, app._player))
+    for cell in cells:
+        centre_x, centre_y = world.grid_to_xy_centre(*cell)
+        # the distance from the switch to the nearest point of the brick
+        dx = max(abs(centre_x - x) - MarioApp.BLOCK_SIZE / 2, 0)
+        dy = max(abs(centre_y - y) - MarioApp.BLOCK_SIZE / 2, 0)
+        assert (world.get_tile(*cell) is None) == (math.hypot(dx, dy) <= MarioApp.SWITCH_RANGE)
@@ -0,0 +1,78 @@
+import numpy
+import pytest
+
+from game.ecs import ComponentStore, System
+from player import INVINCIBLE_TIME
+from tests.conftest import Clock, build_world, settle
+
+FIELDS = [("value", numpy.float64), ("owner", object)]
+
+
+def check_consistent(store: ComponentStore):
+    """Checks every entity's row holds its own component"""
+    for row, entity in enumerate(store.get_entities()):
+        assert store.get(int(entity), "value") == entity
+        assert store.get_column("value")[row] == entity
+
+
+def test_swap_remove_keeps_indices_consistent():
+    store = ComponentStore(FIELDS, capacity=2)
+    for entity in range(6):
+        store.add(entity, value=entity, owner=str(entity))
+    assert len(store) == 6 and 5 in store
+
+    assert store.remove(1)
+    assert not store.remove(1)
+    assert list(store.get_entities()) == [0, 5, 2, 3, 4]
+    check_consistent(store)
+
+    assert store.remove(4)
+    assert store.remove(0)
+    assert sorted(store.get_entities()) == [2, 3, 5]
+    assert 0 not in store and 1 not in store
+    check_consistent(store)
+
+    store.set(5, "value", 5)
+    store.add(7, value=7, owner=None)
+    check_consistent(store)
+
+
+def test_removed_rows_release_objects():
+    store = ComponentStore(FIELDS)
+    store.add(1, value=1, owner=object())
+    store.remove(1)
+    assert store._rows["owner"][0] == 0
+
+
+def test_add_rejects_duplicates_and_wrong_fields():
+    store = ComponentStore(FIELDS)
+    store.add(1, value=1, owner=None)
+    with pytest.raises(ValueError):
+        store.add(1, value=1, owner=None)
+    with pytest.raises(ValueError):
+        store.add(2, value=1)
+    with pytest.raises(KeyError):
+        store.get(2, "value")
+
+
+def test_systems_must_implement_update():
+    class Idle(System):
+        component = "step"
+
+    with pytest.raises(TypeError):
+        Idle()
+
+
+def test_added_player_is_stepped_by_its_timer():
+    clock = Clock()
+    world, player = build_world(clock=clock)
+    player.is_invincible()
+    assert player.get_invincible()
+
+    clock.time = INVINCIBLE_TIME - .1
+    settle(world, player, 1)
+    assert player.get_invincible()
+
+    clock.time = INVINCIBLE_TIME + .1
+    settle(world, player, 1)
+    assert not player.get_invincible()
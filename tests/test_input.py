@@ -0,0 +1,47 @@
+from game.input import InputState
+
+BINDINGS = {"a": "left", "Left": "left", "w": "jump"}
+
+
+def test_press_is_applied_at_update():
+    state = InputState(BINDINGS)
+    assert state.press("a")
+    assert not state.is_held("left")
+    state.update()
+    assert state.is_held("left") and state.was_pressed("left")
+    state.update()
+    assert state.is_held("left") and not state.was_pressed("left")
+
+
+def test_release_and_press_within_a_tick_are_coalesced():
+    state = InputState(BINDINGS)
+    state.press("a")
+    state.update()
+
+    # auto-repeat sends a release followed by a press
+    state.release("a")
+    assert not state.press("a")
+    state.update()
+    assert state.is_held("left") and not state.was_pressed("left")
+
+
+def test_press_and_release_within_a_tick_is_seen_once():
+    state = InputState(BINDINGS)
+    state.press("w")
+    state.release("w")
+    state.update()
+    assert state.is_held("jump") and state.was_pressed("jump")
+    state.update()
+    assert not state.is_held("jump")
+
+
+def test_keys_share_actions_and_unbound_keys_are_ignored():
+    state = InputState(BINDINGS)
+    assert state.press("a")
+    assert not state.press("Left")
+    assert not state.press("q")
+    state.update()
+    assert state.is_held("left") and not state.is_held("jump")
+
+    state.clear()
+    assert not state.is_held("left")
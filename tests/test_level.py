@@ -0,0 +1,48 @@
+import itertools
+import threading
+
+import pytest
+
+from level import LevelPrefetcher
+from level_generator import generate_level
+
+
+def test_generated_level_depends_only_on_seed():
+    level = generate_level(80, seed=5)
+    assert generate_level(80, seed=5) == level
+    assert generate_level(80, seed=6) != level
+
+    lines = level.splitlines()
+    assert len(lines) == 20 and {len(line) for line in lines} == {80}
+
+
+def test_generated_level_rejects_small_sizes():
+    with pytest.raises(ValueError):
+        generate_level(10, seed=1)
+    with pytest.raises(ValueError):
+        generate_level(80, height=5, seed=1)
+
+
+def test_prefetcher_evicts_least_recently_used():
+    counter = itertools.count()
+    lock = threading.Lock()
+
+    def load(filename):
+        with lock:
+            return [(filename, next(counter), 0)]
+
+    prefetcher = LevelPrefetcher({"a": ["b", "c"]}, capacity=2, loader=load)
+    try:
+        prefetcher.prefetch_neighbours("a")
+        first, second = prefetcher.get("b"), prefetcher.get("c")
+        assert prefetcher.get("b") is first
+
+        # c is now the least recently used
+        prefetcher.prefetch("d")
+        assert prefetcher.get("b") is first
+        assert prefetcher.get("c") is not second
+
+        prefetcher.clear()
+        assert prefetcher.get("b") is not first
+    finally:
+        prefetcher.shutdown()
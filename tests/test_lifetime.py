@@ -0,0 +1,53 @@
+import pytest
+
+from game.lifetime import EXPIRED, OVER_BUDGET, SPAWNED, LifetimePolicy
+from game.projectile import Fireball
+from tests.conftest import Clock, build_world, settle
+
+
+def test_policy_rejects_negative_limits():
+    with pytest.raises(ValueError):
+        LifetimePolicy(ttls={"fireball": -1})
+    with pytest.raises(ValueError):
+        LifetimePolicy(budgets={"coin": -1})
+
+
+def test_policy_limits_and_bounds():
+    policy = LifetimePolicy({"fireball": 6}, {"coin": 2}, margin=10, floor=4)
+    assert policy.get_ttl("fireball") == 6 and policy.get_ttl("coin") is None
+    assert policy.get_budget("coin") == 2 and policy.get_budget("fireball") is None
+    assert policy.get_bounds(100, 50) == (-10, -10, 110, 46)
+
+
+def test_spawn_budget_is_per_spawner_and_id():
+    world, player = build_world()
+    world.set_lifetime_policy(LifetimePolicy(budgets={"fireball": 1}))
+    spawner = object()
+
+    assert world.can_spawn(spawner, "fireball")
+    world.add_projectile(Fireball(), 100, 20, spawner=spawner)
+    assert world.get_spawn_count(spawner, "fireball") == 1
+    assert not world.can_spawn(spawner, "fireball")
+    assert world.can_spawn(object(), "fireball")
+    assert world.can_spawn(spawner, "coin")
+    assert world.get_lifetime_counts()[OVER_BUDGET] == 1
+
+
+def test_spawned_things_expire_after_their_ttl():
+    clock = Clock()
+    world, player = build_world(clock=clock)
+    world.set_lifetime_policy(LifetimePolicy(ttls={"fireball": 2}, margin=10000))
+    spawner = object()
+    fireball = Fireball()
+    world.add_projectile(fireball, 100, 20, spawner=spawner)
+
+    clock.time = 1.9
+    settle(world, player, 1)
+    assert fireball in world.get_projectiles()
+
+    clock.time = 2
+    settle(world, player, 1)
+    assert fireball not in world.get_projectiles()
+    assert world.get_spawn_count(spawner, "fireball") == 0
+    counts = world.get_lifetime_counts()
+    assert counts[SPAWNED] == 1 and counts[EXPIRED] == 1
@@ -0,0 +1,75 @@
+from game.navigation import NavigationGraph
+from game.tilemap import TileMap
+from tests.conftest import build_world
+
+
+def create_graph(**kwargs):
+    """Returns a 10 by 5 map with a floor along its bottom row, and its graph"""
+    tile_map = TileMap((10, 5))
+    tile_map.fill(0, 4, 10, 1, "brick")
+    return tile_map, NavigationGraph(tile_map, **kwargs)
+
+
+def test_path_along_the_floor():
+    _, graph = create_graph()
+    assert graph.get_node_count() == 10
+    assert graph.get_node(3, 0) == (3, 3)
+    assert graph.find_path((0, 3), (9, 3)) == [(column, 3) for column in range(10)]
+
+
+def test_invalidate_after_set_tile():
+    tile_map, graph = create_graph()
+    assert graph.find_path((0, 3), (9, 3)) is not None
+
+    # a wall too high to jump over
+    tile_map.fill(5, 0, 1, 4, "brick")
+    assert graph.find_path((0, 3), (9, 3)) is not None
+    graph.invalidate(5, 0, 1, 4)
+    assert graph.find_path((0, 3), (9, 3)) is None
+
+    tile_map.fill(5, 0, 1, 3, None)
+    graph.invalidate(5, 0, 1, 3)
+    path = graph.find_path((0, 3), (9, 3))
+    assert (5, 2) in path
+
+
+def test_jump_over_gap():
+    tile_map, graph = create_graph(max_gap=2)
+    tile_map.fill(4, 4, 2, 1, None)
+    graph.invalidate(4, 4, 2, 1)
+    assert graph.find_path((0, 3), (9, 3)) is not None
+
+    tile_map.set_tile(6, 4, None)
+    graph.invalidate(6, 4)
+    assert graph.find_path((0, 3), (9, 3)) is None
+
+
+def test_path_cache_evicts_least_recently_used(monkeypatch):
+    _, graph = create_graph(cache_size=2)
+    searches = []
+    search = graph._search
+    monkeypatch.setattr(graph, "_search", lambda start, goal: searches.append((start, goal)) or search(start, goal))
+
+    first, second, third = ((0, 3), (9, 3)), ((0, 3), (5, 3)), ((2, 3), (7, 3))
+    graph.find_path(*first)
+    graph.find_path(*second)
+    graph.find_path(*first)
+    assert searches == [first, second]
+
+    graph.find_path(*third)
+    graph.find_path(*first)
+    graph.find_path(*second)
+    assert searches == [first, second, third, second]
+
+
+def test_worlds_are_built_without_navigation_by_default():
+    world, _ = build_world()
+    assert world.get_navigation() is None
+    assert world.find_path((24, 272), (1600, 272)) is None
+
+
+def test_path_across_level1():
+    world, _ = build_world(navigation=True)
+    path = world.find_path((24, 272), (1600, 272))
+    assert path is not None
+    assert path[0] == world.grid_to_xy_centre(1, 17) and path[-1] == world.grid_to_xy_centre(100, 17)
@@ -0,0 +1,74 @@
+import pytest
+
+from game.entity import Entity
+from game.projectile import Fireball, HitTable, Projectile, ProjectileSystem
+from player import Player
+
+
+def drop_fireball(world, player, x: float):
+    """Drops a fireball from above the player at x, returning the things it hit"""
+    hits = []
+    world.add_hit_handler(Fireball, Entity, lambda projectile, thing, point: hits.append(thing))
+    world.add_projectile(Fireball(), x, player.get_position()[1] - 60, (0, 60))
+    for _ in range(200):
+        world.step((world, player))
+        if hits:
+            break
+    return hits
+
+
+def test_fireball_hits_player_on_centre_line(level1):
+    world, player = level1
+    assert drop_fireball(world, player, player.get_position()[0]) == [player]
+
+
+@pytest.mark.parametrize("offset", [8, 10, 12])
+def test_fireball_hits_player_off_centre_line(level1, offset):
+    # the centre line of the fireball passes beside the player, but its radius overlaps
+    world, player = level1
+    x = player.get_position()[0] + offset
+    assert x - Fireball().get_radius() < player.get_shape().bb.right < x
+    assert drop_fireball(world, player, x) == [player]
+
+
+def test_fireball_misses_player_beyond_radius(level1):
+    world, player = level1
+    hits = drop_fireball(world, player, player.get_shape().bb.right + 2 * Fireball().get_radius())
+    assert hits and hits[0] is not player
+
+
+def test_projectile_system_packs_removed_projectiles():
+    system = ProjectileSystem(capacity=1)
+    first, second, third = Fireball(), Fireball(), Fireball()
+    for index, projectile in enumerate((first, second, third)):
+        system.add(projectile, (index, 0), (1, 0), 1)
+
+    assert system.remove(second)
+    assert not system.remove(second)
+    assert system.get_count() == 2
+
+    system.advance(1, (0, 0))
+    assert system.get_projectiles() == [first, third]
+    assert third.get_position() == (3., 0.)
+    assert second.get_position() == (1., 0.)
+
+
+def test_projectile_system_refuses_live_projectile():
+    system = ProjectileSystem()
+    fireball = Fireball()
+    system.add(fireball, (0, 0), (0, 0), 1)
+    with pytest.raises(ValueError):
+        system.add(fireball, (0, 0), (0, 0), 1)
+
+
+def test_hit_table_resolves_closest_base_classes():
+    table = HitTable()
+    calls = []
+    table.register(Projectile, Entity, lambda *args: calls.append("any"))
+    table.register(Fireball, Player, lambda *args: calls.append("player"))
+
+    table.dispatch(Fireball(), Player(), (0, 0))
+    table.dispatch(Fireball(), Entity(), (0, 0))
+    table.unregister(Fireball, Player)
+    table.dispatch(Fireball(), Player(), (0, 0))
+    assert calls == ["player", "any", "any"]
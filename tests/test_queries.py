@@ -0,0 +1,45 @@
+from game.block import Block
+
+
+def test_things_in_bb_filters_by_category(level1):
+    world, player = level1
+    left, top, right, bottom = player.get_shape().bb.left, 0, player.get_shape().bb.right, world.get_pixel_size()[1]
+    things = world.get_things_in_bb(left, top, right, bottom, categories=("player",))
+    assert things == [player]
+    assert all(isinstance(thing, Block) for thing in world.get_things_in_bb(left, top, right, bottom, ("block",)))
+
+
+def test_segment_hits_are_nearest_first(level1):
+    world, player = level1
+    x, y = player.get_position()
+    hits = world.get_things_on_segment((x, y - 40), (x, world.get_pixel_size()[1]))
+    assert hits[0][0] is player
+    assert [alpha for _, _, alpha in hits] == sorted(alpha for _, _, alpha in hits)
+
+
+def test_thick_segment_hits_beside_its_centre_line(level1):
+    world, player = level1
+    x, y = player.get_position()
+    beside = player.get_shape().bb.right + 4
+    start, end = (beside, y - 40), (beside, y - 10)
+    assert world.get_first_thing_on_segment(start, end, categories=("player",)) is None
+    assert world.get_things_on_segment(start, end, categories=("player",)) == []
+
+    thing, point, alpha = world.get_first_thing_on_segment(start, end, 8, categories=("player",))
+    assert thing is player and 0 < alpha < 1
+    assert [hit[0] for hit in world.get_things_on_segment(start, end, 8, categories=("player",))] == [player]
+
+
+def test_line_of_sight_is_blocked_by_terrain(level1):
+    world, player = level1
+    x, y = player.get_position()
+    assert world.has_line_of_sight((x, y), (x, y - 4))
+    assert not world.has_line_of_sight((x, y), (x, world.get_pixel_size()[1] - 1))
+
+
+def test_points_are_batched_by_index(level1):
+    world, player = level1
+    x, y = player.get_position()
+    hits = world.get_things_near_points([(x, y), (x + 10000, -10000)], 1, categories=("player",))
+    assert [(index, thing) for index, thing, _ in hits] == [(0, player)]
+    assert hits[0][2] < 0
@@ -0,0 +1,50 @@
+import random
+
+from game.recording import InputRecording
+from replay import HeadlessMarioApp, replay
+from tests.conftest import ROOT
+
+
+def record(recording: InputRecording, ticks: int):
+    """Plays a game of random key presses, auto-repeat and a reset into a recording"""
+    app = HeadlessMarioApp(recording)
+    app._recording = recording
+    keys = random.Random(0)
+    held = set()
+    for tick in range(ticks):
+        if tick % 5 == 0:
+            key = keys.choice("dawsf")
+            if key in held:
+                app.release_key(key)
+                held.discard(key)
+            else:
+                app.press_key(key)
+                held.add(key)
+            for key in held:
+                app.release_key(key)
+                app.press_key(key)
+        if tick == ticks // 2:
+            app.reset_level()
+        app.tick()
+
+
+def test_saved_recording_replays_without_diverging(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    recording = InputRecording("config.txt", 1234)
+    record(recording, 400)
+    assert recording.get_tick_count() == 400 and recording.get_events()
+
+    filename = str(tmp_path / "recording.json")
+    recording.save(filename)
+    loaded = InputRecording.load(filename)
+    assert loaded.get_events() == recording.get_events()
+    assert loaded.get_hashes() == recording.get_hashes()
+    assert replay(loaded) is None
+
+
+def test_replay_reports_first_divergent_tick(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    recording = InputRecording("config.txt", 1234)
+    record(recording, 60)
+    recording.get_hashes()[30] = "0" * 16
+    assert replay(recording) == 30
@@ -0,0 +1,30 @@
+from game.rng import RandomStreams
+
+
+def draw(streams: RandomStreams, key, count: int = 5):
+    stream = streams.get(key)
+    return [stream.random() for _ in range(count)]
+
+
+def test_streams_are_reproducible():
+    assert draw(RandomStreams(7), ("goomba", 3, 4)) == draw(RandomStreams(7), ("goomba", 3, 4))
+    assert draw(RandomStreams(7), "cloud") != draw(RandomStreams(8), "cloud")
+    assert RandomStreams(7).derive_seed("cloud") == RandomStreams(7).derive_seed("cloud")
+
+
+def test_streams_are_independent():
+    streams = RandomStreams(7)
+    expected = draw(RandomStreams(7), "cloud")
+    draw(streams, "goomba", 100)
+    streams.get_generator("cloud").random(100)
+    assert draw(streams, "cloud") == expected
+    assert draw(streams, "goomba") != draw(streams, "cloud")
+
+
+def test_generators_are_reproducible():
+    first = RandomStreams(7).get_generator("particles").random(4)
+    second = RandomStreams(7).get_generator("particles").random(4)
+    assert (first == second).all()
+    streams = RandomStreams()
+    assert isinstance(streams.get_seed(), int)
+    assert streams.get("key") is streams.get("key")
@@ -0,0 +1,67 @@
+import pytest
+
+from game.tilemap import EMPTY, TileMap
+
+
+def test_set_and_get_tiles():
+    tile_map = TileMap((4, 3), palette=("brick",))
+    assert tile_map.get_code("brick") == 1 and tile_map.get_code(None) == EMPTY
+
+    tile_map.set_tile(1, 2, "brick")
+    tile_map.set_tile(2, 2, "cube")
+    tile_map.set_tile(9, 9, "brick")
+    assert tile_map.get_tile(1, 2) == "brick"
+    assert tile_map.get_tile(2, 2) == "cube"
+    assert tile_map.get_tile(0, 0) is None
+    assert tile_map.get_tile(9, 9) is None
+    assert tile_map.get_palette() == [None, "brick", "cube"]
+    assert sorted(tile_map.find("brick")) == [(1, 2)]
+
+
+def test_edits_record_changes_only():
+    tile_map = TileMap((4, 3))
+    tile_map.set_tile(0, 0, "brick")
+    tile_map.set_tile(0, 0, "brick")
+    tile_map.set_tile(0, 0, None)
+    assert tile_map.get_edits() == [(0, 0, None, "brick"), (0, 0, "brick", None)]
+    tile_map.clear_edits()
+    assert tile_map.get_edits() == []
+
+
+def test_region_is_clipped_and_read_only():
+    tile_map = TileMap((4, 3))
+    tile_map.fill(0, 1, 4, 2, "brick")
+    region = tile_map.get_region(-1, 1, 3, 5)
+    assert region.shape == (2, 2)
+    assert (region == tile_map.get_code("brick")).all()
+    with pytest.raises(ValueError):
+        region[0, 0] = EMPTY
+
+
+def test_diff_translates_palettes():
+    first = TileMap((3, 2), palette=("brick", "cube"))
+    second = TileMap((3, 2), palette=("cube", "brick"))
+    for tile_map in (first, second):
+        tile_map.set_tile(0, 1, "brick")
+        tile_map.set_tile(1, 1, "cube")
+    assert first.diff(second) == []
+
+    second.set_tile(2, 0, "cube")
+    second.set_tile(0, 1, None)
+    assert sorted(first.diff(second)) == [(0, 1, "brick", None), (2, 0, None, "cube")]
+    with pytest.raises(ValueError):
+        first.diff(TileMap((2, 3)))
+
+
+def test_serialisation_round_trip(tmp_path):
+    tile_map = TileMap((5, 4))
+    tile_map.fill(0, 3, 5, 1, "brick")
+    tile_map.set_tile(2, 1, "bounce")
+
+    filename = str(tmp_path / "tiles.json")
+    tile_map.save(filename)
+    loaded = TileMap.load(filename)
+    assert loaded.get_size() == (5, 4)
+    assert loaded.get_palette() == tile_map.get_palette()
+    assert loaded.diff(tile_map) == []
+    assert loaded.get_edits() == []
@@ -0,0 +1,45 @@
+from game.entity import Entity
+from game.trigger import ENTER, EXIT, STAY, TriggerTable, TriggerZone
+from player import Player
+
+
+class GoalZone(TriggerZone):
+    __slots__ = ()
+    _id = "goal"
+
+
+class BonusZone(GoalZone):
+    __slots__ = ()
+    _id = "bonus"
+
+
+def test_handlers_resolve_to_closest_base_classes():
+    calls = []
+    table = TriggerTable()
+    table.register(TriggerZone, on_enter=lambda zone, thing: calls.append(("any", zone.get_id())))
+    table.register(GoalZone, Player, on_enter=lambda zone, thing: calls.append(("goal", zone.get_id())),
+                   on_exit=lambda zone, thing: calls.append(("left", zone.get_id())))
+
+    table.dispatch(ENTER, BonusZone(), Player())
+    table.dispatch(ENTER, GoalZone(), Entity())
+    table.dispatch(ENTER, TriggerZone(), Player())
+    table.dispatch(EXIT, BonusZone(), Player())
+    # the closest handler has no stay callback, so the event is not handled
+    table.dispatch(STAY, BonusZone(), Player())
+    assert calls == [("goal", "bonus"), ("any", "goal"), ("any", None), ("left", "bonus")]
+    assert not table.has_stay()
+
+
+def test_unregister_falls_back_to_base_handler():
+    calls = []
+    table = TriggerTable()
+    table.register(TriggerZone, on_stay=lambda zone, thing: calls.append("any"))
+    table.register(GoalZone, Player, on_stay=lambda zone, thing: calls.append("goal"))
+    assert table.has_stay()
+
+    table.dispatch(STAY, GoalZone(), Player())
+    table.unregister(GoalZone, Player)
+    table.dispatch(STAY, GoalZone(), Player())
+    table.unregister(TriggerZone)
+    table.dispatch(STAY, GoalZone(), Player())
+    assert calls == ["goal", "any"]